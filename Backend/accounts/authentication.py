@@ -0,0 +1,180 @@
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'auth:user:{user_id}:v{version}'
+
+
+def _state_key(user_id, version):
+    return f'auth:state:{user_id}:v{version}'
+
+
+def get_user_version(user_id):
+    """
+    Current cache version for a user. A missing version (first request or
+    eviction) starts from the clock, so it can never collide with a version
+    an older cached User was stored under.
+    """
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached copy of the user (see accounts/signals.py)."""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def get_auth_state(user_id):
+    """
+    (is_active, is_staff, password hash) for a user, or None if there is no
+    such user. Cached under the user's version like the User itself, but
+    read with a three-column query.
+    """
+    key = _state_key(user_id, get_user_version(user_id))
+    state = cache.get(key)
+    if state is None:
+        row = (
+            get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('is_active', 'is_staff', 'password').first()
+        )
+        if row is None:
+            return None
+        is_active, is_staff, password = row
+        state = (is_active, is_staff, get_md5_hash_password(password))
+        cache.set(key, state, settings.AUTH_USER_CACHE_TIMEOUT)
+    return state
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for simplejwt's JWTAuthentication that keeps the
+    User row in the cache for AUTH_USER_CACHE_TIMEOUT seconds instead of
+    loading it on every request. Saving a User bumps its version, so profile,
+    password and is_staff changes are seen on the very next request.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            # Let simplejwt raise its usual "no recognizable user" error
+            return super().get_user(validated_token)
+
+        key = _user_key(user_id, get_user_version(user_id))
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # Same checks simplejwt runs after its DB lookup
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class ClaimsUser(TokenUser):
+    """A TokenUser whose id is the int primary key rather than the claim string."""
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    """
+    For read-only endpoints that only need who the user is: request.user is
+    a ClaimsUser built from the token's user id, username and is_staff
+    claims, not a User. The token is still checked against the user's
+    cached auth state (get_auth_state), so a deactivated user, a token
+    issued before a password change, or one whose is_staff claim is out of
+    date is turned away. Tokens without the claims get a User as usual.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or 'username' not in validated_token or 'is_staff' not in validated_token:
+            return super().get_user(validated_token)
+
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, is_staff, password_hash = state
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        if validated_token['is_staff'] != is_staff:
+            raise AuthenticationFailed(_("The user's permissions have changed."), code="user_changed")
+
+        return ClaimsUser(validated_token)
+
+
+def token_user_id(request):
+    """
+    User id from a valid Bearer token, or None. Checks the signature and
+    expiry only — no DB or cache lookup — so it is cheap enough for routing
+    decisions made before (or without) full authentication.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authenticator.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return authenticator.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def aauthenticate(request, authenticator_class=CachedJWTAuthentication):
+    """
+    JWT authentication for plain async views (see */async_views.py), which
+    don't go through DRF. Sets request.user to the token's user or an
+    AnonymousUser, like DRF would; raises AuthenticationFailed on a bad token.
+    Batch sub-requests arrive already authenticated (see batch_views.py).
+    """
+    forced_user = getattr(request, '_force_auth_user', None)
+    if forced_user is not None:
+        request.user, request.auth = forced_user, getattr(request, '_force_auth_token', None)
+        return request.user
+
+    result = await sync_to_async(authenticator_class().authenticate)(request)
+    if result is None:
+        request.user, request.auth = AnonymousUser(), None
+    else:
+        request.user, request.auth = result
+    return request.user
@@ -0,0 +1,6 @@
+from django.urls import path
+from .batch_views import batch
+
+urlpatterns = [
+    path('', batch, name='batch'),
+]
@@ -0,0 +1,173 @@
+import io
+import json
+import logging
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, connection, transaction
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Not copied from the batch request onto its sub-requests
+SKIP_META = {'CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'PATH_INFO', 'REQUEST_METHOD', 'wsgi.input'}
+
+
+def build_subrequest(request, method, path, body):
+    """
+    An HttpRequest for one sub-request. It carries the batch's headers,
+    cookies and session, and the batch's already-authenticated user —
+    DRF picks that up as a forced authentication instead of checking the
+    token again.
+    """
+    path, _, query = path.partition('?')
+    raw = json.dumps(body).encode() if body is not None else b''
+
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {k: v for k, v in request.META.items() if k not in SKIP_META}
+    sub.META.update(
+        REQUEST_METHOD=method, PATH_INFO=path, QUERY_STRING=query,
+        CONTENT_TYPE='application/json', CONTENT_LENGTH=str(len(raw)),
+        HTTP_ACCEPT='application/json',
+    )
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    sub._stream = io.BytesIO(raw)
+    sub._read_started = False
+    if hasattr(request, 'session'):
+        sub.session = request.session
+
+    if request.user.is_authenticated:
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def run_subrequest(request, item):
+    """Dispatch one {method, path, body} and return its {status, body}."""
+    if not isinstance(item, dict):
+        return error_result(status.HTTP_400_BAD_REQUEST, 'Each request must be an object.')
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    if method not in BATCH_METHODS:
+        return error_result(status.HTTP_405_METHOD_NOT_ALLOWED, f'Method {method} not allowed in a batch.')
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return error_result(status.HTTP_400_BAD_REQUEST, 'path must be an /api/ URL.')
+
+    try:
+        match = resolve(path.partition('?')[0])
+    except Resolver404:
+        return error_result(status.HTTP_404_NOT_FOUND, 'Not found.')
+    if match.view_name == 'batch':
+        return error_result(status.HTTP_400_BAD_REQUEST, 'Batches cannot be nested.')
+
+    sub = build_subrequest(request, method, path, item.get('body'))
+    sub.resolver_match = match
+    try:
+        if iscoroutinefunction(match.func):
+            response = async_to_sync(match.func)(sub, *match.args, **match.kwargs)
+        else:
+            response = match.func(sub, *match.args, **match.kwargs)
+    # Plain Django views raise these for the handler to turn into responses
+    except Http404:
+        return error_result(status.HTTP_404_NOT_FOUND, 'Not found.')
+    except PermissionDenied:
+        return error_result(status.HTTP_403_FORBIDDEN, 'Permission denied.')
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', method, path)
+        return error_result(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Internal server error.')
+
+    if response.streaming:
+        return error_result(status.HTTP_400_BAD_REQUEST, 'Streaming endpoints cannot be batched.')
+    if isinstance(response, Response):
+        # Skip the render-then-parse round trip; the batch renders it once
+        return {'status': response.status_code, 'body': response.data}
+    if response.get('Content-Type', '').startswith('application/json'):
+        return {'status': response.status_code, 'body': json.loads(response.content) if response.content else None}
+    return {'status': response.status_code, 'body': response.content.decode(response.charset, 'replace')}
+
+
+def error_result(code, message):
+    return {'status': code, 'body': {'error': message}}
+
+
+def uncompressed_if_private(items, response):
+    """
+    Keep CompressionMiddleware off a batch that calls any of the
+    COMPRESSION_SKIP_PATHS, as it would be off those endpoints themselves.
+    """
+    private = tuple(settings.COMPRESSION_SKIP_PATHS)
+    if any(isinstance(item, dict) and str(item.get('path', '')).startswith(private) for item in items):
+        response['Cache-Control'] = 'no-transform'
+    return response
+
+
+def run_atomic_subrequest(request, item):
+    """
+    run_subrequest in its own savepoint, checking deferred constraints
+    before leaving it. A foreign key to a missing row would otherwise only
+    fail at the batch's final commit, as a 500 for the whole batch.
+    """
+    try:
+        with transaction.atomic():
+            result = run_subrequest(request, item)
+            if result['status'] < 400:
+                connection.check_constraints()
+    except IntegrityError:
+        logger.exception('Batch sub-request %r broke a constraint', item)
+        return error_result(status.HTTP_409_CONFLICT, 'The request conflicts with existing data.')
+    return result
+
+
+@api_view(['POST'])
+def batch(request):
+    """
+    Several API calls in one round trip:
+
+    {
+        "atomic": false,
+        "requests": [
+            {"method": "PATCH", "path": "/api/cart/item/12/update/", "body": {"quantity": 2}},
+            {"method": "POST", "path": "/api/wishlist/check_product/", "body": {"product_id": 5}}
+        ]
+    }
+
+    Sub-requests run in order, in-process, as the batch's user (the token is
+    checked once). Results come back in the same order as {status, body}.
+    With "atomic": true they share one transaction; the first failure rolls
+    everything back and the remaining requests are skipped (status 424).
+    """
+    items = request.data.get('requests')
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'requests must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        return Response(
+            {'error': f'At most {settings.BATCH_MAX_REQUESTS} requests per batch.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if not request.data.get('atomic'):
+        return uncompressed_if_private(items, Response({'results': [run_subrequest(request, item) for item in items]}))
+
+    results = []
+    with transaction.atomic():
+        for n, item in enumerate(items):
+            result = run_atomic_subrequest(request, item)
+            results.append(result)
+            if result['status'] >= 400:
+                transaction.set_rollback(True)
+                skipped = error_result(
+                    status.HTTP_424_FAILED_DEPENDENCY,
+                    f'Not run: request {n} failed and the batch was rolled back.'
+                )
+                results.extend(skipped for _ in items[n + 1:])
+                break
+    return uncompressed_if_private(items, Response({'results': results}))
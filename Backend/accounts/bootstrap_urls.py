@@ -0,0 +1,6 @@
+from django.urls import path
+from .bootstrap_views import bootstrap
+
+urlpatterns = [
+    path('', bootstrap, name='bootstrap'),
+]
@@ -0,0 +1,59 @@
+from django.db.models import Count
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from cart.models import CartItem
+from cart.views import serialize_cart_items
+from orders.models import Order
+from wishlist.cache import get_wishlist_product_ids
+
+RECENT_ORDER_LIMIT = 5
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap(request):
+    """
+    Everything the SPA needs for first paint in one response: profile, cart,
+    wishlisted product IDs and recent order summaries.
+
+    Costs at most three queries (cart lines, order summaries, wishlist IDs on
+    a cache miss) — the user itself comes from the auth cache.
+    """
+    user = request.user
+
+    items = CartItem.objects.filter(cart__user=user).select_related('product')
+    cart_items, grand_total = serialize_cart_items(items)
+
+    recent_orders = (
+        Order.objects.filter(user=user)
+        .annotate(item_count=Count('items'))
+        .order_by('-created_at')[:RECENT_ORDER_LIMIT]
+    )
+
+    return Response({
+        'profile': {
+            'username': user.username,
+            'email': user.email,
+            'date_joined': user.date_joined.strftime('%B %d, %Y'),
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'is_staff': user.is_staff,
+        },
+        'cart': {
+            'items': cart_items,
+            'grand_total': float(grand_total),
+            'cart_count': sum(item['quantity'] for item in cart_items),
+        },
+        'wishlist_product_ids': sorted(get_wishlist_product_ids(user)),
+        'recent_orders': [
+            {
+                'id': o.id,
+                'status': o.status,
+                'total_amount': float(o.total_amount),
+                'item_count': o.item_count,
+                'created_at': o.created_at.strftime('%b %d, %Y at %I:%M %p'),
+            }
+            for o in recent_orders
+        ],
+    })
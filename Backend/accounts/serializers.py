@@ -25,6 +25,14 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Claims read by StatelessJWTAuthentication (accounts/authentication.py)
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
         # Attach extra user info to the login response
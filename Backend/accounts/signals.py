@@ -0,0 +1,17 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import bump_user_version
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # Login only touches last_login — not worth throwing the cache away for
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_user_version(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
@@ -1,3 +1,171 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+import config.urls
+from cart.models import Cart, CartItem
+from products.models import Product
+from .authentication import ClaimsUser, StatelessJWTAuthentication
+from .serializers import CustomTokenObtainPairSerializer
 
-# Create your tests here.
+
+class StatelessAuthenticationTests(TestCase):
+    """Order history is one of the endpoints on StatelessJWTAuthentication."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='shopper', password='old-Pass-123')
+        self.client = APIClient()
+        self.sign_in()
+
+    def sign_in(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return token
+
+    def history_status(self):
+        return self.client.get('/api/orders/').status_code
+
+    def test_user_comes_from_the_claims(self):
+        token = self.sign_in()
+        authenticator = StatelessJWTAuthentication()
+        authenticator.get_user(token)   # caches the auth state
+
+        with self.assertNumQueries(0):
+            user = authenticator.get_user(token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.username, user.is_staff), (self.user.id, 'shopper', False))
+        self.assertEqual(self.client.get('/api/orders/').wsgi_request.user.id, self.user.id)
+
+    def test_token_without_claims_gets_a_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.wsgi_request.user, User)
+
+    def test_deactivated_user_is_cut_off(self):
+        self.assertEqual(self.history_status(), 200)   # now cached
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.history_status(), 401)
+
+    def test_password_change_revokes_older_tokens(self):
+        self.assertEqual(self.history_status(), 200)
+        self.user.set_password('new-Pass-456')
+        self.user.save()
+        self.assertEqual(self.history_status(), 401)
+
+        self.sign_in()
+        self.assertEqual(self.history_status(), 200)
+
+    def test_out_of_date_is_staff_claim_is_refused(self):
+        self.assertEqual(self.history_status(), 200)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.history_status(), 401)
+
+        self.sign_in()
+        self.assertEqual(self.history_status(), 200)
+
+    def test_deleted_user_is_cut_off(self):
+        self.assertEqual(self.history_status(), 200)
+        self.user.delete()
+        self.assertEqual(self.history_status(), 401)
+
+
+# Test-only endpoints, mounted next to the real API for BatchTests
+def _missing(request):
+    raise Http404
+
+
+def _forbidden(request):
+    raise PermissionDenied
+
+
+def _dangling(request):
+    # Foreign keys are checked at commit, so this insert itself succeeds
+    CartItem.objects.create(cart_id=10 ** 9, product_id=int(request.GET['product']))
+    return JsonResponse({'ok': True})
+
+
+urlpatterns = [
+    *config.urls.urlpatterns,
+    path('api/_test/missing/', _missing),
+    path('api/_test/forbidden/', _forbidden),
+    path('api/_test/dangling/', _dangling),
+]
+
+
+@override_settings(ROOT_URLCONF='accounts.tests', BATCH_MAX_REQUESTS=3)
+class BatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='batcher')
+        cls.product = Product.objects.create(title='Lamp', description='d', price=Decimal('25.00'))
+        cls.item = CartItem.objects.create(cart=Cart.objects.create(user=cls.user), product=cls.product, quantity=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, *requests, atomic=False):
+        response = self.client.post('/api/batch/', {'atomic': atomic, 'requests': list(requests)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [r['status'] for r in response.data['results']]
+
+    def set_quantity(self, quantity):
+        return {'method': 'PATCH', 'path': f'/api/cart/item/{self.item.id}/update/', 'body': {'quantity': quantity}}
+
+    def quantity(self):
+        return CartItem.objects.get(id=self.item.id).quantity
+
+    def test_requests_run_independently_by_default(self):
+        self.assertEqual(self.batch(self.set_quantity(3), self.set_quantity(0), self.set_quantity(4)), [200, 400, 200])
+        self.assertEqual(self.quantity(), 4)
+
+    def test_atomic_batch_rolls_back_and_skips_the_rest_after_a_failure(self):
+        self.assertEqual(
+            self.batch(self.set_quantity(3), self.set_quantity(0), self.set_quantity(4), atomic=True),
+            [200, 400, 424],
+        )
+        self.assertEqual(self.quantity(), 1)
+
+        self.assertEqual(self.batch(self.set_quantity(3), self.set_quantity(4), atomic=True), [200, 200])
+        self.assertEqual(self.quantity(), 4)
+
+    def test_deferred_constraint_failure_is_the_sub_requests_result(self):
+        dangling = {'method': 'POST', 'path': f'/api/_test/dangling/?product={self.product.id}'}
+        with self.assertLogs('accounts.batch_views', 'ERROR'):
+            statuses = self.batch(self.set_quantity(3), dangling, self.set_quantity(4), atomic=True)
+
+        self.assertEqual(statuses, [200, 409, 424])
+        self.assertEqual(self.quantity(), 1)
+        self.assertEqual(CartItem.objects.count(), 1)
+
+    def test_not_found_and_permission_denied_keep_their_status(self):
+        self.assertEqual(
+            self.batch({'path': '/api/_test/missing/'}, {'path': '/api/_test/forbidden/'}, {'path': '/api/nowhere/'}),
+            [404, 403, 404],
+        )
+
+    def test_batches_cannot_be_nested(self):
+        nested = {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': [{'path': '/api/cart/view/'}]}}
+        self.assertEqual(self.batch(nested), [400])
+
+    def test_item_limit(self):
+        response = self.client.post('/api/batch/', {'requests': [{'path': '/api/cart/view/'}] * 4}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 3', response.data['error'])
+
+    def test_batches_reading_account_data_are_not_compressed(self):
+        requests = {'requests': [{'path': '/api/cart/view/'}, {'path': '/api/bootstrap/'}]}
+        response = self.client.post('/api/batch/', requests, format='json')
+        self.assertIn('no-transform', response['Cache-Control'])
+
+        requests = {'requests': [{'path': '/api/cart/view/'}]}
+        self.assertFalse(self.client.post('/api/batch/', requests, format='json').has_header('Cache-Control'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    help = ('Updates the sales rollups behind /api/analytics/sales/ with the orders placed or '
+            'changed since the last run (run every few minutes)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute every bucket from scratch (after deleting orders)')
+
+    def handle(self, *args, **options):
+        counts = rollups.run(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {counts['hour']} hour(s) and {counts['day']} day(s) of sales."
+        ))
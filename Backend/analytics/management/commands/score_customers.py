@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from analytics import customers
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the RFM scores and lifetime value of every customer (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=customers.CHUNK, help='Orders read per query')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        started = time.monotonic()
+        try:
+            scored = customers.run(options['chunk_size'])
+        except customers.NoOrders as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} customer(s) in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Watermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('category', 'Category'), ('product', 'Product')], max_length=8)),
+                ('key', models.CharField(blank=True, default='', max_length=100)),
+                ('label', models.CharField(blank=True, default='', max_length=255)),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('units', models.PositiveIntegerField()),
+                ('orders', models.PositiveIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'dimension', 'bucket', 'key'), name='unique_sales_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerScore',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recency_days', models.PositiveIntegerField()),
+                ('frequency', models.PositiveIntegerField()),
+                ('monetary', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('r_score', models.PositiveSmallIntegerField()),
+                ('f_score', models.PositiveSmallIntegerField()),
+                ('m_score', models.PositiveSmallIntegerField()),
+                ('segment', models.CharField(db_index=True, max_length=3)),
+                ('lifetime_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('first_order_at', models.DateTimeField()),
+                ('last_order_at', models.DateTimeField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
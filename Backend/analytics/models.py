@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+
+
+class SalesRollup(models.Model):
+    """
+    Revenue, units and orders for one hour or day, either in total or for one
+    category or product. Written only by `manage.py rollup_sales` (rollups.py),
+    which recomputes the buckets whose orders changed.
+
+    Orders count in the bucket they were placed in; cancelled orders don't count.
+    """
+    HOUR, DAY = 'hour', 'day'
+    PERIOD_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    TOTAL, CATEGORY, PRODUCT = 'total', 'category', 'product'
+    DIMENSION_CHOICES = [(TOTAL, 'Total'), (CATEGORY, 'Category'), (PRODUCT, 'Product')]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()   # start of the hour/day
+    dimension = models.CharField(max_length=8, choices=DIMENSION_CHOICES)
+    # Category name or product ID ('' for the total and for deleted products).
+    # Not a foreign key, so deleting a product leaves its sales history alone.
+    key = models.CharField(max_length=100, blank=True, default='')
+    label = models.CharField(max_length=255, blank=True, default='')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
+    units = models.PositiveIntegerField()
+    orders = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index the dashboard's range queries use
+            models.UniqueConstraint(fields=['period', 'dimension', 'bucket', 'key'], name='unique_sales_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M} {self.dimension} {self.label or self.key}"
+
+
+class Watermark(models.Model):
+    """How far an incremental job has got, by name."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class CustomerScore(models.Model):
+    """
+    RFM scores and lifetime value for one customer, rewritten in full by
+    `manage.py score_customers` (customers.py). Customers without a
+    non-cancelled order have no row.
+
+    Each score is the customer's quintile, 1 (worst) to 5 (best): recent,
+    frequent and big spenders score high. Customers tied on a value share
+    a score, so a quintile can hold more or fewer than a fifth of them.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='score'
+    )
+    recency_days = models.PositiveIntegerField()   # since the last order
+    frequency = models.PositiveIntegerField()      # orders placed
+    monetary = models.DecimalField(max_digits=14, decimal_places=2)   # total spent
+    r_score = models.PositiveSmallIntegerField()
+    f_score = models.PositiveSmallIntegerField()
+    m_score = models.PositiveSmallIntegerField()
+    # e.g. '555'; indexed so segments can be pulled out directly
+    segment = models.CharField(max_length=3, db_index=True)
+    # Spent so far plus CUSTOMER_LTV_YEARS more at the customer's yearly rate
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2)
+    first_order_at = models.DateTimeField()
+    last_order_at = models.DateTimeField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.segment}"
@@ -0,0 +1,144 @@
+"""
+Sales rollups for the admin dashboard. Dashboard queries read SalesRollup —
+a few thousand rows — instead of aggregating every LineItem.
+
+`manage.py rollup_sales` keeps the rollups current:
+
+  1. Find the hours in which orders created or changed since the last run
+     were placed (Order.updated_at, from the watermark minus
+     SALES_ROLLUP_OVERLAP_SECONDS, so an order committed late by a slow
+     transaction isn't skipped).
+  2. Recompute those hours, and the days they fall in, from their line
+     items and replace their rows. Recomputing a bucket is idempotent, so
+     the overlap only repeats a little work.
+  3. Move the watermark to the time the run started.
+
+Archived orders (archive app) are counted along with live ones. Deleting
+orders doesn't touch updated_at: run with --rebuild after a purge.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from archive.models import ArchivedLineItem, ArchivedOrder
+from orders.models import LineItem, Order
+from .models import SalesRollup, Watermark
+
+WATERMARK = 'rollup_sales'
+
+# Buckets recomputed per transaction
+CHUNK = 100
+
+TRUNC = {SalesRollup.HOUR: TruncHour, SalesRollup.DAY: TruncDay}
+LENGTH = {SalesRollup.HOUR: timedelta(hours=1), SalesRollup.DAY: timedelta(days=1)}
+
+STATS = {
+    'revenue': Sum(ExpressionWrapper(
+        F('product_price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)
+    )),
+    'units': Sum('quantity'),
+    'orders': Count('order', distinct=True),
+}
+
+
+def changed_buckets(since):
+    """
+    {period: bucket starts} holding the orders changed since `since`
+    (all orders when since is None).
+    """
+    if since is None:
+        orders = [Order.objects.all(), ArchivedOrder.objects.all()]
+    else:
+        # Archived orders no longer change
+        orders = [Order.objects.filter(updated_at__gte=since)]
+    hours = set()
+    for queryset in orders:
+        hours.update(queryset.annotate(hour=TruncHour('created_at')).values_list('hour', flat=True).distinct())
+    days = {timezone.localtime(h).replace(hour=0) for h in hours}
+    return {SalesRollup.HOUR: sorted(hours), SalesRollup.DAY: sorted(days)}
+
+
+def _ranges(starts, length):
+    """Sorted bucket starts as [start, end) ranges, neighbours merged."""
+    ranges = []
+    for start in starts:
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + length
+        else:
+            ranges.append([start, start + length])
+    return ranges
+
+
+def _aggregates(lines):
+    """((dimension, bucket, key), label, stats) for each group of the lines."""
+    for r in lines.values('bucket').annotate(**STATS):
+        yield (SalesRollup.TOTAL, r['bucket'], ''), '', r
+    for r in lines.values('bucket', 'product__category').annotate(**STATS):
+        category = r['product__category'] or ''
+        yield (SalesRollup.CATEGORY, r['bucket'], category), category or 'Deleted products', r
+    for r in lines.values('bucket', 'product_id').annotate(name=Max('product_name'), **STATS):
+        if r['product_id'] is None:
+            yield (SalesRollup.PRODUCT, r['bucket'], ''), 'Deleted products', r
+        else:
+            yield (SalesRollup.PRODUCT, r['bucket'], str(r['product_id'])), r['name'], r
+
+
+def recompute(period, starts):
+    """Replace the rollup rows of the given buckets with fresh aggregates."""
+    placed = Q()
+    for start, end in _ranges(starts, LENGTH[period]):
+        placed |= Q(order__created_at__gte=start, order__created_at__lt=end)
+
+    # Live and archived lines are aggregated separately and added up; an
+    # order is in one place or the other, so its counts aren't doubled.
+    rows = {}
+    for model in (LineItem, ArchivedLineItem):
+        lines = (
+            model.objects.filter(placed).exclude(order__status='cancelled')
+            .annotate(bucket=TRUNC[period]('order__created_at')).order_by()
+        )
+        for (dimension, bucket, key), label, r in _aggregates(lines):
+            row = rows.get((dimension, bucket, key))
+            if row is None:
+                rows[dimension, bucket, key] = SalesRollup(
+                    period=period, bucket=bucket, dimension=dimension, key=key, label=label,
+                    revenue=r['revenue'], units=r['units'], orders=r['orders'],
+                )
+            else:
+                row.revenue += r['revenue']
+                row.units += r['units']
+                row.orders += r['orders']
+    rows = list(rows.values())
+
+    with transaction.atomic():
+        SalesRollup.objects.filter(period=period, bucket__in=starts).delete()
+        SalesRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+def run(rebuild=False):
+    """
+    Bring the rollups up to date. Returns how many buckets of each period
+    were recomputed.
+    """
+    started = timezone.now()
+    mark = Watermark.objects.filter(name=WATERMARK).first()
+    since = None
+    if mark is not None and not rebuild:
+        since = mark.value - timedelta(seconds=settings.SALES_ROLLUP_OVERLAP_SECONDS)
+    if rebuild:
+        SalesRollup.objects.all().delete()
+
+    buckets = changed_buckets(since)
+    for period, starts in buckets.items():
+        for i in range(0, len(starts), CHUNK):
+            recompute(period, starts[i:i + CHUNK])
+
+    Watermark.objects.update_or_create(name=WATERMARK, defaults={'value': started})
+    return {period: len(starts) for period, starts in buckets.items()}
+
+
+def rolled_up_through():
+    """When the last rollup run started, or None if it never ran."""
+    return Watermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first()
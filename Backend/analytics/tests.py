@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from orders.models import LineItem, Order
+from products.models import Product
+from . import rollups
+from .models import CustomerScore, SalesRollup
+
+
+def at(day, hour):
+    return datetime(2026, 3, day, hour, 15, tzinfo=dt_timezone.utc)
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create(username='buyer')
+        cls.admin = User.objects.create(username='boss', is_staff=True)
+        cls.phone, cls.ring = Product.objects.bulk_create([
+            Product(title='Phone', description='d', price=Decimal('100.00'), category='Electronics'),
+            Product(title='Ring', description='d', price=Decimal('40.00'), category='Jewelry'),
+        ])
+
+    def place(self, placed_at, *lines):
+        order = Order.objects.create(user=self.buyer, total_amount=Decimal('0'))
+        LineItem.objects.bulk_create([
+            LineItem(order=order, product=p, product_name=p.title, product_price=p.price, quantity=qty)
+            for p, qty in lines
+        ])
+        # created_at is auto_now_add; backdate it without touching updated_at
+        Order.objects.filter(id=order.id).update(created_at=placed_at)
+        order.refresh_from_db()
+        return order
+
+    def rollup(self, period, dimension, key=''):
+        return SalesRollup.objects.filter(period=period, dimension=dimension, key=key).order_by('bucket')
+
+    def test_rollups_by_hour_day_category_and_product(self):
+        self.place(at(1, 9), (self.phone, 1), (self.ring, 2))
+        self.place(at(1, 9), (self.phone, 1))
+        self.place(at(1, 14), (self.ring, 1))
+        cancelled = self.place(at(1, 14), (self.phone, 5))
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        self.assertEqual(rollups.run(), {'hour': 2, 'day': 1})
+
+        hours = self.rollup('hour', 'total')
+        self.assertEqual([(r.bucket.hour, r.revenue, r.units, r.orders) for r in hours],
+                         [(9, Decimal('280.00'), 4, 2), (14, Decimal('40.00'), 1, 1)])
+        (day,) = self.rollup('day', 'total')
+        self.assertEqual((day.revenue, day.units, day.orders), (Decimal('320.00'), 5, 3))
+        (jewelry,) = self.rollup('day', 'category', 'Jewelry')
+        self.assertEqual((jewelry.revenue, jewelry.units, jewelry.orders), (Decimal('120.00'), 3, 2))
+        (phone,) = self.rollup('day', 'product', str(self.phone.id))
+        self.assertEqual((phone.label, phone.units, phone.orders), ('Phone', 2, 2))
+
+    # No overlap, so the orders just placed count as seen after one run
+    @override_settings(SALES_ROLLUP_OVERLAP_SECONDS=0)
+    def test_incremental_run_recomputes_only_changed_buckets(self):
+        self.place(at(1, 9), (self.phone, 1))
+        order = self.place(at(2, 9), (self.ring, 1))
+        rollups.run()
+
+        self.assertEqual(rollups.run(), {'hour': 0, 'day': 0})
+
+        order.status = 'cancelled'
+        order.save()
+        self.assertEqual(rollups.run(), {'hour': 1, 'day': 1})
+
+        self.assertEqual([r.bucket.day for r in self.rollup('day', 'total')], [1])
+        self.assertFalse(self.rollup('day', 'product', str(self.ring.id)).exists())
+
+    def test_sales_endpoint_reads_the_rollups(self):
+        self.place(at(1, 9), (self.phone, 1), (self.ring, 2))
+        self.place(at(2, 9), (self.ring, 1))
+        rollups.run()
+
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        self.assertEqual(client.get('/api/analytics/sales/').status_code, 403)
+
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(4):
+            data = client.get('/api/analytics/sales/', {'since': '2026-03-01', 'until': '2026-03-03'}).json()
+        self.assertEqual(data['totals'], {'revenue': 220.0, 'units': 4, 'orders': 2})
+        self.assertEqual(len(data['timeline']), 2)
+        self.assertEqual([c['category'] for c in data['categories']], ['Jewelry', 'Electronics'])
+        self.assertEqual(data['top_products'][0], {
+            'product_id': self.ring.id, 'product_name': 'Ring', 'revenue': 120.0, 'units': 3, 'orders': 2,
+        })
+
+        self.assertEqual(client.get('/api/analytics/sales/', {'period': 'week'}).status_code, 400)
+        self.assertEqual(client.get('/api/analytics/sales/', {'since': 'soon'}).status_code, 400)
+
+
+class CustomerScoreTests(TestCase):
+    def test_scores_customers_by_recency_frequency_and_spend(self):
+        now = timezone.now()
+        users = User.objects.bulk_create([User(username=f'c{n}') for n in range(6)])
+        # Customer n placed n + 1 orders of 10.00, the last one n days ago
+        orders = Order.objects.bulk_create([
+            Order(user=u, total_amount=Decimal('10.00')) for n, u in enumerate(users) for _ in range(n + 1)
+        ])
+        for n, user in enumerate(users):
+            Order.objects.filter(user=user).update(created_at=now - timedelta(days=n))
+        # Cancelled orders don't count
+        Order.objects.create(user=users[0], total_amount=Decimal('500.00'), status='cancelled')
+        self.assertEqual(len(orders), 21)
+
+        call_command('score_customers', chunk_size=4, stdout=StringIO())
+
+        scores = {s.user_id: s for s in CustomerScore.objects.all()}
+        best, worst = scores[users[5].id], scores[users[0].id]
+        self.assertEqual((best.frequency, best.monetary, best.recency_days), (6, Decimal('60.00'), 5))
+        self.assertEqual((worst.frequency, worst.monetary, worst.recency_days), (1, Decimal('10.00'), 0))
+        self.assertEqual((worst.r_score, worst.f_score, worst.m_score), (5, 1, 1))
+        self.assertEqual(best.segment, '155')
+        # A customer of under a year counts as a year old: 10.00 + 10.00 a year for three years
+        self.assertEqual(worst.lifetime_value, Decimal('40.00'))
+
+    def test_empty_database_is_an_error(self):
+        with self.assertRaisesMessage(CommandError, 'no orders'):
+            call_command('score_customers', stdout=StringIO())
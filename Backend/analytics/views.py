@@ -0,0 +1,96 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Max, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from accounts.permissions import IsAdminUserCustom
+from config.db_router import replica_reads
+from . import rollups
+from .models import SalesRollup
+
+# How far back the dashboard looks when no `since` is given
+DEFAULT_SPAN = {SalesRollup.HOUR: timedelta(hours=48), SalesRollup.DAY: timedelta(days=30)}
+MAX_TOP = 100
+
+
+def parse_moment(value):
+    """A date or datetime query parameter as an aware datetime, or None if invalid."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def stats(r):
+    return {'revenue': float(r['revenue']), 'units': r['units'], 'orders': r['orders']}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUserCustom])
+@replica_reads
+def sales(request):
+    """
+    Admin only — revenue, units and orders over time, by category and for the
+    top products, read from the rollups kept by `manage.py rollup_sales`.
+
+    ?period=day|hour (default day), ?since= and ?until= (dates or datetimes;
+    default the last 30 days or 48 hours), ?top= products (default 10).
+    """
+    period = request.query_params.get('period', SalesRollup.DAY)
+    if period not in DEFAULT_SPAN:
+        return Response({'error': 'period must be "hour" or "day".'}, status=400)
+
+    until = timezone.now()
+    if 'until' in request.query_params:
+        until = parse_moment(request.query_params['until'])
+    since = until and until - DEFAULT_SPAN[period]
+    if 'since' in request.query_params:
+        since = parse_moment(request.query_params['since'])
+    if since is None or until is None:
+        return Response({'error': 'since and until must be ISO dates or datetimes.'}, status=400)
+
+    try:
+        top = min(max(int(request.query_params.get('top', 10)), 1), MAX_TOP)
+    except ValueError:
+        return Response({'error': 'top must be a number.'}, status=400)
+
+    rows = SalesRollup.objects.filter(period=period, bucket__gte=since, bucket__lt=until)
+    totals = {'revenue': Sum('revenue'), 'units': Sum('units'), 'orders': Sum('orders')}
+
+    timeline = [
+        {'bucket': r['bucket'].isoformat(), **stats(r)}
+        for r in rows.filter(dimension=SalesRollup.TOTAL).order_by('bucket').values('bucket', 'revenue', 'units', 'orders')
+    ]
+    categories = [
+        {'category': r['label'], **stats(r)}
+        for r in rows.filter(dimension=SalesRollup.CATEGORY).values('label').annotate(**totals).order_by('-revenue')
+    ]
+    top_products = [
+        {'product_id': int(r['key']) if r['key'] else None, 'product_name': r['name'], **stats(r)}
+        for r in rows.filter(dimension=SalesRollup.PRODUCT).values('key')
+        .annotate(name=Max('label'), **totals).order_by('-revenue')[:top]
+    ]
+
+    through = rollups.rolled_up_through()
+    return Response({
+        'period': period,
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'rolled_up_through': through and through.isoformat(),
+        'totals': {
+            'revenue': round(sum(t['revenue'] for t in timeline), 2),
+            'units': sum(t['units'] for t in timeline),
+            'orders': sum(t['orders'] for t in timeline),
+        },
+        'timeline': timeline,
+        'categories': categories,
+        'top_products': top_products,
+    })
@@ -0,0 +1,145 @@
+"""
+Moves settled and stale records out of the live tables, so those tables and
+their indexes only hold what the shop is still working on.
+
+What goes (ages from settings):
+  - Orders delivered or cancelled ARCHIVE_AFTER_DAYS ago (by updated_at), and
+    any order placed over ARCHIVE_MAX_AGE_DAYS ago. The payment placed with
+    an order goes with it, and so do their shared lines.
+  - Payments without an order: rejected ones after ARCHIVE_AFTER_DAYS, any
+    after ARCHIVE_MAX_AGE_DAYS.
+  - Guest or empty carts not updated for CART_ARCHIVE_AFTER_DAYS. Stock they
+    still hold is given back first.
+
+Each chunk is copied and deleted in one transaction, so a record is always in
+exactly one place; a run that stops halfway leaves the rest for the next one.
+The history endpoints read the archive on request (?include_archived=1), and
+the sales rollups and customer scores count archived orders too.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from cart.models import Cart, CartItem
+from inventory import stock
+from inventory.models import Reservation
+from orders.models import LineItem, Order
+from payments.models import Payment
+from .models import ArchivedCart, ArchivedLineItem, ArchivedOrder, ArchivedPayment
+
+SETTLED_ORDER_STATUSES = ['delivered', 'cancelled']
+SETTLED_PAYMENT_STATUSES = ['rejected']
+
+ORDER_FIELDS = ['id', 'user_id', 'status', 'total_amount', 'transaction_id', 'created_at', 'updated_at']
+PAYMENT_FIELDS = ['id', 'user_id', 'transaction_id', 'total_amount', 'status', 'created_at']
+LINE_FIELDS = ['id', 'order_id', 'payment_id', 'product_id', 'product_name', 'product_price', 'quantity']
+
+
+def archivable_orders(now):
+    settled = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    expired = now - timedelta(days=settings.ARCHIVE_MAX_AGE_DAYS)
+    return Order.objects.filter(
+        Q(status__in=SETTLED_ORDER_STATUSES, updated_at__lt=settled) | Q(created_at__lt=expired)
+    )
+
+
+def archivable_payments(now):
+    """Payments that aren't tied to an order (those go with their order)."""
+    settled = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    expired = now - timedelta(days=settings.ARCHIVE_MAX_AGE_DAYS)
+    with_order = LineItem.objects.filter(payment_id=OuterRef('pk'), order__isnull=False)
+    return Payment.objects.filter(
+        Q(status__in=SETTLED_PAYMENT_STATUSES, created_at__lt=settled) | Q(created_at__lt=expired),
+        ~Exists(with_order),
+    )
+
+
+def archivable_carts(now):
+    cutoff = now - timedelta(days=settings.CART_ARCHIVE_AFTER_DAYS)
+    has_items = CartItem.objects.filter(cart_id=OuterRef('pk'))
+    return Cart.objects.filter(Q(user=None) | ~Exists(has_items), updated_at__lt=cutoff)
+
+
+def _copy(queryset, fields, archive_model):
+    """Copy the rows to archive_model. Returns their IDs."""
+    rows = list(queryset.values(*fields))
+    archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+    return [row['id'] for row in rows]
+
+
+@transaction.atomic
+def archive_orders(order_ids):
+    """Move these orders, the payments placed with them and their lines."""
+    payment_ids = set(
+        LineItem.objects.filter(order_id__in=order_ids, payment__isnull=False).values_list('payment_id', flat=True)
+    )
+    lines = LineItem.objects.filter(Q(order_id__in=order_ids) | Q(payment_id__in=payment_ids, order=None))
+
+    order_ids = _copy(Order.objects.filter(id__in=order_ids).select_for_update(), ORDER_FIELDS, ArchivedOrder)
+    payment_ids = _copy(Payment.objects.filter(id__in=payment_ids).select_for_update(), PAYMENT_FIELDS, ArchivedPayment)
+    line_ids = _copy(lines, LINE_FIELDS, ArchivedLineItem)
+
+    LineItem.objects.filter(id__in=line_ids).delete()
+    Payment.objects.filter(id__in=payment_ids).delete()
+    Order.objects.filter(id__in=order_ids).delete()
+    return len(order_ids), len(payment_ids), len(line_ids)
+
+
+@transaction.atomic
+def archive_payments(payment_ids):
+    """Move these order-less payments and their lines."""
+    payment_ids = _copy(Payment.objects.filter(id__in=payment_ids).select_for_update(), PAYMENT_FIELDS, ArchivedPayment)
+    line_ids = _copy(LineItem.objects.filter(payment_id__in=payment_ids, order=None), LINE_FIELDS, ArchivedLineItem)
+
+    LineItem.objects.filter(id__in=line_ids).delete()
+    Payment.objects.filter(id__in=payment_ids).delete()
+    return len(payment_ids), len(line_ids)
+
+
+@transaction.atomic
+def archive_carts(cart_ids):
+    """Move these carts, with their items, after returning any stock they hold."""
+    stock.release(Reservation.objects.filter(cart_id__in=cart_ids))
+
+    items = {}
+    for item in CartItem.objects.filter(cart_id__in=cart_ids).values('cart_id', 'product_id', 'quantity'):
+        items.setdefault(item['cart_id'], []).append({'product_id': item['product_id'], 'quantity': item['quantity']})
+    carts = list(Cart.objects.filter(id__in=cart_ids).select_for_update().values('id', 'user_id', 'created_at', 'updated_at'))
+    ArchivedCart.objects.bulk_create([ArchivedCart(items=items.get(c['id'], []), **c) for c in carts])
+
+    Cart.objects.filter(id__in=[c['id'] for c in carts]).delete()
+    return len(carts)
+
+
+def _chunks(queryset, batch_size):
+    """The queryset's IDs, batch_size at a time, in ID order."""
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield ids
+
+
+def run(batch_size=1000, now=None):
+    """Archive everything that is due. Returns counts per kind of record."""
+    now = now or timezone.now()
+    counts = {'orders': 0, 'payments': 0, 'line_items': 0, 'carts': 0}
+
+    for ids in _chunks(archivable_orders(now), batch_size):
+        orders, payments, lines = archive_orders(ids)
+        counts['orders'] += orders
+        counts['payments'] += payments
+        counts['line_items'] += lines
+
+    for ids in _chunks(archivable_payments(now), batch_size):
+        payments, lines = archive_payments(ids)
+        counts['payments'] += payments
+        counts['line_items'] += lines
+
+    for ids in _chunks(archivable_carts(now), batch_size):
+        counts['carts'] += archive_carts(ids)
+
+    return counts
@@ -0,0 +1,3 @@
+def include_archived(request):
+    """Whether a history endpoint should read the archive too (?include_archived=1)."""
+    return request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from archive import archiver
+
+
+class Command(BaseCommand):
+    help = ('Moves settled or stale orders, payments and abandoned carts to the archive tables '
+            '(run nightly)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Records moved per transaction')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        counts = archiver.run(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Archived {orders} order(s), {payments} payment(s), {line_items} line item(s) '
+            'and {carts} cart(s).'.format(**counts)
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedpayment',
+            name='transaction_id',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
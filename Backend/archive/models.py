@@ -0,0 +1,71 @@
+"""
+Cold copies of orders, payments, their lines and abandoned carts, moved out
+of the live tables by `manage.py archive_records` (archiver.py). Rows keep
+their original IDs, so links between them, and any ID a customer was shown,
+stay valid.
+"""
+from django.conf import settings
+from django.db import models
+from products.models import Product
+
+
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_orders')
+    status = models.CharField(max_length=20)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    transaction_id = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived order #{self.id} — {self.status}"
+
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_payments')
+    transaction_id = models.CharField(max_length=255, unique=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived payment {self.transaction_id} — {self.status}"
+
+
+class ArchivedLineItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, null=True, related_name='items')
+    payment = models.ForeignKey(ArchivedPayment, on_delete=models.SET_NULL, null=True, related_name='items')
+    # No constraint: deleting a product mustn't have to touch the archive
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    product_name = models.CharField(max_length=255)
+    product_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+
+    @property
+    def item_total(self):
+        return self.product_price * self.quantity
+
+
+class ArchivedCart(models.Model):
+    """An abandoned cart with its items as [{'product_id': ..., 'quantity': ...}]."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, related_name='archived_carts'
+    )
+    items = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived cart {self.id}"
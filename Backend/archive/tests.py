@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from analytics import rollups
+from analytics.models import SalesRollup
+from cart.models import Cart, CartItem
+from inventory.models import Reservation, Stock
+from orders.models import LineItem, Order
+from payments.models import Payment
+from products.models import Product
+from . import archiver
+from .models import ArchivedCart, ArchivedLineItem, ArchivedOrder
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create(username='buyer')
+        cls.product = Product.objects.create(title='Lamp', description='d', price=Decimal('25.00'), category='Home')
+
+    def buy(self, status):
+        """An order and its payment sharing one line, as submit_payment writes them."""
+        transaction_id = f'TX-{Order.objects.count()}-{status}'
+        order = Order.objects.create(user=self.buyer, total_amount=Decimal('50.00'), transaction_id=transaction_id, status=status)
+        payment = Payment.objects.create(user=self.buyer, total_amount=Decimal('50.00'), transaction_id=transaction_id)
+        LineItem.objects.create(order=order, payment=payment, product=self.product,
+                                product_name='Lamp', product_price=Decimal('25.00'), quantity=2)
+        return order, payment
+
+    def later(self, days):
+        return timezone.now() + timedelta(days=days)
+
+    def test_settled_orders_move_with_their_payment_and_lines(self):
+        delivered, payment = self.buy('delivered')
+        pending, _ = self.buy('pending')
+
+        self.assertEqual(archiver.run(now=self.later(30)), {'orders': 0, 'payments': 0, 'line_items': 0, 'carts': 0})
+        counts = archiver.run(now=self.later(200))
+
+        self.assertEqual(counts, {'orders': 1, 'payments': 1, 'line_items': 1, 'carts': 0})
+        self.assertFalse(Order.objects.filter(id=delivered.id).exists())
+        self.assertFalse(Payment.objects.filter(id=payment.id).exists())
+        self.assertTrue(Order.objects.filter(id=pending.id).exists())
+        archived = ArchivedOrder.objects.get(id=delivered.id)
+        self.assertEqual((archived.status, archived.total_amount), ('delivered', Decimal('50.00')))
+        (line,) = ArchivedLineItem.objects.all()
+        self.assertEqual((line.order_id, line.payment_id, line.item_total), (delivered.id, payment.id, Decimal('50.00')))
+
+    def test_history_includes_archived_records_on_request(self):
+        delivered, payment = self.buy('delivered')
+        archiver.archive_orders([delivered.id])
+        recent, _ = self.buy('pending')
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+
+        self.assertEqual([o['id'] for o in client.get('/api/orders/').data], [recent.id])
+        orders = client.get('/api/orders/?include_archived=1').data
+        self.assertEqual([o['id'] for o in orders], [recent.id, delivered.id])
+        self.assertEqual(orders[1]['items'][0]['product_name'], 'Lamp')
+        payments = client.get('/api/payments/history/?include_archived=1').data
+        self.assertIn(payment.id, [p['id'] for p in payments])
+
+    def test_abandoned_guest_cart_returns_its_reserved_stock(self):
+        Stock.objects.create(product=self.product, available=3)
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        Reservation.objects.create(cart=cart, product=self.product, quantity=2, expires_at=self.later(1))
+
+        self.assertEqual(archiver.run(now=self.later(60))['carts'], 1)
+
+        self.assertFalse(Cart.objects.filter(id=cart.id).exists())
+        self.assertEqual(Stock.objects.get(product=self.product).available, 5)
+        self.assertEqual(ArchivedCart.objects.get(id=cart.id).items, [{'product_id': self.product.id, 'quantity': 2}])
+
+    def test_rollups_still_count_archived_orders(self):
+        self.buy('delivered')
+        rollups.run()
+        before = list(SalesRollup.objects.order_by('period', 'dimension', 'key').values_list('revenue', 'units', 'orders'))
+
+        call_command('archive_records', stdout=StringIO())  # nothing due yet
+        archiver.run(now=self.later(200))
+        rollups.run(rebuild=True)
+
+        after = list(SalesRollup.objects.order_by('period', 'dimension', 'key').values_list('revenue', 'units', 'orders'))
+        self.assertEqual(after, before)
+        self.assertFalse(Order.objects.exists())
+
+    def test_archived_transaction_id_cannot_be_submitted_again(self):
+        order, _ = self.buy('delivered')
+        archiver.archive_orders([order.id])
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        body = {'transaction_id': order.transaction_id, 'total_amount': '25.00',
+                'items': [{'product_id': self.product.id, 'product_name': 'Lamp', 'product_price': '25.00', 'quantity': 1}]}
+
+        response = client.post('/api/payments/submit/', body, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'This Transaction ID has already been submitted.')
+        self.assertFalse(Payment.objects.exists())
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from monitoring.admin_performance import LargeTableAdmin, related_count
 from .models import Cart, CartItem
 
 
@@ -7,13 +8,22 @@ class CartItemInline(admin.TabularInline):
     extra = 0
     readonly_fields = ('product', 'quantity')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'item_count', 'created_at')
-    list_filter = ('user',)
+    list_select_related = ('user',)
+    # Searched rather than a list_filter, which would list every user in the sidebar
+    search_fields = ('user__username',)
+    autocomplete_fields = ('user',)
     inlines = [CartItemInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(item_count=related_count(CartItem.objects, 'cart'))
+
     def item_count(self, obj):
-        return obj.items.count()
-    item_count.short_description = 'Items'
\ No newline at end of file
+        return obj.item_count
+    item_count.short_description = 'Items'
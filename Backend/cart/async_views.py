@@ -0,0 +1,45 @@
+"""Async version of the cart view, used when SERVE_ASYNC is on."""
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from accounts.authentication import CachedJWTAuthentication, aauthenticate
+from config.renderers import json_response
+from .models import Cart, CartItem
+from .views import serialize_cart_items
+
+
+async def aget_or_create_cart(request):
+    """Async twin of views.get_or_create_cart."""
+    if request.user.is_authenticated:
+        cart, _ = await Cart.objects.aget_or_create(user_id=request.user.id)
+        return cart
+    else:
+        cart_id = await request.session.aget('guest_cart_id')
+        if cart_id:
+            try:
+                return await Cart.objects.aget(id=cart_id, user=None)
+            except Cart.DoesNotExist:
+                pass
+        cart = await Cart.objects.acreate(user=None)
+        await request.session.aset('guest_cart_id', cart.id)
+        return cart
+
+
+@require_GET
+async def get_cart(request):
+    try:
+        await aauthenticate(request)
+    except AuthenticationFailed as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        response = json_response(detail, status=401)
+        response['WWW-Authenticate'] = CachedJWTAuthentication().authenticate_header(request)
+        return response
+
+    cart = await aget_or_create_cart(request)
+    items = [item async for item in CartItem.objects.filter(cart=cart).select_related('product')]
+    cart_data, grand_total = serialize_cart_items(items)
+
+    return json_response({
+        "items": cart_data,
+        "grand_total": float(grand_total),
+        "cart_count": sum(item.quantity for item in items),
+    })
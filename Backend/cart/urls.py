@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+read_views = async_views if settings.SERVE_ASYNC else views
 
 urlpatterns = [
     path('add/', views.add_to_cart, name='add_to_cart'),
-    path('view/', views.get_cart, name='get_cart'),
+    path('view/', read_views.get_cart, name='get_cart'),
     path('clear/', views.clear_cart, name='clear_cart'),
+    path('reserve/', views.reserve_cart, name='reserve_cart'),
     path('merge/', views.merge_guest_cart, name='merge_guest_cart'),
     path('item/<int:item_id>/delete/', views.remove_cart_item, name='remove_cart_item'),
     path('item/<int:item_id>/update/', views.update_cart_item, name='update_cart_item'),
-]
\ No newline at end of file
+]
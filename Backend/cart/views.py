@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from .models import Cart, CartItem
 from products.models import Product
 from django.db.models import Sum
+from inventory import stock
+from flashsale import admission
 
 
 def get_or_create_cart(request):
@@ -36,6 +38,11 @@ def add_to_cart(request):
     product_id = request.data.get('product_id')
     quantity = int(request.data.get('quantity', 1))
 
+    # During a flash sale, sale items are for shoppers let in from the queue
+    sale = admission.sale_for([product_id])
+    if sale and not admission.is_admitted(request, sale):
+        return admission.queue_response()
+
     cart = get_or_create_cart(request)
 
     try:
@@ -58,11 +65,11 @@ def add_to_cart(request):
     })
 
 
-@api_view(['GET'])
-def get_cart(request):
-    cart = get_or_create_cart(request)
-    items = CartItem.objects.filter(cart=cart).select_related('product')
-
+def serialize_cart_items(items):
+    """
+    Build the cart payload from CartItems (with product selected).
+    Shared by get_cart and the bootstrap endpoint.
+    """
     cart_data = []
     grand_total = 0
     for item in items:
@@ -77,6 +84,14 @@ def get_cart(request):
             "quantity": item.quantity,
             "item_total": float(item_total)
         })
+    return cart_data, grand_total
+
+
+@api_view(['GET'])
+def get_cart(request):
+    cart = get_or_create_cart(request)
+    items = CartItem.objects.filter(cart=cart).select_related('product')
+    cart_data, grand_total = serialize_cart_items(items)
 
     return Response({
         "items": cart_data,
@@ -106,6 +121,11 @@ def merge_guest_cart(request):
     if not guest_items:
         return Response({"message": "Nothing to merge."})
 
+    # Merging sale items in is buying them as much as add_to_cart is
+    sale = admission.sale_for(item.get('product_id') for item in guest_items if isinstance(item, dict))
+    if sale and not admission.is_admitted(request, sale):
+        return admission.queue_response()
+
     user_cart, _ = Cart.objects.get_or_create(user=request.user)
 
     merged = 0
@@ -154,6 +174,12 @@ def update_cart_item(request, item_id):
         if new_qty < 1:
             return Response({"error": "Quantity must be at least 1"}, status=400)
 
+        # Taking more of a sale item needs admission, as adding it did
+        if new_qty > item.quantity:
+            sale = admission.sale_for([item.product_id])
+            if sale and not admission.is_admitted(request, sale):
+                return admission.queue_response()
+
         item.quantity = new_qty
         item.save()
 
@@ -185,4 +211,24 @@ def remove_cart_item(request, item_id):
             "cart_count": get_cart_count(cart)
         }, status=200)
     except CartItem.DoesNotExist:
-        return Response({"error": "Item not found"}, status=404)
\ No newline at end of file
+        return Response({"error": "Item not found"}, status=404)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reserve_cart(request):
+    """
+    Called when checkout opens: holds the cart's items for
+    STOCK_RESERVATION_MINUTES so they can't sell out while the shopper pays.
+    Calling it again renews the hold for the cart's current contents.
+    Signed-in users only, like checkout itself: otherwise any anonymous
+    session could keep real stock off the shelf.
+    """
+    cart = get_or_create_cart(request)
+    try:
+        expires_at = stock.reserve_cart(cart)
+    except stock.OutOfStock as e:
+        return Response(
+            {"error": "Some items in your cart are out of stock.", "out_of_stock": e.product_ids},
+            status=409
+        )
+    return Response({"message": "Items reserved", "expires_at": expires_at.isoformat()})
@@ -0,0 +1,87 @@
+"""
+Read-replica routing.
+
+Views marked @replica_reads send their reads to one of REPLICA_DATABASES
+(see DATABASE_REPLICA_URLS in settings.py); everything else — all writes,
+and every read outside those views — goes to `default`.
+
+Replicas lag behind the primary, so a user who has just written is pinned to
+the primary for REPLICA_STICKY_SECONDS (PrimaryStickinessMiddleware in
+config/middleware.py). They see their own cart, orders and ratings right away
+instead of a slightly older copy.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from accounts.authentication import token_user_id
+
+# Set while a @replica_reads view runs and the user isn't pinned
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def _pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def should_use_replica(request):
+    if not settings.REPLICA_DATABASES:
+        return False
+    user_id = token_user_id(request)
+    return user_id is None or not is_pinned(user_id)
+
+
+def replica_reads(view):
+    """
+    Serve the view's reads from a replica. Only for GET views that can
+    tolerate a second or two of replication lag. Goes under @api_view.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _read_from_replica.set(should_use_replica(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_from_replica.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _read_from_replica.set(should_use_replica(request))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_from_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _read_from_replica.get() or not settings.REPLICA_DATABASES:
+            return None
+        # Inside a transaction on the primary, read what it has written
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication (or sync_replicas)
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,14 @@
+"""gunicorn settings shared by the sync and ASGI setups in start.sh."""
+
+
+def post_worker_init(worker):
+    # Flush the buffered view counts and recently viewed lists on a timer,
+    # so a quiet worker doesn't sit on them
+    from config import shutdown
+    shutdown.start_timers()
+
+
+def worker_exit(server, worker):
+    # Write out the buffered view counts and recently viewed lists
+    from config import shutdown
+    shutdown.run()
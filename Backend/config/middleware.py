@@ -0,0 +1,281 @@
+"""
+Project middleware:
+  StaticFilesMiddleware        — WhiteNoise, usable on the async (ASGI) stack
+  CompressionMiddleware        — negotiated zstd/brotli/gzip for API responses
+  PrimaryStickinessMiddleware  — keeps users who just wrote off the replicas.
+Static files are served precompressed by WhiteNoise before reaching
+CompressionMiddleware.
+
+All are sync- and async-capable. A single sync-only middleware makes Django
+bounce every ASGI request between the event loop and a thread, so keep it
+that way.
+"""
+import gzip
+import zlib
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from accounts.authentication import token_user_id
+from .db_router import pin_to_primary
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+# Only responses under this prefix are compressed
+COMPRESS_PATH = '/api/'
+
+# Formats that are already compressed (or must not be buffered) are left alone
+SKIP_CONTENT_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/octet-stream', 'application/pdf', 'application/zstd',
+    'text/event-stream',
+)
+
+
+class GzipStream:
+    def __init__(self, level):
+        self.obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, chunk):
+        # Sync-flush so every chunk of a streaming response reaches the client
+        return self.obj.compress(chunk) + self.obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.obj.flush()
+
+
+class BrotliStream:
+    def __init__(self, level):
+        self.obj = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self.obj.process(chunk) + self.obj.flush()
+
+    def finish(self):
+        return self.obj.finish()
+
+
+class ZstdStream:
+    def __init__(self, level):
+        self.obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self.obj.compress(chunk) + self.obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.obj.flush()
+
+
+def _codecs():
+    """encoding -> (one-shot compress(data, level), streaming class), for installed libraries."""
+    codecs = {'gzip': (lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), GzipStream)}
+    if brotli is not None:
+        codecs['br'] = (lambda data, level: brotli.compress(data, quality=level), BrotliStream)
+    if zstandard is not None:
+        codecs['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), ZstdStream)
+    return codecs
+
+
+def choose_encoding(accept_encoding, preferred):
+    """
+    Pick the encoding the client rates highest in Accept-Encoding, breaking
+    ties with our own preference order. Returns None if nothing matches.
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in preferred:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware (6.x is sync-only) with an async path. Looking up a
+    static file is a dict lookup, so it is safe to do on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least COMPRESSION_MIN_SIZE bytes with the
+    best encoding both sides support (COMPRESSION_ENCODINGS order). Streaming
+    responses are compressed chunk by chunk. Levels are set per encoding in
+    COMPRESSION_LEVELS — low levels trade a little bandwidth for a lot of CPU.
+
+    Only API responses are compressed. Everything else (the admin's HTML, with
+    its CSRF tokens and echoed search terms) and the API paths under
+    COMPRESSION_SKIP_PATHS (tokens, profile data) is sent as is: a secret
+    compressed alongside attacker-influenced input leaks through the response
+    size (BREACH).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        codecs = _codecs()
+        self.codecs = codecs
+        self.preferred = [e for e in settings.COMPRESSION_ENCODINGS if e in codecs]
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.preferred)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None:
+            return response
+
+        compress, stream_class = self.codecs[encoding]
+        level = settings.COMPRESSION_LEVELS[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(response.streaming_content, stream_class(level))
+            else:
+                response.streaming_content = self.compress_sync(response.streaming_content, stream_class(level))
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The body changed, so a strong ETag no longer matches byte-for-byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def should_compress(self, request, response):
+        path = request.path_info
+        if not path.startswith(COMPRESS_PATH) or path.startswith(tuple(settings.COMPRESSION_SKIP_PATHS)):
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        if response.status_code in (204, 206, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(SKIP_CONTENT_TYPES):
+            return False
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return False
+        return True
+
+    @staticmethod
+    def compress_sync(chunks, stream):
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+
+    @staticmethod
+    async def compress_async(chunks, stream):
+        async for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+
+
+class PrimaryStickinessMiddleware:
+    """
+    After a successful write request, pins the user to the primary database
+    for REPLICA_STICKY_SECONDS, so @replica_reads views don't show them data
+    from before their own write (see config/db_router.py).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            user_id = token_user_id(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+        return response
@@ -42,6 +42,8 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-sale-admission',
+    'x-visitor-id',
 ]
 
 # ── Media files ───────────────────────────────────────────────────────────────
@@ -70,7 +72,17 @@ SESSION_COOKIE_SAMESITE = 'None' if SESSION_COOKIE_SECURE else 'Lax'
 # ── REST Framework ────────────────────────────────────────────────────────────
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
+    ),
+    # orjson-backed JSON when available, stock DRF JSON otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -90,8 +102,14 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Tokens carry a hash of the password they were issued under, so a
+    # password change cuts off every older token (accounts/authentication.py)
+    'CHECK_REVOKE_TOKEN': True,
 }
 
+# How long CachedJWTAuthentication keeps a User in the cache (seconds)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+
 # ── Installed apps ────────────────────────────────────────────────────────────
 INSTALLED_APPS = [
     'accounts',
@@ -101,6 +119,12 @@ INSTALLED_APPS = [
     'payments',
     'ratings',
     'wishlist',
+    'inventory',
+    'flashsale',
+    'monitoring',
+    'notifications',
+    'analytics',
+    'archive',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -114,9 +138,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.middleware.StaticFilesMiddleware',
+    'config.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'config.middleware.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -145,11 +172,31 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # ── Database ──────────────────────────────────────────────────────────────────
+# Postgres: each worker process keeps a psycopg 3 connection pool, and every
+# connection is checked before it is handed out. Size the pool with DB_POOL_*;
+# workers x DB_POOL_MAX_SIZE must stay below the server's max_connections.
+# DB_POOL=False falls back to persistent connections with health checks.
+#
+# SQLite: WAL, IMMEDIATE transactions and a busy timeout, so concurrent writers
+# queue for the write lock instead of failing with "database is locked".
+#
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list. Views marked
+# @replica_reads (config/db_router.py) read from them, except for users who
+# wrote in the last REPLICA_STICKY_SECONDS. Locally, point both at SQLite
+# files and copy the primary over with `manage.py sync_replicas`.
 DATABASE_URL = config('DATABASE_URL', default=None)
+DATABASE_REPLICA_URLS = [
+    u.strip() for u in config('DATABASE_REPLICA_URLS', default='').split(',') if u.strip()
+]
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+SQLITE_TUNED = config('SQLITE_TUNED', default=True, cast=bool)
 
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        'default': dj_database_url.parse(
+            DATABASE_URL, conn_max_age=0 if DB_POOL else 600, conn_health_checks=True,
+        )
     }
 else:
     DATABASES = {
@@ -159,6 +206,176 @@ else:
         }
     }
 
+REPLICA_DATABASES = []
+for i, url in enumerate(DATABASE_REPLICA_URLS):
+    alias = f'replica_{i}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=0 if DB_POOL else 600, conn_health_checks=True)
+    # Tests read "replica" data straight from the test primary
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+
+for db in DATABASES.values():
+    if db['ENGINE'] == 'django.db.backends.postgresql' and DB_POOL:
+        # With CONN_HEALTH_CHECKS on, Django has the pool ping each connection
+        # on checkout, so dead ones are replaced rather than handed to a request
+        db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Seconds a request waits for a free connection before erroring
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            # Idle connections above min_size are closed after this many seconds
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+            # Recycle connections now and then (server-side memory, failovers)
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+        }
+
+    if db['ENGINE'] == 'django.db.backends.sqlite3' and SQLITE_TUNED:
+        db.setdefault('OPTIONS', {}).update({
+            # Take the write lock at BEGIN, so a reader never has to upgrade mid-
+            # transaction (which fails at once instead of waiting on busy_timeout)
+            'transaction_mode': 'IMMEDIATE',
+            # busy_timeout, in seconds
+            'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=float),
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)}",
+                # Negative = KiB rather than pages
+                f"PRAGMA cache_size=-{config('SQLITE_CACHE_KB', default=64 * 1024, cast=int)}",
+                'PRAGMA temp_store=MEMORY',
+            ]),
+        })
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+# Set REDIS_URL in production so every gunicorn worker shares one cache
+# (and sees the same invalidations). Locally we fall back to per-process memory.
+REDIS_URL = config('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# How long a user's wishlisted product IDs stay cached (seconds)
+WISHLIST_IDS_CACHE_TIMEOUT = config('WISHLIST_IDS_CACHE_TIMEOUT', default=300, cast=int)
+
+# ── Price-drop alerts ─────────────────────────────────────────────────────────
+# Sender used by `manage.py process_price_alerts`: 'console' or 'file'
+PRICE_ALERT_SENDER = config('PRICE_ALERT_SENDER', default='console')
+PRICE_ALERT_FILE = config('PRICE_ALERT_FILE', default=os.path.join(BASE_DIR, 'price_alerts.log'))
+
+# ── Inventory ─────────────────────────────────────────────────────────────────
+# How long checkout holds a cart's stock; `manage.py release_reservations`
+# returns expired holds to the shelf
+STOCK_RESERVATION_MINUTES = config('STOCK_RESERVATION_MINUTES', default=15, cast=int)
+
+# ── Product popularity ────────────────────────────────────────────────────────
+# Product views are counted in memory and written in one UPDATE this often
+# (seconds) or after this many views, whichever comes first
+PRODUCT_VIEWS_FLUSH_SECONDS = config('PRODUCT_VIEWS_FLUSH_SECONDS', default=10, cast=int)
+PRODUCT_VIEWS_FLUSH_EVENTS = config('PRODUCT_VIEWS_FLUSH_EVENTS', default=500, cast=int)
+# Recently viewed products: how many are kept per shopper, how long an
+# untouched list stays in the cache, and how often signed-in users' lists
+# are saved to the database (seconds)
+RECENTLY_VIEWED_MAX = config('RECENTLY_VIEWED_MAX', default=20, cast=int)
+RECENTLY_VIEWED_TTL = config('RECENTLY_VIEWED_TTL', default=30 * 24 * 3600, cast=int)
+RECENTLY_VIEWED_PERSIST_SECONDS = config('RECENTLY_VIEWED_PERSIST_SECONDS', default=30, cast=int)
+
+# ── Flash sales ───────────────────────────────────────────────────────────────
+# How often each worker re-reads which sale is running (admin edits apply at once)
+FLASH_SALE_STATE_TIMEOUT = config('FLASH_SALE_STATE_TIMEOUT', default=30, cast=int)
+# How long an admission token from the waiting room stays valid (seconds)
+FLASH_SALE_ADMISSION_TTL = config('FLASH_SALE_ADMISSION_TTL', default=600, cast=int)
+# Sale checkouts are written in batches: how long the first one waits for
+# company, and the most written in one transaction
+FLASH_SALE_BATCH_WINDOW_MS = config('FLASH_SALE_BATCH_WINDOW_MS', default=20, cast=int)
+FLASH_SALE_MAX_BATCH = config('FLASH_SALE_MAX_BATCH', default=50, cast=int)
+
+# ── Sales analytics ───────────────────────────────────────────────────────────
+# `manage.py rollup_sales` re-reads orders changed this long before its last
+# run, so one committed late by a slow transaction still gets counted
+SALES_ROLLUP_OVERLAP_SECONDS = config('SALES_ROLLUP_OVERLAP_SECONDS', default=300, cast=int)
+# Years of future spending `manage.py score_customers` adds to each
+# customer's lifetime value, at the yearly rate they have spent so far
+CUSTOMER_LTV_YEARS = config('CUSTOMER_LTV_YEARS', default=3, cast=float)
+
+# ── Archival ──────────────────────────────────────────────────────────────────
+# `manage.py archive_records` moves delivered/cancelled orders and rejected
+# payments this many days after they settled, anything after
+# ARCHIVE_MAX_AGE_DAYS, and guest or empty carts left untouched for
+# CART_ARCHIVE_AFTER_DAYS
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+ARCHIVE_MAX_AGE_DAYS = config('ARCHIVE_MAX_AGE_DAYS', default=730, cast=int)
+CART_ARCHIVE_AFTER_DAYS = config('CART_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+
+# ── Admin change lists ────────────────────────────────────────────────────────
+# Unfiltered lists of tables bigger than this show the database's row
+# estimate instead of a COUNT(*) (PostgreSQL/MySQL). Past ADMIN_MAX_PAGES
+# numbered pages, lists go on by ID (monitoring/admin_performance.py)
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=100_000, cast=int)
+ADMIN_MAX_PAGES = config('ADMIN_MAX_PAGES', default=200, cast=int)
+
+# ── Request metrics ───────────────────────────────────────────────────────────
+# Samples kept per endpoint per worker, and how often each worker shares them
+# through the cache for /api/_metrics/ (use REDIS_URL to merge across workers)
+METRICS_WINDOW = config('METRICS_WINDOW', default=1000, cast=int)
+METRICS_PUBLISH_INTERVAL = config('METRICS_PUBLISH_INTERVAL', default=10, cast=int)
+
+# ── Response compression ──────────────────────────────────────────────────────
+# API responses of at least COMPRESSION_MIN_SIZE bytes are compressed with the
+# first of COMPRESSION_ENCODINGS the client accepts (br/zstd need the brotli /
+# zstandard packages). Higher levels save bandwidth at the cost of CPU.
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_ENCODINGS = [
+    e.strip() for e in config('COMPRESSION_ENCODINGS', default='zstd,br,gzip').split(',') if e.strip()
+]
+COMPRESSION_LEVELS = {
+    'gzip': config('COMPRESSION_GZIP_LEVEL', default=6, cast=int),
+    'br': config('COMPRESSION_BROTLI_LEVEL', default=4, cast=int),
+    'zstd': config('COMPRESSION_ZSTD_LEVEL', default=3, cast=int),
+}
+# API responses carrying tokens or account data are sent uncompressed (BREACH);
+# nothing outside /api/ is compressed at all
+COMPRESSION_SKIP_PATHS = [
+    p.strip() for p in config(
+        'COMPRESSION_SKIP_PATHS', default='/api/auth/,/api/events/ticket/,/api/profile/,/api/bootstrap/'
+    ).split(',') if p.strip()
+]
+
+# ── Batch API ─────────────────────────────────────────────────────────────────
+# Most sub-requests one POST /api/batch/ may carry
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+
+# ── Status events (SSE) ───────────────────────────────────────────────────────
+# The stream needs SERVE_ASYNC; without it the profile page polls instead.
+# How order/payment status changes reach the worker holding a user's stream:
+# 'database' works across workers, 'local' only within one process.
+EVENTS_BACKEND = config('EVENTS_BACKEND', default='database')
+EVENTS_POLL_INTERVAL = config('EVENTS_POLL_INTERVAL', default=1.0, cast=float)
+EVENTS_HEARTBEAT = config('EVENTS_HEARTBEAT', default=15, cast=int)
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+# How long a stream ticket (POST /api/events/ticket/) can be used to connect
+EVENTS_TICKET_SECONDS = config('EVENTS_TICKET_SECONDS', default=60, cast=int)
+# An event row can commit after one with a higher ID; IDs skipped over are
+# looked for again for this many seconds
+EVENTS_COMMIT_GRACE = config('EVENTS_COMMIT_GRACE', default=5, cast=float)
+
+# ── ASGI serving ──────────────────────────────────────────────────────────────
+# When the app runs under ASGI (uvicorn workers, see start.sh), set this so the
+# hot read endpoints are routed to their async views (*/async_views.py).
+SERVE_ASYNC = config('SERVE_ASYNC', default=False, cast=bool)
+
 # ── Password validation ───────────────────────────────────────────────────────
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
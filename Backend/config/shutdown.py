@@ -0,0 +1,79 @@
+"""
+Worker hooks for the write-behind buffers (products/popularity.py,
+products/recent.py): timers that write what they hold every few seconds,
+and shutdown hooks that write the rest when the worker exits.
+
+gunicorn starts the timers from its post_worker_init hook and runs the
+shutdown hooks from worker_exit (config/gunicorn.conf.py), in the worker
+concerned. Nothing else does: manage.py commands and test runs never call
+them, so buffers left over in those processes are dropped instead of
+written to whichever database the settings point at by then.
+
+database_id() lets a buffer check it is written to the database it was
+filled against: at the end of a test run the default alias points back at
+the real database, not the test one the views were counted in.
+"""
+import logging
+import threading
+from django.db import connections, router
+
+logger = logging.getLogger(__name__)
+
+_hooks = []
+_timers = []
+_timers_started = False
+_stopping = threading.Event()
+
+
+def register(func):
+    """Run func when the worker shuts down."""
+    _hooks.append(func)
+    return func
+
+
+def register_timer(func, seconds):
+    """Run func every `seconds` in a background thread of the worker."""
+    _timers.append((func, seconds))
+    # Modules imported after the worker started (views load with the first request)
+    if _timers_started:
+        _start(func, seconds)
+    return func
+
+
+def start_timers():
+    global _timers_started
+    _timers_started = True
+    _stopping.clear()
+    for func, seconds in _timers:
+        _start(func, seconds)
+
+
+def _start(func, seconds):
+    threading.Thread(target=_repeat, args=(func, seconds), name=f'timer {func.__qualname__}', daemon=True).start()
+
+
+def _repeat(func, seconds):
+    while not _stopping.wait(seconds):
+        try:
+            func()
+        except Exception:
+            logger.exception('Timer %s failed', func.__qualname__)
+        finally:
+            # This thread's connections; no request cycle closes them for it
+            connections.close_all()
+
+
+def run():
+    """Stop the timers and run the shutdown hooks."""
+    _stopping.set()
+    for func in _hooks:
+        try:
+            func()
+        except Exception:
+            logger.exception('Shutdown hook %s failed', func.__qualname__)
+
+
+def database_id(model):
+    """(alias, database name) that rows of model are written to."""
+    alias = router.db_for_write(model)
+    return alias, connections[alias].settings_dict['NAME']
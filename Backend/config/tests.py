@@ -0,0 +1,109 @@
+import gzip
+import threading
+from unittest import mock
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from . import shutdown
+from .middleware import CompressionMiddleware, choose_encoding
+
+BODY = b'{"products": [' + b'{"title": "Lamp", "price": "25.00"}, ' * 100 + b'{}]}'
+
+
+@override_settings(COMPRESSION_ENCODINGS=['zstd', 'br', 'gzip'], COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, response, accept_encoding='gzip', path='/api/products/'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json(self, body=BODY):
+        return HttpResponse(body, content_type='application/json')
+
+    def test_encoding_negotiation(self):
+        preferred = ['zstd', 'br', 'gzip']
+        self.assertEqual(choose_encoding('gzip, deflate, br', preferred), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip;q=0.9', preferred), 'gzip')
+        self.assertEqual(choose_encoding('*', preferred), 'zstd')
+        self.assertEqual(choose_encoding('gzip;q=0, *;q=0.1', ['gzip']), None)
+        self.assertEqual(choose_encoding('identity', preferred), None)
+        self.assertEqual(choose_encoding('', preferred), None)
+
+    def test_gzip_response(self):
+        response = self.respond(self.json())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_vary_is_set_even_when_not_compressed(self):
+        response = self.respond(self.json(), accept_encoding='identity')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, BODY)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_responses_are_left_alone(self):
+        response = self.respond(self.json(b'{}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_chunk_by_chunk(self):
+        chunks = [BODY[i:i + 100] for i in range(0, len(BODY), 100)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), BODY)
+
+    def test_already_encoded_response_is_left_alone(self):
+        original = self.json(gzip.compress(BODY))
+        original['Content-Encoding'] = 'gzip'
+        response = self.respond(original, accept_encoding='zstd, gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_token_and_account_responses_are_never_compressed(self):
+        for path in ('/api/auth/login/', '/api/auth/token/refresh/', '/api/bootstrap/', '/api/events/ticket/'):
+            with self.subTest(path=path):
+                response = self.respond(self.json(), path=path)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, BODY)
+
+    def test_only_api_responses_are_compressed(self):
+        response = self.respond(HttpResponse(BODY * 2, content_type='text/html'), path='/admin/orders/order/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class AdminCompressionTests(TestCase):
+    def test_admin_change_list_is_not_compressed(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        response = self.client.get('/admin/orders/order/', {'q': 'csrf'}, headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.content), 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'csrfmiddlewaretoken', response.content)
+
+
+class WorkerTimerTests(SimpleTestCase):
+    def setUp(self):
+        for name, value in (('_timers', []), ('_hooks', []), ('_timers_started', False)):
+            patcher = mock.patch.object(shutdown, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_timers_run_until_the_worker_exits(self):
+        early, late, flushed = threading.Event(), threading.Event(), threading.Event()
+        shutdown.register_timer(early.set, 0.01)
+        shutdown.register(flushed.set)
+        shutdown.start_timers()
+        # Registered once the worker is running, as lazily imported modules are
+        shutdown.register_timer(late.set, 0.01)
+
+        self.assertTrue(early.wait(2))
+        self.assertTrue(late.wait(2))
+        shutdown.run()
+        self.assertTrue(flushed.is_set())
+        self.assertTrue(shutdown._stopping.is_set())
@@ -13,6 +13,12 @@ urlpatterns = [
     path('api/orders/', include('orders.urls')),
     path('api/ratings/', include('ratings.urls')),
     path('api/wishlist/', include('wishlist.urls')),
+    path('api/bootstrap/', include('accounts.bootstrap_urls')),
+    path('api/sale/', include('flashsale.urls')),
+    path('api/batch/', include('accounts.batch_urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/events/', include('notifications.urls')),
+    path('api/_metrics/', include('monitoring.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.db import transaction
+from . import admission
+from .models import FlashSale
+
+
+@admin.register(FlashSale)
+class FlashSaleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'starts_at', 'ends_at', 'admission_rate')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Workers pick the change up on their next request, not after the state timeout
+        transaction.on_commit(admission.forget_current)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(admission.forget_current)
@@ -0,0 +1,201 @@
+"""
+Flash-sale waiting room. Nothing on the request path touches the database —
+it's cache reads and signed tokens — so a crowd waiting for a sale doesn't
+use up database connections.
+
+  1. POST /api/sale/queue/ hands out a numbered ticket (one cache INCR),
+     bound to the user or, for a guest, to their X-Visitor-Id.
+  2. The queue moves forward admission_rate places per second from the
+     start of the sale. GET /api/sale/queue/status/ says how far back a
+     ticket is and, once its number has come up, returns an admission token.
+  3. While the sale runs, putting Sale products in the cart (adding,
+     merging a guest cart, raising a quantity) and paying for them need
+     that token in the X-Sale-Admission header.
+
+Tickets and tokens are signed with SECRET_KEY, so they need no storage.
+With more than one worker the cache must be shared (REDIS_URL), otherwise
+each worker numbers its own queue.
+"""
+import math
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from products import recent
+from products.models import Product
+from products.serializers import ProductSerializer
+from .models import FlashSale
+
+CURRENT_KEY = 'flashsale:current'
+TICKET_SALT = 'flashsale.ticket'
+ADMISSION_SALT = 'flashsale.admission'
+ADMISSION_HEADER = 'X-Sale-Admission'
+SALE_CATEGORY = 'Sale'
+
+
+# ── Sale state ────────────────────────────────────────────────────────────────
+
+def sale_category_products():
+    """The Sale category, matched as /api/products/?category=Sale matches it."""
+    return Product.objects.filter(category__iexact=SALE_CATEGORY)
+
+
+def load_current():
+    now = timezone.now()
+    sale = FlashSale.objects.filter(starts_at__lte=now, ends_at__gt=now).first()
+    if sale is None:
+        return {'id': None}
+    return {
+        'id': sale.id,
+        'name': sale.name,
+        'starts_at': sale.starts_at.timestamp(),
+        'ends_at': sale.ends_at.timestamp(),
+        'rate': sale.admission_rate,
+        'product_ids': set(sale_category_products().values_list('id', flat=True)),
+    }
+
+
+def current_sale():
+    """
+    The running sale as a dict, or None. Read from the cache, which is
+    refreshed every FLASH_SALE_STATE_TIMEOUT seconds (no sale is cached too,
+    so ordinary traffic doesn't query for one on every request).
+    """
+    state = cache.get(CURRENT_KEY)
+    if state is None:
+        state = load_current()
+        cache.set(CURRENT_KEY, state, settings.FLASH_SALE_STATE_TIMEOUT)
+    if state['id'] is None or time.time() >= state['ends_at']:
+        return None
+    return state
+
+
+async def acurrent_sale():
+    state = await cache.aget(CURRENT_KEY)
+    if state is None:
+        state = await sync_to_async(load_current)()
+        await cache.aset(CURRENT_KEY, state, settings.FLASH_SALE_STATE_TIMEOUT)
+    if state['id'] is None or time.time() >= state['ends_at']:
+        return None
+    return state
+
+
+def forget_current():
+    cache.delete(CURRENT_KEY)
+
+
+def seconds_left(sale):
+    return max(1, math.ceil(sale['ends_at'] - time.time()))
+
+
+def _products_key(sale):
+    return f"flashsale:{sale['id']}:products"
+
+
+def build_sale_products():
+    # Same rows and order as /api/products/?category=Sale
+    products = sale_category_products().prefetch_related('images')
+    return list(ProductSerializer(products, many=True).data)
+
+
+def sale_products(sale):
+    """The Sale category listing, cached for the rest of the sale."""
+    data = cache.get(_products_key(sale))
+    if data is None:
+        data = build_sale_products()
+        cache.set(_products_key(sale), data, seconds_left(sale))
+    return data
+
+
+async def asale_products(sale):
+    data = await cache.aget(_products_key(sale))
+    if data is None:
+        data = await sync_to_async(build_sale_products)()
+        await cache.aset(_products_key(sale), data, seconds_left(sale))
+    return data
+
+
+def warm():
+    """Load the running sale and its product listing into the cache."""
+    forget_current()
+    sale = current_sale()
+    if sale is None:
+        return None
+    cache.set(_products_key(sale), build_sale_products(), seconds_left(sale))
+    return sale
+
+
+def sale_for(product_ids):
+    """The running sale if any of product_ids is on sale, else None."""
+    sale = current_sale()
+    if sale is None:
+        return None
+    try:
+        ids = {int(pid) for pid in product_ids if pid}
+    except (TypeError, ValueError):
+        return None
+    return sale if not ids.isdisjoint(sale['product_ids']) else None
+
+
+# ── Queue ─────────────────────────────────────────────────────────────────────
+
+def shopper(request):
+    """
+    Who a ticket or admission token is issued to: ['user', id] or, for
+    guests, ['guest', X-Visitor-Id]. None for a guest without a visitor ID,
+    who can't queue. A list, as it comes back out of a signed token.
+    """
+    who = recent.owner(request, request.user.id if request.user.is_authenticated else None)
+    return list(who) if who else None
+
+
+def join(sale, who):
+    """Take the next place in the queue for shopper `who`. Returns (ticket, position)."""
+    key = f"flashsale:{sale['id']}:tail"
+    cache.add(key, 0, seconds_left(sale) + settings.FLASH_SALE_ADMISSION_TTL)
+    position = cache.incr(key)
+    ticket = signing.dumps({'s': sale['id'], 'p': position, 'u': who}, salt=TICKET_SALT)
+    return ticket, position
+
+
+def admitted_through(sale):
+    """Highest queue position let in so far."""
+    return int((time.time() - sale['starts_at']) * sale['rate'])
+
+
+def ticket_status(request, sale, ticket):
+    """Where a ticket stands. Raises signing.BadSignature for a forged or foreign ticket."""
+    data = signing.loads(ticket, salt=TICKET_SALT)
+    if data['s'] != sale['id'] or data['u'] != shopper(request):
+        raise signing.BadSignature('Ticket is for another sale or shopper.')
+
+    ahead = data['p'] - admitted_through(sale)
+    if ahead > 0:
+        return {'position': data['p'], 'ahead': ahead, 'wait_seconds': math.ceil(ahead / sale['rate'])}
+    admission = signing.dumps({'s': sale['id'], 'u': data['u']}, salt=ADMISSION_SALT)
+    return {'position': data['p'], 'ahead': 0, 'admission': admission}
+
+
+def is_admitted(request, sale):
+    token = request.headers.get(ADMISSION_HEADER)
+    if not token:
+        return False
+    try:
+        data = signing.loads(token, salt=ADMISSION_SALT, max_age=settings.FLASH_SALE_ADMISSION_TTL)
+    except signing.BadSignature:
+        return False
+    who = shopper(request)
+    return who is not None and data['s'] == sale['id'] and data['u'] == who
+
+
+def queue_response():
+    """What a shopper without an admission token gets for sale items."""
+    return Response(
+        {'error': 'The sale is busy — join the queue to buy sale items.', 'queue': '/api/sale/queue/'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': '5'},
+    )
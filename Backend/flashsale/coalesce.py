@@ -0,0 +1,119 @@
+"""
+Group commit for flash-sale checkouts.
+
+When a sale opens, hundreds of checkouts arrive together and each would
+hold a connection through its own transaction. Instead, the first one to
+arrive waits FLASH_SALE_BATCH_WINDOW_MS for others to join, then writes up
+to FLASH_SALE_MAX_BATCH of them in one transaction:
+
+  - each checkout's stock is taken under its own savepoint, so one sold-out
+    cart doesn't fail the rest;
+  - the payments, orders and items of all checkouts that got their stock
+    are inserted with one INSERT per table (payments/checkout.py).
+
+The other requests wait for their result without touching the database.
+When a batch is written, the next waiting request takes over for whoever
+has queued up since.
+
+Batches form inside one worker process, so this pays off where many
+requests share a process: ASGI (SERVE_ASYNC) or threaded workers. A caller
+already inside a transaction is not batched: the batch would commit or roll
+back with that transaction, taking the other shoppers' orders with it.
+"""
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from payments.checkout import place_order, place_orders, take_stock
+
+
+class _Pending:
+    def __init__(self, checkout):
+        self.checkout = checkout
+        self.wake = threading.Event()
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class Coalescer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = []
+        self.flushing = False
+
+    def submit(self, checkout):
+        """
+        Place a checkout as part of a batch. Blocks until its batch is
+        committed; returns (payment, order) or raises what placing it raised.
+        """
+        if connection.in_atomic_block:
+            return place_order(checkout)
+
+        me = _Pending(checkout)
+        with self.lock:
+            self.queue.append(me)
+            leading = not self.flushing
+            self.flushing = True
+
+        if leading:
+            # Give the rest of the crowd a moment to join the batch
+            time.sleep(settings.FLASH_SALE_BATCH_WINDOW_MS / 1000)
+        while True:
+            if leading:
+                self.flush_next()
+            me.wake.wait()
+            if me.done:
+                break
+            # Woken without a result: it's our turn to write the next batch
+            me.wake.clear()
+            leading = True
+
+        if me.error is not None:
+            raise me.error
+        return me.result
+
+    def flush_next(self):
+        with self.lock:
+            batch = self.queue[:settings.FLASH_SALE_MAX_BATCH]
+            del self.queue[:settings.FLASH_SALE_MAX_BATCH]
+        write_batch(batch)
+        with self.lock:
+            if self.queue:
+                self.queue[0].wake.set()
+            else:
+                self.flushing = False
+
+
+def write_batch(batch):
+    placed = []
+    try:
+        with transaction.atomic():
+            for pending in batch:
+                try:
+                    take_stock(pending.checkout)
+                except Exception as e:
+                    pending.error = e
+                else:
+                    placed.append(pending)
+            results = place_orders([p.checkout for p in placed])
+        for pending, result in zip(placed, results):
+            pending.result = result
+    except IntegrityError:
+        # A transaction ID submitted twice; place them one at a time so only
+        # the duplicate fails
+        for pending in placed:
+            try:
+                pending.result = place_order(pending.checkout)
+            except Exception as e:
+                pending.error = e
+    except Exception as e:
+        for pending in placed:
+            pending.error = e
+    finally:
+        for pending in batch:
+            pending.done = True
+            pending.wake.set()
+
+
+coalescer = Coalescer()
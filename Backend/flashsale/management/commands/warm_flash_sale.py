@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from flashsale import admission
+
+
+class Command(BaseCommand):
+    help = 'Loads the running flash sale and its products into the cache (run as the sale opens)'
+
+    def handle(self, *args, **options):
+        sale = admission.warm()
+        if sale is None:
+            raise CommandError('No flash sale is running.')
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed '{sale['name']}': {len(sale['product_ids'])} sale product(s) cached."
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlashSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('admission_rate', models.PositiveIntegerField(default=20, help_text='Shoppers let in from the waiting room per second', validators=[django.core.validators.MinValueValidator(1)])),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.core.validators import MinValueValidator
+from django.db import models
+
+
+class FlashSale(models.Model):
+    """
+    A promotion on the Sale category. While one is running, sale items can
+    only be bought by shoppers let in through the admission queue
+    (admission.py), and their checkouts are written in batches (coalesce.py).
+    """
+    name = models.CharField(max_length=100)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    admission_rate = models.PositiveIntegerField(
+        default=20, validators=[MinValueValidator(1)],
+        help_text='Shoppers let in from the waiting room per second'
+    )
+
+    class Meta:
+        ordering = ['-starts_at']
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,181 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cart.models import Cart, CartItem
+from inventory.models import Stock
+from orders.models import Order
+from payments.checkout import Checkout
+from products.models import Product
+from . import admission
+from . import coalesce
+from .coalesce import _Pending, coalescer, write_batch
+from .models import FlashSale
+
+
+class FlashSaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shopper = User.objects.create(username='shopper')
+        cls.deal, cls.regular = Product.objects.bulk_create([
+            Product(title='Deal', description='d', price=Decimal('5.00'), category='Sale'),
+            Product(title='Regular', description='d', price=Decimal('50.00'), category='Electronics'),
+        ])
+        Stock.objects.create(product=cls.deal, available=2)
+
+    def setUp(self):
+        cache.clear()
+        # Don't leave a running sale cached for other tests
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(self.shopper)
+
+    def start_sale(self, started_ago, rate):
+        now = timezone.now()
+        FlashSale.objects.create(
+            name='Midnight', starts_at=now - timedelta(seconds=started_ago),
+            ends_at=now + timedelta(hours=1), admission_rate=rate,
+        )
+        admission.warm()
+
+    def add(self, product, **headers):
+        return self.client.post('/api/cart/add/', {'product_id': product.id}, format='json', headers=headers)
+
+    def test_sale_items_need_admission_from_the_queue(self):
+        self.start_sale(started_ago=0, rate=1)
+        self.assertEqual(self.add(self.deal).status_code, 429)
+        # Everything else is unaffected
+        self.assertEqual(self.add(self.regular).status_code, 200)
+
+        ticket = self.client.post('/api/sale/queue/').json()['ticket']
+        waiting = self.client.get('/api/sale/queue/status/', {'ticket': ticket}).json()
+        self.assertEqual((waiting['position'], waiting['ahead']), (1, 1))
+        self.assertNotIn('admission', waiting)
+
+        # A second later the queue has moved on to our place
+        FlashSale.objects.update(starts_at=timezone.now() - timedelta(seconds=1))
+        admission.warm()
+        admitted = self.client.get('/api/sale/queue/status/', {'ticket': ticket}).json()
+        self.assertEqual(admitted['ahead'], 0)
+        self.assertEqual(self.add(self.deal, **{admission.ADMISSION_HEADER: admitted['admission']}).status_code, 200)
+
+        self.assertEqual(self.client.get('/api/sale/queue/status/', {'ticket': ticket + 'x'}).status_code, 400)
+
+    def test_sale_listing_is_served_from_cache(self):
+        self.start_sale(started_ago=60, rate=10)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/', {'category': 'Sale'})
+        self.assertEqual([p['title'] for p in response.json()], ['Deal'])
+
+    def test_batch_isolates_sold_out_and_duplicate_checkouts(self):
+        def checkout(tx, qty):
+            return _Pending(Checkout(self.shopper, tx, Decimal('5.00'), [(self.deal.id, 'Deal', '5.00', qty)]))
+
+        batch = [checkout('TX-1', 1), checkout('TX-2', 5), checkout('TX-1', 1)]
+        write_batch(batch)
+
+        first, sold_out, duplicate = batch
+        self.assertIsNotNone(first.result)
+        self.assertEqual(sold_out.error.product_ids, [self.deal.id])
+        self.assertIsNotNone(duplicate.error)
+        # Only the first checkout's unit is gone
+        self.assertEqual(Stock.objects.get(product=self.deal).available, 1)
+
+    def test_admitted_checkout_is_placed(self):
+        self.start_sale(started_ago=60, rate=10)
+        ticket = self.client.post('/api/sale/queue/').json()['ticket']
+        token = self.client.get('/api/sale/queue/status/', {'ticket': ticket}).json()['admission']
+        body = {'transaction_id': 'TX-SALE', 'total_amount': '5.00',
+                'items': [{'product_id': self.deal.id, 'product_name': 'Deal', 'product_price': '5.00', 'quantity': 1}]}
+
+        self.assertEqual(self.client.post('/api/payments/submit/', body, format='json').status_code, 429)
+        response = self.client.post('/api/payments/submit/', body, format='json',
+                                    headers={admission.ADMISSION_HEADER: token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Stock.objects.get(product=self.deal).available, 1)
+
+    def test_sale_product_ids_match_the_sale_listing(self):
+        Product.objects.create(title='Lowercase deal', description='d', price=Decimal('1.00'), category='sale')
+        self.start_sale(started_ago=60, rate=10)
+        sale = admission.current_sale()
+
+        listed = {p['id'] for p in admission.sale_products(sale)}
+        self.assertEqual(sale['product_ids'], listed)
+        self.assertEqual(len(listed), 2)
+
+
+    def admission_token(self, client, **headers):
+        ticket = client.post('/api/sale/queue/', headers=headers).json()['ticket']
+        return client.get('/api/sale/queue/status/', {'ticket': ticket}, headers=headers).json()['admission']
+
+    def test_merging_a_guest_cart_needs_admission_for_sale_items(self):
+        self.start_sale(started_ago=60, rate=10)
+        body = {'items': [{'product_id': self.regular.id, 'quantity': 1}, {'product_id': self.deal.id, 'quantity': 2}]}
+
+        self.assertEqual(self.client.post('/api/cart/merge/', body, format='json').status_code, 429)
+        self.assertFalse(CartItem.objects.exists())
+
+        token = self.admission_token(self.client)
+        response = self.client.post('/api/cart/merge/', body, format='json', headers={admission.ADMISSION_HEADER: token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_raising_a_sale_quantity_needs_admission(self):
+        cart = Cart.objects.create(user=self.shopper)
+        deal = CartItem.objects.create(cart=cart, product=self.deal, quantity=2)
+        self.start_sale(started_ago=60, rate=10)
+        url = f'/api/cart/item/{deal.id}/update/'
+
+        self.assertEqual(self.client.patch(url, {'quantity': 5}, format='json').status_code, 429)
+        self.assertEqual(self.client.patch(url, {'quantity': 1}, format='json').status_code, 200)
+        token = self.admission_token(self.client)
+        response = self.client.patch(url, {'quantity': 5}, format='json', headers={admission.ADMISSION_HEADER: token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_guest_admission_is_bound_to_the_visitor(self):
+        self.start_sale(started_ago=60, rate=10)
+        guest = APIClient()
+        mine, theirs = {'X-Visitor-Id': 'a' * 32}, {'X-Visitor-Id': 'b' * 32}
+        self.assertEqual(guest.post('/api/sale/queue/').status_code, 400)
+
+        token = self.admission_token(guest, **mine)
+
+        def add(visitor):
+            return guest.post('/api/cart/add/', {'product_id': self.deal.id}, format='json',
+                              headers={admission.ADMISSION_HEADER: token, **visitor})
+
+        self.assertEqual(add(theirs).status_code, 429)
+        self.assertEqual(add({}).status_code, 429)
+        self.assertEqual(add(mine).status_code, 200)
+
+class CoalescerTests(TransactionTestCase):
+    def setUp(self):
+        self.shopper = User.objects.create(username='shopper')
+        self.deal = Product.objects.create(title='Deal', description='d', price=Decimal('5.00'), category='Sale')
+        Stock.objects.create(product=self.deal, available=2)
+
+    def checkout(self, transaction_id):
+        return Checkout(self.shopper, transaction_id, Decimal('5.00'), [(self.deal.id, 'Deal', '5.00', 1)])
+
+    def test_checkout_is_written_in_a_batch(self):
+        with mock.patch.object(coalesce, 'write_batch', wraps=write_batch) as batch:
+            payment, order = coalescer.submit(self.checkout('TX-1'))
+
+        batch.assert_called_once()
+        self.assertEqual(order.transaction_id, 'TX-1')
+        self.assertEqual(Stock.objects.get(product=self.deal).available, 1)
+
+    def test_checkout_inside_a_transaction_is_not_batched(self):
+        with mock.patch.object(coalesce, 'write_batch', wraps=write_batch) as batch:
+            with transaction.atomic():
+                coalescer.submit(self.checkout('TX-1'))
+                transaction.set_rollback(True)
+
+        batch.assert_not_called()
+        self.assertFalse(coalescer.queue)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Stock.objects.get(product=self.deal).available, 2)
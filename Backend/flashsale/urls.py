@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.sale_status, name='sale_status'),
+    path('products/', views.sale_products, name='sale_products'),
+    path('queue/', views.join_queue, name='sale_join_queue'),
+    path('queue/status/', views.queue_status, name='sale_queue_status'),
+]
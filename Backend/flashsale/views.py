@@ -0,0 +1,67 @@
+from datetime import datetime, timezone as dt_timezone
+from django.core import signing
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes
+from rest_framework.response import Response
+from accounts.authentication import StatelessJWTAuthentication
+from . import admission
+
+def no_sale():
+    return Response({'error': 'No sale is running.'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def sale_status(request):
+    """The running sale, if any. Served from the cache."""
+    sale = admission.current_sale()
+    if sale is None:
+        return Response({'sale': None})
+    return Response({'sale': {
+        'id': sale['id'],
+        'name': sale['name'],
+        'ends_at': datetime.fromtimestamp(sale['ends_at'], dt_timezone.utc).isoformat(),
+        'admission_rate': sale['rate'],
+    }})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def sale_products(request):
+    """The sale's products, pre-warmed into the cache (manage.py warm_flash_sale)."""
+    sale = admission.current_sale()
+    if sale is None:
+        return no_sale()
+    return Response(admission.sale_products(sale))
+
+
+@api_view(['POST'])
+@authentication_classes([StatelessJWTAuthentication])
+def join_queue(request):
+    """Take a place in the waiting room."""
+    sale = admission.current_sale()
+    if sale is None:
+        return no_sale()
+    who = admission.shopper(request)
+    if who is None:
+        return Response({'error': 'Guests need an X-Visitor-Id to join the queue.'}, status=status.HTTP_400_BAD_REQUEST)
+    ticket, position = admission.join(sale, who)
+    return Response({'ticket': ticket, 'position': position}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication])
+def queue_status(request):
+    """
+    Poll with ?ticket=. Returns how many places are still ahead and, once
+    there are none, the admission token to send as X-Sale-Admission.
+    """
+    sale = admission.current_sale()
+    if sale is None:
+        return no_sale()
+    try:
+        result = admission.ticket_status(request, sale, request.GET.get('ticket', ''))
+    except signing.BadSignature:
+        return Response({'error': 'Invalid ticket.'}, status=status.HTTP_400_BAD_REQUEST)
+    headers = {'Retry-After': str(min(result['wait_seconds'], 30))} if result['ahead'] else {}
+    return Response(result, headers=headers)
@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from monitoring.admin_performance import LargeTableAdmin
+from .models import Reservation, Stock
+
+
+@admin.register(Stock)
+class StockAdmin(LargeTableAdmin):
+    list_display = ('product', 'available', 'updated_at')
+    list_editable = ('available',)
+    list_select_related = ('product',)
+    search_fields = ('product__title',)
+    autocomplete_fields = ('product',)
+
+    def get_readonly_fields(self, request, obj=None):
+        return ('product',) if obj else ()
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # Apply the edit as a delta, so checkouts that happened while the
+        # form was open aren't overwritten with the stale number
+        delta = obj.available - form.initial['available']
+        Stock.objects.filter(pk=obj.pk).update(available=Greatest(F('available') + delta, 0), updated_at=timezone.now())
+        obj.refresh_from_db()
+
+
+@admin.register(Reservation)
+class ReservationAdmin(LargeTableAdmin):
+    list_display = ('cart', 'product', 'quantity', 'expires_at')
+    list_select_related = ('cart', 'product')
+    search_fields = ('product__title',)
+    readonly_fields = ('cart', 'product', 'quantity', 'expires_at')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from inventory.stock import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Returns the stock held by expired checkout reservations (run every minute or so)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Reservations released per transaction')
+
+    def handle(self, *args, **options):
+        released = release_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} reserved unit(s).'))
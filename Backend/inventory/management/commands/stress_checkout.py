@@ -0,0 +1,119 @@
+import asyncio
+import random
+import time
+import uuid
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from rest_framework_simplejwt.tokens import AccessToken
+from monitoring import loadtest
+from orders.models import LineItem
+from products.models import Product
+from inventory.models import Stock
+
+
+async def checkout(session, products, results):
+    picks = session.rng.sample(products, session.rng.randint(1, min(2, len(products))))
+    status, _ = await session.post('submit_payment', '/api/payments/submit/', {
+        'transaction_id': f'STRESS-{uuid.uuid4().hex}',
+        'total_amount': '10.00',
+        'items': [
+            {'product_id': p.id, 'product_name': p.title, 'product_price': '10.00',
+             'quantity': session.rng.randint(1, 3)}
+            for p in picks
+        ],
+    })
+    results.append(status)
+
+
+class Command(BaseCommand):
+    help = ('Fires hundreds of concurrent checkouts at a few scarce products through the WSGI app '
+            'and checks that nothing is oversold')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=500, help='Checkouts to attempt, one per user')
+        parser.add_argument('--concurrency', type=int, default=200, help='Checkouts in flight at once')
+        parser.add_argument('--products', type=int, default=3)
+        parser.add_argument('--stock', type=int, default=100, help='Starting units per product')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the test users, products and orders')
+
+    def handle(self, *args, **options):
+        if min(options['checkouts'], options['concurrency'], options['products']) < 1:
+            raise CommandError('--checkouts, --concurrency and --products must be at least 1.')
+
+        tag = uuid.uuid4().hex[:8]
+        products = Product.objects.bulk_create([
+            Product(title=f'Stress {tag} #{n}', description='stress test', price=Decimal('10.00'), category='Sale')
+            for n in range(options['products'])
+        ])
+        Stock.objects.bulk_create([Stock(product=p, available=options['stock']) for p in products])
+        users = User.objects.bulk_create([
+            User(username=f'stress_{tag}_{n}') for n in range(options['checkouts'])
+        ])
+
+        try:
+            statuses, summary = self.run_checkouts(users, products, options)
+            self.report(products, statuses, summary, options)
+        finally:
+            if not options['keep']:
+                # Orders and payments go with their users, stock with its products
+                User.objects.filter(id__in=[u.id for u in users]).delete()
+                Product.objects.filter(id__in=[p.id for p in products]).delete()
+
+    def run_checkouts(self, users, products, options):
+        from config.wsgi import application
+        # The worker threads open their own connections; don't share ours
+        connections.close_all()
+
+        transport = loadtest.WsgiTransport(application, options['concurrency'])
+        stats = loadtest.Stats()
+        rng = random.Random(options['seed'])
+        sessions = []
+        for user in users:
+            session = loadtest.Session(transport, stats, random.Random(rng.random()), [])
+            session.token = str(AccessToken.for_user(user))
+            sessions.append(session)
+
+        statuses = []
+
+        async def run():
+            await asyncio.gather(*(checkout(s, products, statuses) for s in sessions))
+
+        started = time.monotonic()
+        asyncio.run(run())
+        return statuses, loadtest.summarize(stats, time.monotonic() - started)
+
+    def report(self, products, statuses, summary, options):
+        placed = statuses.count(201)
+        sold_out = statuses.count(409)
+        failed = len(statuses) - placed - sold_out
+
+        sold = dict(
+            LineItem.objects.filter(product__in=products)
+            .values_list('product_id').annotate(total=Sum('quantity'))
+        )
+        available = dict(Stock.objects.filter(product__in=products).values_list('product_id', 'available'))
+
+        self.stdout.write(f"{'product':<24}{'start':>8}{'sold':>8}{'left':>8}")
+        problems = []
+        for p in products:
+            n_sold, left = sold.get(p.id, 0), available[p.id]
+            self.stdout.write(f"{p.title:<24}{options['stock']:>8}{n_sold:>8}{left:>8}")
+            if n_sold + left != options['stock']:
+                problems.append(f'{p.title}: {n_sold} sold + {left} left != {options["stock"]}')
+
+        stats = summary['endpoints'].get('submit_payment', {})
+        self.stdout.write(
+            f"\n{len(statuses)} checkouts in {summary['elapsed_s']}s "
+            f"({summary['throughput_rps']} /s, p50 {stats.get('p50_ms')} ms, p95 {stats.get('p95_ms')} ms): "
+            f"{placed} placed, {sold_out} refused as sold out, {failed} failed"
+        )
+
+        if failed:
+            problems.append(f'{failed} checkout(s) failed with something other than 409')
+        if problems:
+            raise CommandError('\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('No overselling.'))
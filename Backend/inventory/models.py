@@ -0,0 +1,38 @@
+from django.db import models
+from cart.models import Cart
+from products.models import Product
+
+
+class Stock(models.Model):
+    """
+    Units of a product that can still be sold. Products without a Stock row
+    aren't tracked and never run out.
+
+    Always change `available` with a conditional UPDATE (see stock.py), never
+    by reading it, adjusting and saving — that loses concurrent checkouts.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stock')
+    # PositiveIntegerField adds a CHECK (available >= 0): the database refuses to oversell
+    available = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Stock'
+
+    def __str__(self):
+        return f"{self.product.title}: {self.available}"
+
+
+class Reservation(models.Model):
+    """
+    Stock held for a cart during checkout. The units are already taken off
+    Stock.available; they go back when the reservation expires
+    (`manage.py release_reservations`) or the checkout replaces it.
+    """
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for cart {self.cart_id}"
@@ -0,0 +1,144 @@
+"""
+Concurrency-safe stock keeping.
+
+Stock never goes through read-modify-write. Taking units is a single
+conditional UPDATE for the whole cart:
+
+    UPDATE inventory_stock
+       SET available = available - CASE product_id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+     WHERE product_id IN (1, 7)
+       AND available >= CASE product_id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+
+The database checks and decrements each row under its own row lock, so
+checkouts for different products don't wait for each other and two
+checkouts can never both get the last unit. If fewer rows than expected
+were updated, something was short and the savepoint is rolled back, so a
+cart is reserved all or nothing.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from cart.models import CartItem
+from .models import Reservation, Stock
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = product_ids
+        super().__init__(f'Not enough stock for product(s) {product_ids}')
+
+
+def whole_number(value):
+    """
+    value as a non-negative int, from an int or a string of digits. Raises
+    ValueError for anything else (negative numbers, 1.5, 'abc', None, True).
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise ValueError(f'Not a whole number: {value!r}')
+
+
+def merge_quantities(pairs):
+    """
+    [(product_id, quantity), ...] -> {product_id: total}, dropping empty
+    lines. Raises ValueError for an ID or quantity that isn't a whole number.
+    """
+    quantities = {}
+    for product_id, quantity in pairs:
+        if not product_id:
+            continue
+        product_id, quantity = whole_number(product_id), whole_number(quantity)
+        if quantity > 0:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(product_id=pid, then=Value(qty)) for pid, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def take(quantities):
+    """
+    Take {product_id: quantity} off the shelf in one statement, all or
+    nothing. Untracked products are ignored. Raises OutOfStock.
+    """
+    if not quantities:
+        return
+    with transaction.atomic():
+        needed = _per_product(quantities)
+        updated = (
+            Stock.objects
+            .filter(product_id__in=list(quantities), available__gte=needed)
+            .update(available=F('available') - needed)
+        )
+        # Every product was tracked and had enough — the usual case, one query
+        if updated == len(quantities):
+            return
+        tracked = Stock.objects.filter(product_id__in=list(quantities)).count()
+        if updated == tracked:
+            return
+        transaction.set_rollback(True)
+
+    # After the rollback, so the rows we did decrement read as before
+    short = Stock.objects.filter(product_id__in=list(quantities)).values_list('product_id', 'available')
+    raise OutOfStock(sorted(pid for pid, available in short if available < quantities[pid]))
+
+
+def give_back(quantities):
+    """Return {product_id: quantity} to the shelf in one statement."""
+    if quantities:
+        added = _per_product(quantities)
+        Stock.objects.filter(product_id__in=list(quantities)).update(available=F('available') + added)
+
+
+def release(reservations):
+    """
+    Delete the given reservations and return their stock. The rows are
+    locked first, so two releases of the same reservation (the sweeper and a
+    checkout, say) can't both give its units back. Returns the units released.
+    """
+    with transaction.atomic():
+        rows = list(reservations.select_for_update(of=('self',)).values_list('id', 'product_id', 'quantity'))
+        if not rows:
+            return 0
+        Reservation.objects.filter(id__in=[r[0] for r in rows]).delete()
+        quantities = merge_quantities((product_id, quantity) for _, product_id, quantity in rows)
+        give_back(quantities)
+    return sum(quantities.values())
+
+
+def reserve_cart(cart):
+    """
+    Hold the cart's items for STOCK_RESERVATION_MINUTES, replacing any hold
+    it already has. Raises OutOfStock, in which case the old hold is kept.
+    Returns the expiry time.
+    """
+    expires_at = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+    with transaction.atomic():
+        release(Reservation.objects.filter(cart=cart))
+        quantities = merge_quantities(CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity'))
+        take(quantities)
+        Reservation.objects.bulk_create([
+            Reservation(cart=cart, product_id=pid, quantity=qty, expires_at=expires_at)
+            for pid, qty in quantities.items()
+        ])
+    return expires_at
+
+
+def release_expired(batch_size=1000):
+    """Give back the stock of every expired reservation. Returns units released."""
+    released = 0
+    now = timezone.now()
+    while True:
+        batch = Reservation.objects.filter(expires_at__lte=now).order_by('id')[:batch_size]
+        ids = list(batch.values_list('id', flat=True))
+        if not ids:
+            return released
+        released += release(Reservation.objects.filter(id__in=ids, expires_at__lte=now))
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cart.models import Cart, CartItem
+from orders.models import Order
+from products.models import Product
+from . import stock
+from .models import Reservation, Stock
+
+
+class StockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shopper = User.objects.create(username='shopper')
+        cls.phone, cls.ring, cls.shirt = Product.objects.bulk_create([
+            Product(title=title, description='d', price=Decimal('10.00'))
+            for title in ('Phone', 'Ring', 'Shirt')
+        ])
+        # The shirt isn't tracked
+        Stock.objects.bulk_create([Stock(product=cls.phone, available=3), Stock(product=cls.ring, available=1)])
+        cls.cart = Cart.objects.create(user=cls.shopper)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.shopper)
+
+    def available(self, product):
+        return Stock.objects.get(product=product).available
+
+    def test_take_is_all_or_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            stock.take({self.phone.id: 2, self.ring.id: 1})
+        # One statement for the whole cart (plus its savepoint)
+        self.assertEqual([q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']], ['UPDATE'])
+        self.assertEqual((self.available(self.phone), self.available(self.ring)), (1, 0))
+
+        with self.assertRaises(stock.OutOfStock) as ctx:
+            stock.take({self.phone.id: 1, self.ring.id: 1, self.shirt.id: 5})
+        self.assertEqual(ctx.exception.product_ids, [self.ring.id])
+        # The phone's decrement was rolled back with the ring's failure
+        self.assertEqual(self.available(self.phone), 1)
+
+    def test_untracked_products_never_run_out(self):
+        stock.take({self.shirt.id: 1000, self.phone.id: 1})
+        self.assertEqual(self.available(self.phone), 2)
+
+    def test_reservation_holds_stock_until_swept(self):
+        CartItem.objects.create(cart=self.cart, product=self.phone, quantity=2)
+        self.client.post('/api/cart/reserve/')
+        # Renewing replaces the hold rather than stacking a second one
+        response = self.client.post('/api/cart/reserve/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.available(self.phone), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+        Reservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command('release_reservations', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.available(self.phone), 3)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_reserve_reports_what_is_short(self):
+        CartItem.objects.create(cart=self.cart, product=self.ring, quantity=2)
+        response = self.client.post('/api/cart/reserve/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['out_of_stock'], [self.ring.id])
+
+    def test_checkout_uses_its_reservation_and_cannot_oversell(self):
+        CartItem.objects.create(cart=self.cart, product=self.phone, quantity=3)
+        self.client.post('/api/cart/reserve/')
+        self.assertEqual(self.available(self.phone), 0)
+
+        body = {'transaction_id': 'TX-1', 'total_amount': '30.00',
+                'items': [{'product_id': self.phone.id, 'product_name': 'Phone', 'product_price': '10.00', 'quantity': 3}]}
+        self.assertEqual(self.client.post('/api/payments/submit/', body, format='json').status_code, 201)
+        self.assertEqual(self.available(self.phone), 0)
+        self.assertFalse(Reservation.objects.exists())
+
+        body['transaction_id'] = 'TX-2'
+        response = self.client.post('/api/payments/submit/', body, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_guests_cannot_reserve_stock(self):
+        response = APIClient().post('/api/cart/reserve/')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_malformed_lines_are_rejected(self):
+        self.assertEqual(stock.merge_quantities([(str(self.phone.id), '2'), (self.phone.id, 1), (None, 5)]),
+                         {self.phone.id: 3})
+        for pair in [('abc', 1), (self.phone.id, 'two'), (self.phone.id, -1), (self.phone.id, 1.5), (self.phone.id, None)]:
+            with self.subTest(pair=pair), self.assertRaises(ValueError):
+                stock.merge_quantities([pair])
+
+        for item in [{'product_id': 'abc', 'quantity': 1}, {'product_id': self.phone.id, 'quantity': 'two'}, 'phone']:
+            with self.subTest(item=item):
+                response = self.client.post('/api/payments/submit/', {
+                    'transaction_id': 'TX-BAD', 'total_amount': '10.00', 'items': [item],
+                }, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.available(self.phone), 3)
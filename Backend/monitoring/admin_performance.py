@@ -0,0 +1,157 @@
+"""
+Change lists that stay usable on tables with millions of rows.
+
+The stock change list is built for small tables: it counts the whole table
+(twice, with show_full_result_count), pages with OFFSET, so page 20,000
+reads and throws away a million rows, and edit forms render a <select> of
+every related row. LargeTableAdmin, the base of the shop's ModelAdmins,
+changes that:
+
+  - Counts: an unfiltered list shows the database's own row estimate
+    (PostgreSQL's pg_class.reltuples, MySQL's information_schema) once it
+    passes ADMIN_EXACT_COUNT_LIMIT, instead of running COUNT(*). Filtered
+    lists, and SQLite, are still counted exactly.
+  - Paging: the first ADMIN_MAX_PAGES pages are numbered as usual. Past
+    them, a list in its default newest-first order goes on with "Older"
+    links that page by primary key (?before=<id>): no count and no OFFSET,
+    so the last page costs the same as the first.
+  - Related objects: subclasses set list_select_related, annotate the
+    counts they show with related_count(), and use autocomplete_fields for
+    foreign keys.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'before'
+
+
+def estimated_count(queryset):
+    """The database's estimate of the rows in the queryset's table, or None."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    # reltuples is -1 for a table that was never analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def related_count(queryset, field):
+    """
+    An annotation counting the queryset's rows whose `field` points at each
+    row. Unlike Count() it's a subquery, not a join and GROUP BY, so the
+    change list's COUNT(*) leaves it out and only the rows shown compute it.
+    """
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class EstimatedCountPaginator(Paginator):
+    """A Paginator that estimates big unfiltered counts and numbers at most ADMIN_MAX_PAGES pages."""
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    @cached_property
+    def num_pages(self):
+        return min(super().num_pages, settings.ADMIN_MAX_PAGES)
+
+
+class LargeTableChangeList(ChangeList):
+    """A ChangeList that also pages by primary key, for ?before=<id>."""
+
+    def __init__(self, request, *args, **kwargs):
+        self.request = request
+        self.next_cursor_url = None
+        super().__init__(request, *args, **kwargs)
+        self.newest_url = self.get_query_string(remove=[CURSOR_VAR, PAGE_VAR])
+
+    @cached_property
+    def pages_by_pk(self):
+        # Only in the default newest-first order; any other order pages by number
+        return ORDER_VAR not in self.request.GET and list(self.model_admin.get_ordering(self.request)) == ['-pk']
+
+    @cached_property
+    def cursor(self):
+        if not self.pages_by_pk:
+            return None
+        try:
+            return int(self.request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def cursor_mode(self):
+        return self.cursor is not None
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.cursor_mode:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        return queryset
+
+    def get_results(self, request):
+        if not self.cursor_mode:
+            super().get_results(request)
+            # More rows than the numbered pages reach: carry on from the last one by ID
+            if (self.pages_by_pk and self.multi_page and self.page_num == self.paginator.num_pages
+                    and self.paginator.count > self.paginator.num_pages * self.list_per_page):
+                self._set_next_cursor(self.result_list.values_list('pk', flat=True))
+            return
+
+        # No count and no OFFSET: the page is the next list_per_page rows below the cursor
+        ids = list(self.queryset.values_list('pk', flat=True)[:self.list_per_page + 1])
+        self.result_list = self.queryset[:self.list_per_page]
+        self.result_count = min(len(ids), self.list_per_page)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = self.model_admin.get_paginator(request, self.result_list, self.list_per_page)
+        if len(ids) > self.list_per_page:
+            self._set_next_cursor(ids[:self.list_per_page])
+
+    def _set_next_cursor(self, ids):
+        ids = list(ids)
+        if ids:
+            self.next_cursor_url = self.get_query_string({CURSOR_VAR: ids[-1]}, remove=[PAGE_VAR])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """ModelAdmin defaults for big tables (see the module docstring)."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
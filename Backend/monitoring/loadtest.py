@@ -0,0 +1,378 @@
+"""
+Load-test harness that replays scripted storefront journeys at a fixed
+concurrency with asyncio.
+
+Requests go through one of three transports:
+  http  — a running server (runserver, gunicorn, uvicorn …)
+  wsgi  — config.wsgi.application in-process, one thread per virtual user
+  asgi  — config.asgi.application in-process on the event loop
+
+Run it through `python manage.py loadtest` (see monitoring/management).
+"""
+import asyncio
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import quote, urlsplit
+from .metrics import _percentile
+
+CATEGORIES = ['Electronics', 'Jewelry', "Men's Clothing", "Women's Clothing", 'Liquor', 'Sale']
+ORDERINGS = ['price_asc', 'price_desc', 'name_asc', 'rating']
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+
+class HttpTransport:
+    """Talks to a real server over keep-alive HTTP/1.1 connections (one per thread)."""
+
+    def __init__(self, base_url, concurrency):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _call(self, method, path, body, headers):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = self.connection_class(self.host, self.port, timeout=60)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            # Drop the broken connection so this thread's next request reconnects
+            conn.close()
+            self.local.conn = None
+            raise
+
+    async def request(self, method, path, body, headers):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, method, path, body, headers)
+
+
+class WsgiTransport:
+    """Calls the Django WSGI application directly, as a sync worker would."""
+
+    def __init__(self, app, concurrency):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _call(self, method, path, body, headers):
+        path, _, query = path.partition('?')
+        body = body or b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': BytesIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            else:
+                environ[f'HTTP_{key}'] = value
+
+        status = []
+        result = self.app(environ, lambda s, h, exc_info=None: status.append(int(s.split()[0])))
+        try:
+            content = b''.join(result)
+        finally:
+            # Fires request_finished, which returns the DB connection
+            if hasattr(result, 'close'):
+                result.close()
+        return status[0], content
+
+    async def request(self, method, path, body, headers):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, method, path, body, headers)
+
+
+class AsgiTransport:
+    """Calls the Django ASGI application directly on the running event loop."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, body, headers):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'content-length', str(len(body or b'')).encode()),
+            ] + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body or b'', 'more_body': False}
+            # Nothing more to send; Django waits here for a disconnect that never comes
+            await asyncio.Future()
+
+        status = None
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status, b''.join(chunks)
+
+
+# ── Sessions and journeys ─────────────────────────────────────────────────────
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, ms, ok):
+        self.latencies.setdefault(name, []).append(ms)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+class Session:
+    """One virtual user: holds its token and times every request it makes."""
+
+    def __init__(self, transport, stats, rng, product_ids):
+        self.transport = transport
+        self.stats = stats
+        self.rng = rng
+        self.product_ids = product_ids
+        self.token = None
+        # Sent with every request (e.g. a flash-sale admission token)
+        self.headers = {}
+
+    async def call(self, name, method, path, data=None):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        headers.update(self.headers)
+
+        start = time.perf_counter()
+        try:
+            status, content = await self.transport.request(method, path, body, headers)
+        except Exception:
+            self.stats.record(name, (time.perf_counter() - start) * 1000, ok=False)
+            return None, None
+        self.stats.record(name, (time.perf_counter() - start) * 1000, ok=status < 400)
+
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    def get(self, name, path):
+        return self.call(name, 'GET', path)
+
+    def post(self, name, path, data=None):
+        return self.call(name, 'POST', path, data if data is not None else {})
+
+    def random_product(self):
+        return self.rng.choice(self.product_ids)
+
+    async def login(self, username, password):
+        await self.post('register', '/api/auth/register/', {
+            'username': username, 'password': password, 'email': f'{username}@example.com',
+        })
+        status, data = await self.post('login', '/api/auth/login/', {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f'Could not log in as {username} (HTTP {status})')
+        self.token = data['access']
+
+
+async def browse(s):
+    category = quote(s.rng.choice(CATEGORIES))
+    await s.get('product_list', f'/api/products/?category={category}&ordering={s.rng.choice(ORDERINGS)}')
+    await s.get('product_search', '/api/products/?search=a&min_price=10&max_price=500')
+    product_id = s.random_product()
+    await s.get('product_detail', f'/api/products/{product_id}/')
+    await s.get('product_ratings', f'/api/ratings/{product_id}/')
+
+
+async def buy(s):
+    for product_id in {s.random_product(), s.random_product()}:
+        await s.post('add_to_cart', '/api/cart/add/', {'product_id': product_id, 'quantity': 1})
+    await s.post('merge_cart', '/api/cart/merge/', {'items': [{'product_id': s.random_product(), 'quantity': 1}]})
+
+    status, cart = await s.get('view_cart', '/api/cart/view/')
+    if not cart or not cart.get('items'):
+        return
+    await s.post('submit_payment', '/api/payments/submit/', {
+        'transaction_id': f'LOAD-{uuid.uuid4().hex}',
+        'total_amount': cart['grand_total'],
+        'items': [
+            {
+                'product_id': item['product_id'],
+                'product_name': item['product_name'],
+                'product_price': item['product_price'],
+                'quantity': item['quantity'],
+            }
+            for item in cart['items']
+        ],
+    })
+    await s.post('clear_cart', '/api/cart/clear/')
+
+
+async def history(s):
+    await s.get('order_history', '/api/orders/')
+    await s.get('payment_history', '/api/payments/history/')
+
+
+async def sale_rush(s):
+    """A flash-sale shopper: sale listing, waiting room, then a sale item checkout."""
+    status, products = await s.get('sale_products', '/api/sale/products/')
+    if status != 200 or not products:
+        return
+    if 'X-Sale-Admission' not in s.headers:
+        status, joined = await s.post('sale_join', '/api/sale/queue/')
+        if status != 201:
+            return
+        while True:
+            status, queue = await s.get('sale_queue', f"/api/sale/queue/status/?ticket={quote(joined['ticket'])}")
+            if status != 200:
+                return
+            if 'admission' in queue:
+                s.headers['X-Sale-Admission'] = queue['admission']
+                break
+            await asyncio.sleep(min(queue['wait_seconds'], 1))
+
+    product = s.rng.choice(products)
+    await s.post('add_to_cart', '/api/cart/add/', {'product_id': product['id'], 'quantity': 1})
+    await s.post('submit_payment', '/api/payments/submit/', {
+        'transaction_id': f'SALE-{uuid.uuid4().hex}',
+        'total_amount': product['price'],
+        'items': [{'product_id': product['id'], 'product_name': product['title'],
+                   'product_price': product['price'], 'quantity': 1}],
+    })
+    await s.post('clear_cart', '/api/cart/clear/')
+
+
+# (journey, weight)
+JOURNEYS = [
+    (browse, 6),
+    (buy, 2),
+    (history, 2),
+]
+
+# A flash sale: most of the crowd is after the deals
+SALE_JOURNEYS = [
+    (sale_rush, 6),
+    (browse, 3),
+    (history, 1),
+]
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+async def run(transport, concurrency, duration, seed=0, password='Load-test-pw-1', journeys=JOURNEYS):
+    stats = Stats()
+    rng = random.Random(seed)
+
+    # Product IDs to pick from come from the API itself, like a real client
+    probe = Session(transport, Stats(), rng, [])
+    status, products = await probe.get('product_list', '/api/products/')
+    product_ids = [p['id'] for p in products or []]
+    if not product_ids:
+        raise RuntimeError('No products to browse — seed the database first (manage.py seed_scale).')
+
+    run_tag = uuid.uuid4().hex[:8]
+    sessions = []
+    for n in range(concurrency):
+        session = Session(transport, stats, random.Random(seed * 7919 + n), product_ids)
+        await session.login(f'load_{run_tag}_{n}', password)
+        sessions.append(session)
+
+    journeys, weights = zip(*journeys)
+    deadline = time.monotonic() + duration
+
+    async def virtual_user(session):
+        while time.monotonic() < deadline:
+            journey = session.rng.choices(journeys, weights=weights)[0]
+            await journey(session)
+
+    # Setup requests (register/login) are not part of the measurement
+    stats.latencies.clear()
+    stats.errors.clear()
+    started = time.monotonic()
+    await asyncio.gather(*(virtual_user(s) for s in sessions))
+    elapsed = time.monotonic() - started
+
+    return summarize(stats, elapsed)
+
+
+def summarize(stats, elapsed):
+    endpoints = {}
+    total = errors = 0
+    for name, latencies in sorted(stats.latencies.items()):
+        latencies.sort()
+        n = len(latencies)
+        failed = stats.errors.get(name, 0)
+        total += n
+        errors += failed
+        endpoints[name] = {
+            'requests': n,
+            'throughput_rps': round(n / elapsed, 2),
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'p99_ms': round(_percentile(latencies, 99), 2),
+            'error_rate': round(failed / n, 4),
+        }
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
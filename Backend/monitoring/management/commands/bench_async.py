@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from urllib.parse import quote
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from monitoring import loadtest
+
+
+def add_db_latency(ms):
+    """Sleep before every query, like a database on the other side of a network."""
+    delay = ms / 1000
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if slow_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, slow_query)
+
+    connection_created.connect(install, weak=False)
+    # Connections opened from now on get the wrapper
+    connections.close_all()
+
+
+async def read_mix(s):
+    """The hot read endpoints that have async views."""
+    category = quote(s.rng.choice(loadtest.CATEGORIES))
+    await s.get('product_list', f'/api/products/?category={category}')
+    product_id = s.random_product()
+    await s.get('product_detail', f'/api/products/{product_id}/')
+    await s.get('product_ratings', f'/api/ratings/{product_id}/')
+    await s.get('view_cart', '/api/cart/view/')
+
+
+async def bench(transport, concurrency, duration, seed):
+    probe = loadtest.Session(transport, loadtest.Stats(), random.Random(seed), [])
+    status, products = await probe.get('product_list', '/api/products/')
+    product_ids = [p['id'] for p in products or []]
+    if not product_ids:
+        raise RuntimeError('No products to browse — seed the database first (manage.py seed_scale).')
+    # Everyone reads as the same user; logins aren't what is being measured
+    await probe.login(f'bench_{uuid.uuid4().hex[:8]}', 'Bench-async-pw-1')
+    # Create the cart up front so the virtual users don't race to create it
+    await probe.get('view_cart', '/api/cart/view/')
+
+    stats = loadtest.Stats()
+    sessions = []
+    for n in range(concurrency):
+        session = loadtest.Session(transport, stats, random.Random(seed * 7919 + n), product_ids)
+        session.token = probe.token
+        sessions.append(session)
+
+    deadline = time.monotonic() + duration
+
+    async def virtual_user(session):
+        while time.monotonic() < deadline:
+            await read_mix(session)
+
+    started = time.monotonic()
+    await asyncio.gather(*(virtual_user(s) for s in sessions))
+    return loadtest.summarize(stats, time.monotonic() - started)
+
+
+class Command(BaseCommand):
+    help = ('Compares sync (WSGI) and async (ASGI) serving of the hot read endpoints '
+            'with simulated database latency')
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency-ms', type=float, default=20, help='Added to every query')
+        parser.add_argument('--concurrency', type=int, default=50, help='Virtual users')
+        # The async side is one event loop, i.e. one uvicorn worker process
+        parser.add_argument('--sync-workers', type=int, default=1,
+                            help='Requests the sync side handles at once (sync worker processes to compare with one async worker)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per mode')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        # Internal: run one mode in this process (SERVE_ASYNC is read at import)
+        parser.add_argument('--child', choices=['sync', 'async'], help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['sync_workers'] < 1:
+            raise CommandError('--concurrency and --sync-workers must be at least 1.')
+
+        if options['child']:
+            self.run_child(options)
+            return
+
+        results = {}
+        for mode in ('sync', 'async'):
+            self.stdout.write(
+                f"{mode}: {options['concurrency']} virtual users, "
+                f"{options['latency_ms']:g} ms per query, {options['duration']:g}s..."
+            )
+            results[mode] = self.spawn(mode, options)
+
+        results = {
+            'commit': loadtest.git_commit(),
+            'latency_ms': options['latency_ms'],
+            'concurrency': options['concurrency'],
+            'sync_workers': options['sync_workers'],
+            **results,
+        }
+        self.print_report(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def spawn(self, mode, options):
+        cmd = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_async',
+            '--child', mode,
+            '--latency-ms', str(options['latency_ms']),
+            '--concurrency', str(options['concurrency']),
+            '--sync-workers', str(options['sync_workers']),
+            '--duration', str(options['duration']),
+            '--seed', str(options['seed']),
+        ]
+        env = {**os.environ, 'SERVE_ASYNC': 'True' if mode == 'async' else 'False'}
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise CommandError(f'{mode} run failed:\n{proc.stderr.strip()}')
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def run_child(self, options):
+        add_db_latency(options['latency_ms'])
+        if options['child'] == 'sync':
+            from config.wsgi import application
+            # Virtual users queue for a fixed number of workers, as on gunicorn
+            transport = loadtest.WsgiTransport(application, options['sync_workers'])
+        else:
+            from config.asgi import application
+            transport = loadtest.AsgiTransport(application)
+
+        try:
+            result = asyncio.run(bench(transport, options['concurrency'], options['duration'], options['seed']))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(result))
+
+    def print_report(self, results):
+        sync, async_ = results['sync'], results['async']
+        self.stdout.write('')
+        self.stdout.write(f"{'endpoint':<18}{'sync rps':>10}{'async rps':>11}{'sync p95':>10}{'async p95':>11}")
+        for name, s in sync['endpoints'].items():
+            a = async_['endpoints'].get(name)
+            if a is None:
+                continue
+            self.stdout.write(
+                f"{name:<18}{s['throughput_rps']:>10.1f}{a['throughput_rps']:>11.1f}"
+                f"{s['p95_ms']:>10.1f}{a['p95_ms']:>11.1f}"
+            )
+        speedup = async_['throughput_rps'] / sync['throughput_rps'] if sync['throughput_rps'] else 0
+        self.stdout.write(
+            f"\nTotal: sync {sync['throughput_rps']} req/s ({sync['error_rate'] * 100:.2f}% errors), "
+            f"async {async_['throughput_rps']} req/s ({async_['error_rate'] * 100:.2f}% errors) "
+            f"— {speedup:.1f}x"
+        )
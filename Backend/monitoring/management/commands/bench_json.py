@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from config.parsers import FastJSONParser
+from config.renderers import FastJSONRenderer, orjson
+
+
+def order_payload(n, native):
+    """Shaped like get_order_history; `native` keeps Decimals/datetimes unconverted."""
+    now = timezone.now()
+    orders = []
+    for i in range(n):
+        created = now - timedelta(minutes=i)
+        items = [
+            {
+                'product_name': f'Product {i}-{k}',
+                'product_price': Decimal('19.99') if native else 19.99,
+                'quantity': k + 1,
+                'item_total': Decimal('19.99') * (k + 1) if native else 19.99 * (k + 1),
+            }
+            for k in range(3)
+        ]
+        orders.append({
+            'id': i,
+            'status': 'delivered',
+            'total_amount': Decimal('119.94') if native else 119.94,
+            'transaction_id': f'TX-{i:08d}',
+            'created_at': created if native else created.strftime('%b %d, %Y at %I:%M %p'),
+            'updated_at': created if native else created.strftime('%b %d, %Y at %I:%M %p'),
+            'items': items,
+        })
+    return orders
+
+
+def product_payload(n):
+    """Shaped like ProductSerializer output (DecimalFields come out as strings)."""
+    return [
+        {
+            'id': i,
+            'title': f'Product {i}',
+            'description': 'A thoroughly ordinary product description. ' * 4,
+            'price': '49.99',
+            'category': 'Electronics',
+            'image': f'https://example.com/images/{i}.jpg',
+            'rating_rate': '4.3',
+            'images': [{'id': i * 10 + g, 'image': f'https://example.com/images/{i}-{g}.jpg'} for g in range(3)],
+        }
+        for i in range(n)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compares JSON render/parse throughput of DRF stock classes vs the orjson-backed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=5_000)
+        parser.add_argument('--products', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed — both columns use the stdlib encoder.'))
+
+        payloads = {
+            'orders (floats/strings)': order_payload(options['orders'], native=False),
+            'orders (Decimal/datetime)': order_payload(options['orders'], native=True),
+            'products': product_payload(options['products']),
+        }
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'payload':<28}{'op':<8}{'stock ms':>10}{'fast ms':>10}{'MB/s':>9}{'speedup':>9}")
+        for label, data in payloads.items():
+            body = JSONRenderer().render(data)
+            size_mb = len(body) / 1_000_000
+
+            stock = self.best_of(repeat, lambda: JSONRenderer().render(data))
+            fast = self.best_of(repeat, lambda: FastJSONRenderer().render(data))
+            self.report(label, 'render', stock, fast, size_mb)
+
+            stock = self.best_of(repeat, lambda: JSONParser().parse(BytesIO(body)))
+            fast = self.best_of(repeat, lambda: FastJSONParser().parse(BytesIO(body)))
+            self.report(label, 'parse', stock, fast, size_mb)
+
+    def best_of(self, repeat, fn):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def report(self, label, op, stock, fast, size_mb):
+        self.stdout.write(
+            f'{label:<28}{op:<8}{stock * 1000:>10.1f}{fast * 1000:>10.1f}'
+            f'{size_mb / fast:>9.0f}{stock / fast:>8.1f}x'
+        )
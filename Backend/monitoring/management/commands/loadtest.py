@@ -0,0 +1,86 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from monitoring import loadtest
+
+
+class Command(BaseCommand):
+    help = 'Replays storefront user journeys at a given concurrency and reports per-endpoint latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['http', 'wsgi', 'asgi'], default='wsgi',
+                            help='http hits --url; wsgi/asgi call the app in-process')
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server for --mode http')
+        parser.add_argument('--concurrency', type=int, default=10, help='Virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--sale', action='store_true',
+                            help='Flash-sale traffic: most users queue for and buy Sale items (needs a running FlashSale)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Earlier results JSON to diff against')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        if options['mode'] == 'http':
+            transport = loadtest.HttpTransport(options['url'], concurrency)
+        elif options['mode'] == 'wsgi':
+            from config.wsgi import application
+            transport = loadtest.WsgiTransport(application, concurrency)
+        else:
+            from config.asgi import application
+            transport = loadtest.AsgiTransport(application)
+
+        self.stdout.write(
+            f"Running {concurrency} virtual users for {options['duration']}s ({options['mode']})..."
+        )
+        try:
+            journeys = loadtest.SALE_JOURNEYS if options['sale'] else loadtest.JOURNEYS
+            results = asyncio.run(loadtest.run(
+                transport, concurrency, options['duration'], options['seed'], journeys=journeys
+            ))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        results = {
+            'commit': loadtest.git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'mode': options['mode'],
+            'sale': options['sale'],
+            'concurrency': concurrency,
+            'duration_s': options['duration'],
+            **results,
+        }
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+
+        self.print_report(results, baseline)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def print_report(self, results, baseline):
+        old = (baseline or {}).get('endpoints', {})
+        self.stdout.write('')
+        self.stdout.write(f"{'endpoint':<18}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}")
+        for name, e in results['endpoints'].items():
+            line = (
+                f"{name:<18}{e['requests']:>8}{e['throughput_rps']:>9.1f}"
+                f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['error_rate'] * 100:>7.1f}"
+            )
+            if name in old and old[name]['p95_ms']:
+                change = (e['p95_ms'] - old[name]['p95_ms']) / old[name]['p95_ms'] * 100
+                line += f"   p95 {change:+.0f}% vs {baseline.get('commit') or 'baseline'}"
+            self.stdout.write(line)
+        self.stdout.write(
+            f"\nTotal: {results['requests']} requests, {results['throughput_rps']} req/s, "
+            f"{results['error_rate'] * 100:.2f}% errors in {results['elapsed_s']}s"
+        )
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = ('Copies the primary SQLite database onto the SQLite replicas in DATABASE_REPLICA_URLS, '
+            'standing in for replication when trying the replica router locally')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lag', type=float, default=0,
+                            help='Keep copying every N seconds (simulated replication lag); 0 copies once')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('No replicas configured — set DATABASE_REPLICA_URLS.')
+
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = [settings.DATABASES[alias] for alias in settings.REPLICA_DATABASES]
+        if any(db['ENGINE'] != 'django.db.backends.sqlite3' for db in [primary, *replicas]):
+            raise CommandError('Only SQLite primaries/replicas can be synced; real replicas are kept '
+                               'up to date by the database server.')
+
+        if options['lag'] <= 0:
+            self.copy(primary, replicas)
+            return
+
+        self.stdout.write(f"Copying every {options['lag']:g}s, Ctrl+C to stop.")
+        try:
+            while True:
+                self.copy(primary, replicas)
+                time.sleep(options['lag'])
+        except KeyboardInterrupt:
+            pass
+
+    def copy(self, primary, replicas):
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for replica in replicas:
+                target = sqlite3.connect(replica['NAME'])
+                try:
+                    # Online backup: consistent even while the app is writing
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"  {primary['NAME']} -> {replica['NAME']}")
+        finally:
+            source.close()
@@ -0,0 +1,104 @@
+import os
+import time
+from collections import deque
+from django.conf import settings
+from django.core.cache import cache
+
+WORKERS_KEY = 'metrics:workers'
+
+# endpoint -> deque of (latency_ms, queries, db_ms, response_bytes)
+# deque.append and dict.setdefault are atomic under the GIL, so request
+# threads record samples without taking a lock. Old samples fall off the end.
+_samples = {}
+_totals = {}
+_last_publish = 0.0
+
+
+def _worker_key(pid):
+    return f'metrics:worker:{pid}'
+
+
+def record(endpoint, latency_ms, queries, db_ms, response_bytes):
+    window = _samples.get(endpoint)
+    if window is None:
+        window = _samples.setdefault(endpoint, deque(maxlen=settings.METRICS_WINDOW))
+    window.append((latency_ms, queries, db_ms, response_bytes))
+    _totals[endpoint] = _totals.get(endpoint, 0) + 1
+    maybe_publish()
+
+
+def maybe_publish():
+    """
+    Share this worker's samples through the cache every
+    METRICS_PUBLISH_INTERVAL seconds so the stats endpoint (served by
+    whichever worker) can merge all of them.
+    """
+    global _last_publish
+    now = time.monotonic()
+    if now - _last_publish < settings.METRICS_PUBLISH_INTERVAL:
+        return
+    _last_publish = now
+    publish()
+
+
+def publish():
+    pid = os.getpid()
+    snapshot = {
+        'samples': {endpoint: list(window) for endpoint, window in list(_samples.items())},
+        'totals': dict(_totals),
+    }
+    ttl = settings.METRICS_PUBLISH_INTERVAL * 6
+    cache.set(_worker_key(pid), snapshot, ttl)
+
+    workers = cache.get(WORKERS_KEY) or []
+    if pid not in workers:
+        cache.set(WORKERS_KEY, workers + [pid], None)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def collect():
+    """Merge the samples of every live worker into per-endpoint stats."""
+    publish()
+
+    workers = cache.get(WORKERS_KEY) or []
+    snapshots = cache.get_many([_worker_key(pid) for pid in workers])
+
+    # Forget workers whose snapshot expired (restarted or scaled down)
+    live = [pid for pid in workers if _worker_key(pid) in snapshots]
+    if len(live) != len(workers):
+        cache.set(WORKERS_KEY, live, None)
+
+    merged = {}
+    totals = {}
+    for snapshot in snapshots.values():
+        for endpoint, samples in snapshot['samples'].items():
+            merged.setdefault(endpoint, []).extend(samples)
+        for endpoint, count in snapshot['totals'].items():
+            totals[endpoint] = totals.get(endpoint, 0) + count
+
+    endpoints = {}
+    for endpoint, samples in sorted(merged.items()):
+        latencies = sorted(s[0] for s in samples)
+        n = len(samples)
+        endpoints[endpoint] = {
+            'requests_total': totals.get(endpoint, n),
+            'window': n,
+            'latency_ms': {
+                'p50': round(_percentile(latencies, 50), 2),
+                'p95': round(_percentile(latencies, 95), 2),
+                'p99': round(_percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries_avg': round(sum(s[1] for s in samples) / n, 2),
+            'queries_max': max(s[1] for s in samples),
+            'db_ms_avg': round(sum(s[2] for s in samples) / n, 2),
+            'response_bytes_avg': round(sum(s[3] for s in samples) / n),
+        }
+
+    return {'workers': len(snapshots), 'endpoints': endpoints}
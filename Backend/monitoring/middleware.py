@@ -0,0 +1,86 @@
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .metrics import record
+
+# Stats of the request being served. A context variable rather than a
+# per-connection wrapper, because async views run their queries on other
+# threads' connections; the value follows the request into those threads.
+current_stats = ContextVar('request_query_stats', default=None)
+
+
+class QueryStats:
+    """Query count and DB time for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """execute_wrapper installed on every connection (see signals.py)."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.duration += time.perf_counter() - start
+        stats.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, query count, DB time and response size per URL pattern
+    (see monitoring/metrics.py) and adds a Server-Timing header so the
+    numbers show up in the browser's network panel. Works on both the WSGI
+    and the ASGI stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats, start):
+        latency_ms = (time.perf_counter() - start) * 1000
+        db_ms = stats.duration * 1000
+
+        response['Server-Timing'] = (
+            f'app;dur={latency_ms:.1f}, '
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries"'
+        )
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            size = 0 if response.streaming else len(response.content)
+            record(f'{request.method} /{match.route}', latency_ms, stats.count, db_ms, size)
+
+        return response
@@ -0,0 +1,39 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Renders the output of metrics.collect() in Prometheus text format."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if 'endpoints' not in data:
+            # Errors (e.g. 403) still come back as plain text
+            return '\n'.join(f'# {k}: {v}' for k, v in data.items()) + '\n'
+
+        endpoints = []
+        for endpoint, stats in data['endpoints'].items():
+            method, route = endpoint.split(' ', 1)
+            endpoints.append((f'method="{method}",route="{route}"', stats))
+
+        # Prometheus wants every sample of a metric family grouped under its TYPE line
+        lines = ['# TYPE api_requests_total counter']
+        lines += [f'api_requests_total{{{labels}}} {s["requests_total"]}' for labels, s in endpoints]
+
+        lines.append('# TYPE api_latency_ms summary')
+        for labels, s in endpoints:
+            for q in ('p50', 'p95', 'p99'):
+                lines.append(f'api_latency_ms{{{labels},quantile="{int(q[1:]) / 100}"}} {s["latency_ms"][q]}')
+
+        for name, key in (
+            ('api_queries_avg', 'queries_avg'),
+            ('api_db_ms_avg', 'db_ms_avg'),
+            ('api_response_bytes_avg', 'response_bytes_avg'),
+        ):
+            lines.append(f'# TYPE {name} gauge')
+            lines += [f'{name}{{{labels}}} {s[key]}' for labels, s in endpoints]
+
+        lines.append('# TYPE api_metrics_workers gauge')
+        lines.append(f'api_metrics_workers {data["workers"]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,11 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .middleware import count_queries
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # Reconnects reuse the same wrapper list, so only add it once. Insert at
+    # the front: execute_wrapper() blocks pop() their own wrapper off the end.
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
@@ -0,0 +1,331 @@
+"""
+Query-count and response-time budgets for every API endpoint.
+
+Each endpoint in BUDGETS is called against a small data set and against one
+ten times larger. The query budget is the same for both, so a change that
+makes an endpoint's query count grow with the amount of data (an N+1)
+fails here. Raise a budget only when a change really needs a new query.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from analytics import rollups
+from archive import archiver
+from cart.models import Cart, CartItem
+from flashsale import admission
+from flashsale.models import FlashSale
+from orders.models import LineItem, Order
+from payments.models import Payment
+from products.models import Product, ProductImage, RecentlyViewed
+from ratings.models import ProductRating
+from wishlist.models import Wishlist
+
+# Who makes the request
+ANON, USER, ADMIN = 'anon', 'user', 'admin'
+
+# Generous ceiling — catches pathological slowdowns, not CI jitter
+DEFAULT_MAX_MS = 1500
+
+# (name, method, url, who, body, max_queries)
+# URLs and bodies are formatted with the IDs created in seed_data().
+BUDGETS = [
+    # ── Auth ──
+    ('register', 'post', '/api/auth/register/', ANON,
+     {'username': 'budget_new', 'password': 'x-Budget-99', 'email': 'n@example.com'}, 3),
+    ('login', 'post', '/api/auth/login/', ANON, {'username': 'shopper', 'password': 'pw'}, 1),
+    ('token_refresh', 'post', '/api/auth/token/refresh/', ANON, {'refresh': '{refresh}'}, 1),
+
+    # ── Products ──
+    ('product_list', 'get', '/api/products/', ANON, None, 2),
+    ('product_list_filtered', 'get', '/api/products/?category=Electronics&min_price=1&ordering=price_asc', ANON, None, 2),
+    ('product_detail', 'get', '/api/products/{product}/', ANON, None, 3),
+    ('product_list_popular', 'get', '/api/products/?ordering=popular', ANON, None, 2),
+    ('product_recent', 'get', '/api/products/recent/', USER, None, 3),
+    ('product_create', 'post', '/api/products/create/', ADMIN,
+     {'title': 'New', 'description': 'd', 'price': '9.99', 'category': 'Sale'}, 2),
+    ('product_update', 'put', '/api/products/update/{product}/', ADMIN,
+     {'title': 'Renamed', 'description': 'd', 'price': '5.00', 'category': 'Sale'}, 5),
+    ('product_delete', 'delete', '/api/products/delete/{product}/', ADMIN, None, 11),
+
+    # ── Cart ──
+    ('cart_add', 'post', '/api/cart/add/', USER, {'product_id': '{product}', 'quantity': 1}, 6),
+    ('cart_view', 'get', '/api/cart/view/', USER, None, 3),
+    ('cart_clear', 'post', '/api/cart/clear/', USER, None, 2),
+    ('cart_reserve', 'post', '/api/cart/reserve/', USER, None, 6),
+    ('cart_merge', 'post', '/api/cart/merge/', USER,
+     {'items': [{'product_id': '{product}', 'quantity': 1}, {'product_id': '{other_product}', 'quantity': 2}]}, 10),
+    ('cart_item_update', 'patch', '/api/cart/item/{cart_item}/update/', USER, {'quantity': 3}, 6),
+    ('cart_item_delete', 'delete', '/api/cart/item/{cart_item}/delete/', USER, None, 5),
+
+    # ── Payments ──
+    ('payment_submit', 'post', '/api/payments/submit/', USER,
+     {'transaction_id': 'BUDGET-TX', 'total_amount': '20.00',
+      'items': [{'product_id': '{product}', 'product_name': 'x', 'product_price': '10.00', 'quantity': 2}]}, 9),
+    ('payment_history', 'get', '/api/payments/history/', USER, None, 2),
+    ('payment_history_archived', 'get', '/api/payments/history/?include_archived=1', USER, None, 4),
+    ('payment_all', 'get', '/api/payments/all/', ADMIN, None, 1),
+    ('payment_status', 'patch', '/api/payments/{payment}/status/', ADMIN, {'status': 'verified'}, 2),
+
+    # ── Profile ──
+    ('profile', 'get', '/api/profile/', USER, None, 0),
+    ('profile_update', 'patch', '/api/profile/update/', USER, {'first_name': 'Budget'}, 1),
+
+    # ── Orders ──
+    ('order_history', 'get', '/api/orders/', USER, None, 2),
+    ('order_history_archived', 'get', '/api/orders/?include_archived=1', USER, None, 4),
+    ('order_create', 'post', '/api/orders/create/', USER,
+     {'total_amount': '10.00', 'items': [{'product_id': '{product}', 'product_name': 'x', 'product_price': '10.00'}]}, 3),
+    ('order_all', 'get', '/api/orders/all/', ADMIN, None, 1),
+    ('order_status', 'patch', '/api/orders/{order}/status/', ADMIN, {'status': 'shipped'}, 2),
+
+    # ── Ratings ──
+    ('ratings', 'get', '/api/ratings/{product}/', ANON, None, 2),
+    ('my_rating', 'get', '/api/ratings/{product}/mine/', USER, None, 3),
+    ('rating_submit', 'post', '/api/ratings/{product}/submit/', USER, {'score': 4, 'review': 'ok'}, 7),
+    ('rating_delete', 'delete', '/api/ratings/{product}/delete/', USER, None, 5),
+
+    # ── Wishlist ──
+    ('wishlist_list', 'get', '/api/wishlist/', USER, None, 3),
+    ('wishlist_detail', 'get', '/api/wishlist/{wishlist}/', USER, None, 3),
+    ('my_wishlist', 'get', '/api/wishlist/my_wishlist/', USER, None, 3),
+    ('my_wishlist_paged', 'get', '/api/wishlist/my_wishlist/?page=1&page_size=10', USER, None, 4),
+    ('wishlist_add', 'post', '/api/wishlist/add_product/', USER, {'product_id': '{other_product}'}, 5),
+    ('wishlist_add_compact', 'post', '/api/wishlist/add_product/?compact=1', USER, {'product_id': '{other_product}'}, 4),
+    ('wishlist_remove', 'post', '/api/wishlist/remove_product/', USER, {'product_id': '{product}'}, 4),
+    ('wishlist_remove_compact', 'post', '/api/wishlist/remove_product/?compact=1', USER, {'product_id': '{product}'}, 3),
+    ('wishlist_check', 'post', '/api/wishlist/check_product/', USER, {'product_id': '{product}'}, 1),
+    ('wishlist_ids', 'get', '/api/wishlist/product_ids/', USER, None, 1),
+    ('wishlist_check_many', 'post', '/api/wishlist/check_products/', USER,
+     {'product_ids': ['{product}', '{other_product}']}, 1),
+
+    # ── Misc ──
+    ('bootstrap', 'get', '/api/bootstrap/', USER, None, 3),
+    ('sale', 'get', '/api/sale/', ANON, None, 1),
+    ('batch', 'post', '/api/batch/', USER, {'requests': [
+        {'method': 'POST', 'path': '/api/wishlist/check_product/', 'body': {'product_id': '{product}'}},
+        {'method': 'POST', 'path': '/api/wishlist/check_product/', 'body': {'product_id': '{other_product}'}},
+        {'method': 'GET', 'path': '/api/cart/view/'},
+    ]}, 4),
+    ('events_ticket', 'post', '/api/events/ticket/', USER, None, 0),
+    ('metrics', 'get', '/api/_metrics/', ADMIN, None, 0),
+    ('analytics_sales', 'get', '/api/analytics/sales/?period=hour', ADMIN, None, 4),
+]
+
+# Like BUDGETS, called while a flash sale runs, with its state and listing
+# warmed into the cache as manage.py warm_flash_sale leaves them. {ticket} is
+# a queue ticket issued to the shopper whose number has come up.
+SALE_BUDGETS = [
+    ('sale_running', 'get', '/api/sale/', ANON, None, 0),
+    ('sale_products', 'get', '/api/sale/products/', ANON, None, 0),
+    ('sale_listing', 'get', '/api/products/?category=Sale', ANON, None, 0),
+    ('sale_join_queue', 'post', '/api/sale/queue/', USER, None, 0),
+    ('sale_queue_status', 'get', '/api/sale/queue/status/?ticket={ticket}', USER, None, 0),
+]
+
+# (name, url, max_queries) for admin pages, requested by a superuser. Two of
+# the queries are the session and the user.
+ADMIN_BUDGETS = [
+    ('admin_orders', '/admin/orders/order/', 4),
+    ('admin_orders_filtered', '/admin/orders/order/?status=pending', 4),
+    ('admin_orders_by_id', '/admin/orders/order/?before=1000000', 4),
+    ('admin_order_change', '/admin/orders/order/{order}/change/', 6),
+    ('admin_payments', '/admin/payments/payment/', 4),
+    ('admin_carts', '/admin/cart/cart/', 4),
+    ('admin_products', '/admin/products/product/', 4),
+    ('admin_price_history', '/admin/products/pricehistory/', 4),
+    ('admin_ratings', '/admin/ratings/productrating/', 5),
+    ('admin_wishlists', '/admin/wishlist/wishlist/', 4),
+    ('admin_price_alerts', '/admin/wishlist/pricedropalert/', 4),
+    ('admin_stock', '/admin/inventory/stock/', 4),
+    ('admin_reservations', '/admin/inventory/reservation/', 4),
+    ('admin_status_events', '/admin/notifications/statusevent/', 4),
+]
+
+# Per-endpoint response-time overrides (ms)
+MAX_MS = {
+    'login': 3000,
+}
+
+
+def seed_data(scale):
+    """
+    Realistic-looking data whose volume grows linearly with `scale`, both in
+    total and for the user making the requests.
+    """
+    password = make_password('pw')
+    shopper = User.objects.create(username='shopper', email='s@example.com', password=password)
+    admin = User.objects.create(username='boss', password=password, is_staff=True, is_superuser=True)
+    others = User.objects.bulk_create([
+        User(username=f'user{i}', password=password) for i in range(10 * scale)
+    ])
+
+    categories = [c[0] for c in Product.CATEGORY_CHOICES]
+    products = Product.objects.bulk_create([
+        Product(
+            title=f'Product {i}', description='Lorem ipsum ' * 10,
+            price=Decimal(10 + i % 90), category=categories[i % len(categories)],
+            image=f'https://example.com/{i}.jpg',
+        )
+        for i in range(20 * scale)
+    ])
+    ProductImage.objects.bulk_create([
+        ProductImage(product=p, image=f'https://example.com/{p.id}-{n}.jpg')
+        for p in products for n in range(3)
+    ])
+
+    # Orders/payments: the shopper gets 5 per scale, everyone else 2 per scale
+    buyers = [shopper] * (5 * scale) + [u for u in others for _ in range(2 * scale)]
+    orders = Order.objects.bulk_create([
+        Order(user=u, total_amount=Decimal('30.00'), transaction_id=f'TX-{i}')
+        for i, u in enumerate(buyers)
+    ])
+    payments = Payment.objects.bulk_create([
+        Payment(user=u, total_amount=Decimal('30.00'), transaction_id=f'TX-{i}')
+        for i, u in enumerate(buyers)
+    ])
+    # Each order and its payment share their lines, as submit_payment writes them
+    LineItem.objects.bulk_create([
+        LineItem(order=o, payment=p, product=products[(o.id + n) % len(products)],
+                 product_name='x', product_price=Decimal('10.00'))
+        for o, p in zip(orders, payments) for n in range(3)
+    ])
+
+    # The product under test: bought by the shopper, wishlisted, rated, in the cart
+    product = products[0]
+    LineItem.objects.create(order=orders[0], payment=payments[0], product=product, product_name='x', product_price=Decimal('10.00'))
+    other_product = products[-1]
+
+    rollups.run()
+    # Some of the shopper's older orders have been archived, with their payments
+    archiver.archive_orders([o.id for o in orders[1:1 + scale]])
+
+    ProductRating.objects.bulk_create([
+        ProductRating(product=product, user=u, score=1 + i % 5, review='fine')
+        for i, u in enumerate([shopper] + list(others))
+    ])
+
+    RecentlyViewed.objects.create(user=shopper, product_ids=[p.id for p in products[:20]])
+
+    wishlist = Wishlist.objects.create(user=shopper)
+    wishlist.products.add(*products[:5 * scale])
+
+    cart = Cart.objects.create(user=shopper)
+    cart_items = CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=p, quantity=1) for p in products[:5 * scale]
+    ])
+
+    return {
+        'users': {USER: shopper, ADMIN: admin},
+        'ids': {
+            'product': product.id,
+            'other_product': other_product.id,
+            'order': orders[0].id,
+            'payment': payments[0].id,
+            'cart_item': cart_items[0].id,
+            'wishlist': wishlist.id,
+            'refresh': str(RefreshToken.for_user(shopper)),
+        },
+    }
+
+
+def fill(value, ids):
+    """Substitute {placeholders} in a URL or request body."""
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in ids:
+            return ids[value[1:-1]]
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(v, ids) for v in value]
+    return value
+
+
+FAST_HASHER = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+class QueryBudgetMixin:
+    SCALE = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_data(cls.SCALE)
+
+    def call(self, method, url, who, body):
+        client = APIClient()
+        if who != ANON:
+            client.force_authenticate(self.data['users'][who])
+        return getattr(client, method)(url, body, format='json')
+
+    def check_budget(self, name, method, url, who, body, max_queries, ids, setup=None):
+        cache.clear()
+        # Each endpoint sees the same starting data
+        with transaction.atomic():
+            if setup:
+                ids = {**ids, **setup()}
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = self.call(method, fill(url, ids), who, fill(body, ids))
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+
+        self.assertLess(response.status_code, 400, f'{name}: {response.content[:200]!r}')
+        # Savepoints are bookkeeping, not work the endpoint asked for
+        count = sum(1 for q in queries if 'SAVEPOINT' not in q['sql'])
+        self.assertLessEqual(
+            count, max_queries,
+            f'{name} ran {count} queries (budget {max_queries}):\n'
+            + '\n'.join(q['sql'] for q in queries)
+        )
+        self.assertLess(elapsed_ms, MAX_MS.get(name, DEFAULT_MAX_MS), f'{name} took {elapsed_ms:.0f} ms')
+
+    def test_query_budgets(self):
+        for name, method, url, who, body, max_queries in BUDGETS:
+            with self.subTest(endpoint=name, scale=self.SCALE):
+                self.check_budget(name, method, url, who, body, max_queries, self.data['ids'])
+
+    def test_sale_query_budgets(self):
+        def start_sale():
+            now = timezone.now()
+            FlashSale.objects.create(name='Budget', starts_at=now - timedelta(minutes=1), ends_at=now + timedelta(hours=1))
+            sale = admission.warm()
+            ticket, _ = admission.join(sale, ['user', str(self.data['users'][USER].id)])
+            return {'ticket': ticket}
+
+        for name, method, url, who, body, max_queries in SALE_BUDGETS:
+            with self.subTest(endpoint=name, scale=self.SCALE):
+                self.check_budget(name, method, url, who, body, max_queries, self.data['ids'], setup=start_sale)
+
+    def test_admin_query_budgets(self):
+        client = Client()
+        client.force_login(self.data['users'][ADMIN])
+        for name, url, max_queries in ADMIN_BUDGETS:
+            with self.subTest(page=name, scale=self.SCALE):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(fill(url, self.data['ids']))
+
+                self.assertEqual(response.status_code, 200, name)
+                self.assertLessEqual(
+                    len(queries), max_queries,
+                    f'{name} ran {len(queries)} queries (budget {max_queries}):\n'
+                    + '\n'.join(q['sql'] for q in queries)
+                )
+
+
+@FAST_HASHER
+class QueryBudgetSmallDataTests(QueryBudgetMixin, TestCase):
+    SCALE = 1
+
+
+@FAST_HASHER
+class QueryBudgetLargeDataTests(QueryBudgetMixin, TestCase):
+    SCALE = 10
@@ -0,0 +1,19 @@
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from accounts.permissions import IsAdminUserCustom
+from config.renderers import FastJSONRenderer
+from .metrics import collect
+from .renderers import PrometheusRenderer
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUserCustom])
+@renderer_classes([FastJSONRenderer, PrometheusRenderer])
+def get_metrics(request):
+    """
+    Admin only — per-endpoint latency percentiles, query counts, DB time and
+    response sizes merged across all workers.
+    JSON by default; ?format=prometheus (or Accept: text/plain) for scraping.
+    """
+    return Response(collect())
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from monitoring.admin_performance import LargeTableAdmin
+from .models import StatusEvent
+
+
+@admin.register(StatusEvent)
+class StatusEventAdmin(LargeTableAdmin):
+    list_display = ('user', 'kind', 'object_id', 'status', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('kind',)
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'kind', 'object_id', 'status', 'created_at')
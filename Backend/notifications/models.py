@@ -0,0 +1,43 @@
+from django.db import models
+from django.conf import settings
+
+
+class StatusEvent(models.Model):
+    """
+    Order/payment status changes for the 'database' events backend (see
+    pubsub.py). Every worker polls for rows newer than the last one it saw
+    and pushes them to its own connected users. Old rows are removed by
+    `manage.py prune_status_events`.
+    """
+    KIND_CHOICES = [
+        ('order', 'Order'),
+        ('payment', 'Payment'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='status_events'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Replay after a reconnect (Last-Event-ID)
+            models.Index(fields=['user', 'id'], name='status_event_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} → {self.status}"
+
+    def as_event(self):
+        return {
+            'id': self.id,
+            'type': self.kind,
+            'object_id': self.object_id,
+            'status': self.status,
+            'at': self.created_at.isoformat(),
+        }
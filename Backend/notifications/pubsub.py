@@ -0,0 +1,198 @@
+"""
+Per-user pub/sub for order and payment status changes, pushed to browsers
+over Server-Sent Events (views.py).
+
+Connected streams subscribe to an in-process hub. publish_status_change()
+hands the event to a backend, which gets it to the hub of every worker:
+
+  local     — straight to this process's hub. Only correct with a single
+              worker (runserver, one uvicorn process).
+  database  — a StatusEvent row per change. Each worker polls the table for
+              new rows once per EVENTS_POLL_INTERVAL — one query per worker,
+              however many users are connected — and only while it has
+              subscribers. Stands in for Redis pub/sub or Postgres LISTEN.
+              Rows don't always commit in ID order, so IDs the poller has
+              skipped over are asked for again for EVENTS_COMMIT_GRACE
+              seconds before they're taken to be rolled back.
+"""
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from contextlib import asynccontextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import StatusEvent
+
+
+# ── In-process hub ────────────────────────────────────────────────────────────
+
+class Hub:
+    """user_id -> subscribed (event loop, queue) pairs in this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def add(self, user_id, loop, queue):
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add((loop, queue))
+
+    def remove(self, user_id, loop, queue):
+        with self.lock:
+            subs = self.subscribers.get(user_id)
+            if subs is not None:
+                subs.discard((loop, queue))
+                if not subs:
+                    del self.subscribers[user_id]
+
+    def has_subscribers(self, loop):
+        with self.lock:
+            return any(l is loop for subs in self.subscribers.values() for l, _ in subs)
+
+    def dispatch(self, user_id, event):
+        """Thread-safe: called from sync views as well as from the poller."""
+        with self.lock:
+            targets = list(self.subscribers.get(user_id, ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # A stuck client; it refetches the history when it reconnects
+        pass
+
+
+hub = Hub()
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class LocalBackend:
+    def publish(self, user_id, event):
+        hub.dispatch(user_id, event)
+
+    def ensure_listening(self, loop):
+        pass
+
+    def replay(self, user_id, after_id):
+        return []
+
+
+class DatabaseBackend:
+    BATCH = 500
+
+    def __init__(self):
+        self.pollers = {}
+
+    def publish(self, user_id, event):
+        StatusEvent.objects.create(
+            user_id=user_id, kind=event['type'], object_id=event['object_id'], status=event['status'],
+        )
+
+    def ensure_listening(self, loop):
+        """Start this event loop's poller if it isn't running."""
+        task = self.pollers.get(loop)
+        if task is None or task.done():
+            self.pollers[loop] = loop.create_task(self.poll(loop))
+
+    async def poll(self, loop):
+        last_id = await sync_to_async(self.latest_id)()
+        # Skipped-over ID -> when it was first missed
+        gaps = {}
+        try:
+            while hub.has_subscribers(loop):
+                events = await sync_to_async(self.fetch)(last_id, list(gaps))
+                now = time.monotonic()
+                for user_id, event in events:
+                    hub.dispatch(user_id, event)
+                    gaps.pop(event['id'], None)
+                    if event['id'] > last_id:
+                        skipped = range(max(last_id + 1, event['id'] - self.BATCH), event['id'])
+                        gaps.update(dict.fromkeys(skipped, now))
+                        last_id = event['id']
+                gaps = {i: t for i, t in gaps.items() if now - t < settings.EVENTS_COMMIT_GRACE}
+                if len(events) < self.BATCH:
+                    await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+        finally:
+            self.pollers.pop(loop, None)
+
+    @staticmethod
+    def latest_id():
+        return StatusEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def fetch(self, after_id, gap_ids=()):
+        """Rows after after_id, and any of gap_ids that have since committed."""
+        rows = StatusEvent.objects.filter(Q(id__gt=after_id) | Q(id__in=gap_ids)).order_by('id')[:self.BATCH]
+        return [(row.user_id, row.as_event()) for row in rows]
+
+    @staticmethod
+    def replay(user_id, after_id):
+        """
+        Events a reconnecting client missed (SSE Last-Event-ID). Those from
+        the last EVENTS_COMMIT_GRACE seconds are sent again even below
+        after_id, in case they committed after it; a status applied twice
+        is harmless.
+        """
+        recent = timezone.now() - timedelta(seconds=settings.EVENTS_COMMIT_GRACE)
+        rows = (
+            StatusEvent.objects
+            .filter(Q(id__gt=after_id) | Q(created_at__gte=recent), user_id=user_id)
+            .order_by('id')[:DatabaseBackend.BATCH]
+        )
+        return [row.as_event() for row in rows]
+
+
+BACKENDS = {
+    'local': LocalBackend,
+    'database': DatabaseBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        try:
+            _backend = BACKENDS[settings.EVENTS_BACKEND]()
+        except KeyError:
+            raise ValueError(f"Unknown events backend '{settings.EVENTS_BACKEND}'. Choose from: {list(BACKENDS)}")
+    return _backend
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def publish_status_change(kind, obj):
+    """
+    Tell obj's owner that its status changed, once the current transaction
+    commits. kind is 'order' or 'payment'.
+    """
+    event = {
+        'id': None,
+        'type': kind,
+        'object_id': obj.id,
+        'status': obj.status,
+        'at': timezone.now().isoformat(),
+    }
+    user_id = obj.user_id
+    transaction.on_commit(lambda: get_backend().publish(user_id, event))
+
+
+@asynccontextmanager
+async def subscribe(user_id):
+    """Yields an asyncio.Queue that receives the user's events while open."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+    hub.add(user_id, loop, queue)
+    try:
+        get_backend().ensure_listening(loop)
+        yield queue
+    finally:
+        hub.remove(user_id, loop, queue)
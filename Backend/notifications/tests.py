@@ -0,0 +1,115 @@
+import asyncio
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import Client, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from orders.models import Order
+from payments.models import Payment
+from . import pubsub
+from .models import StatusEvent
+from .views import TICKET_SALT, format_event, issue_ticket
+
+
+class StatusEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shopper = User.objects.create(username='shopper')
+        cls.admin = User.objects.create(username='boss', is_staff=True)
+        cls.order = Order.objects.create(user=cls.shopper, total_amount=Decimal('10.00'))
+        cls.payment = Payment.objects.create(user=cls.shopper, total_amount=Decimal('10.00'))
+
+    def setUp(self):
+        pubsub._backend = None
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(EVENTS_BACKEND='database', EVENTS_COMMIT_GRACE=0)
+    def test_status_updates_are_published_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/orders/{self.order.id}/status/', {'status': 'shipped'}, format='json')
+            self.client.patch(f'/api/payments/{self.payment.id}/status/', {'status': 'verified'}, format='json')
+            # Nothing is visible to other workers before the commit
+            self.assertFalse(StatusEvent.objects.exists())
+
+        events = pubsub.get_backend().replay(self.shopper.id, 0)
+        self.assertEqual(
+            [(e['type'], e['object_id'], e['status']) for e in events],
+            [('order', self.order.id, 'shipped'), ('payment', self.payment.id, 'verified')],
+        )
+        self.assertEqual(pubsub.get_backend().replay(self.shopper.id, events[0]['id']), events[1:])
+
+    @override_settings(EVENTS_BACKEND='local')
+    def test_local_backend_reaches_subscribed_stream(self):
+        async def listen():
+            async with pubsub.subscribe(self.shopper.id) as queue:
+                pubsub.get_backend().publish(self.shopper.id, {'id': None, 'type': 'payment', 'object_id': 1, 'status': 'verified'})
+                # Other users' events don't arrive
+                pubsub.get_backend().publish(self.admin.id, {'id': None, 'type': 'payment', 'object_id': 2, 'status': 'rejected'})
+                event = await asyncio.wait_for(queue.get(), 1)
+                return event, queue.empty()
+
+        event, nothing_else = asyncio.run(listen())
+        self.assertEqual(event['object_id'], 1)
+        self.assertTrue(nothing_else)
+        self.assertEqual(pubsub.hub.subscribers, {})
+
+    @override_settings(EVENTS_BACKEND='database', EVENTS_COMMIT_GRACE=60)
+    def test_rows_that_commit_out_of_order_are_not_missed(self):
+        backend = pubsub.get_backend()
+        early, late = StatusEvent.objects.bulk_create([
+            StatusEvent(user=self.shopper, kind='order', object_id=1, status='shipped'),
+            StatusEvent(user=self.shopper, kind='order', object_id=2, status='shipped'),
+        ])
+        # The poller saw `late` while `early` was still uncommitted
+        self.assertEqual([e['id'] for _, e in backend.fetch(late.id, [early.id])], [early.id])
+        self.assertEqual(backend.fetch(late.id, []), [])
+        # A client reconnecting from `late` gets `early` again while it's recent
+        self.assertEqual([e['id'] for e in backend.replay(self.shopper.id, late.id)], [early.id, late.id])
+
+    def test_sse_format(self):
+        self.assertEqual(
+            format_event({'id': 7, 'type': 'order', 'object_id': 1, 'status': 'shipped'}),
+            'id: 7\nevent: order\ndata: {"id": 7, "type": "order", "object_id": 1, "status": "shipped"}\n\n',
+        )
+
+
+@override_settings(EVENTS_BACKEND='database', SERVE_ASYNC=True)
+class StatusStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shopper = User.objects.create(username='shopper')
+
+    def setUp(self):
+        pubsub._backend = None
+
+    def test_ticket_is_issued_to_signed_in_users_only(self):
+        self.assertEqual(APIClient().post('/api/events/ticket/').status_code, 401)
+        client = APIClient()
+        client.force_authenticate(self.shopper)
+        response = client.post('/api/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(signing.loads(response.data['ticket'], salt=TICKET_SALT), self.shopper.id)
+
+    @override_settings(SERVE_ASYNC=False)
+    def test_without_asgi_there_is_no_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.shopper)
+        self.assertEqual(client.post('/api/events/ticket/').status_code, 204)
+        response = Client().get(f'/api/events/?ticket={issue_ticket(self.shopper.id)}')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_stream_wants_a_valid_ticket_not_the_access_token(self):
+        token = str(RefreshToken.for_user(self.shopper).access_token)
+        self.assertEqual(Client().get(f'/api/events/?token={token}').status_code, 401)
+        self.assertEqual(Client().get(f'/api/events/?ticket={token}').status_code, 401)
+        self.assertEqual(Client().get(f'/api/events/?ticket={issue_ticket(self.shopper.id)}x').status_code, 401)
+
+        ticket = issue_ticket(self.shopper.id)
+        with override_settings(EVENTS_TICKET_SECONDS=-1):
+            self.assertEqual(Client().get(f'/api/events/?ticket={ticket}').status_code, 401)
+        self.shopper.is_active = False
+        self.shopper.save()
+        self.assertEqual(Client().get(f'/api/events/?ticket={ticket}').status_code, 401)
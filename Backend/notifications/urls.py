@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.status_stream, name='status_stream'),
+    path('ticket/', views.stream_ticket, name='stream_ticket'),
+]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from config.renderers import json_response
+from .pubsub import get_backend, subscribe
+
+TICKET_SALT = 'notifications.stream-ticket'
+
+
+def format_event(event):
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(user_id, last_event_id):
+    async with subscribe(user_id) as queue:
+        # Reconnect delay the browser should use (ms)
+        yield 'retry: 5000\n\n'
+        if last_event_id is not None:
+            for event in await sync_to_async(get_backend().replay)(user_id, last_event_id):
+                yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+
+
+def issue_ticket(user_id):
+    return signing.dumps(user_id, salt=TICKET_SALT)
+
+
+def ticket_user_id(request):
+    """
+    The user a stream request's ?ticket= was issued to, or None if it is
+    missing, forged or expired, or the user has since been deactivated.
+    """
+    ticket = request.GET.get('ticket')
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.EVENTS_TICKET_SECONDS)
+    except signing.BadSignature:
+        return None
+    if not User.objects.filter(id=user_id, is_active=True).exists():
+        return None
+    return user_id
+
+
+def _last_event_id(request):
+    # The browser sends the header on its own reconnects; the page passes
+    # ?last_event_id= when it opens a new stream with a fresh ticket
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    return int(value) if value and value.isdigit() else None
+
+
+def _unauthorized():
+    return json_response({'detail': 'A valid stream ticket is required.'}, status=401)
+
+
+def _stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """
+    A ticket for opening the status stream. EventSource can't send headers,
+    so the stream is authorized by ?ticket= rather than the access token,
+    which would then end up in URLs and access logs. A ticket is only good
+    for the stream, and only for EVENTS_TICKET_SECONDS.
+
+    Without SERVE_ASYNC there is no stream (see status_stream) and this
+    answers 204, which tells the page to poll the history instead.
+    """
+    if not settings.SERVE_ASYNC:
+        return Response(status=204)
+    return Response({'ticket': issue_ticket(request.user.id), 'expires_in': settings.EVENTS_TICKET_SECONDS})
+
+
+@require_GET
+async def status_stream(request):
+    """
+    Server-Sent Events stream of the user's order and payment status
+    changes, replacing polling of the history endpoints.
+
+    Only served under ASGI (SERVE_ASYNC). A sync worker would be tied up
+    for as long as the page stays open, so WSGI deployments answer 204,
+    which stops EventSource from reconnecting.
+    """
+    if not settings.SERVE_ASYNC:
+        return HttpResponse(status=204)
+    user_id = await sync_to_async(ticket_user_id)(request)
+    if user_id is None:
+        return _unauthorized()
+    return _stream_response(event_stream(user_id, _last_event_id(request)))
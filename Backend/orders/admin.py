@@ -1,17 +1,34 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from monitoring.admin_performance import LargeTableAdmin, related_count
+from .models import Order, LineItem
 
 
 class OrderItemInline(admin.TabularInline):
-    model = OrderItem
+    model = LineItem
+    fk_name = 'order'
+    fields = ('product', 'product_name', 'product_price', 'quantity')
     extra = 0
     readonly_fields = ('product', 'product_name', 'product_price', 'quantity')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'total_amount', 'status', 'transaction_id', 'created_at')
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'total_amount', 'status', 'item_count', 'transaction_id', 'created_at')
     list_filter = ('status',)
+    list_select_related = ('user',)
     search_fields = ('user__username', 'transaction_id')
     list_editable = ('status',)
+    autocomplete_fields = ('user',)
     inlines = [OrderItemInline]
+
+    def get_queryset(self, request):
+        # The user is in the change form's title too
+        queryset = super().get_queryset(request).select_related('user')
+        return queryset.annotate(item_count=related_count(LineItem.objects, 'order'))
+
+    def item_count(self, obj):
+        return obj.item_count
+    item_count.short_description = 'Items'
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        # Order lines stay where they are; payment lines are linked to them next
+        migrations.RenameModel('OrderItem', 'LineItem'),
+        migrations.AlterField(
+            model_name='lineitem',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.order'),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='payments.payment'),
+        ),
+    ]
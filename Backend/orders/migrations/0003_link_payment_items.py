@@ -0,0 +1,100 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations
+
+BATCH = 2000
+
+SNAPSHOT = ('product_id', 'product_name', 'product_price', 'quantity')
+
+
+def snapshot(row):
+    return tuple(row[f] for f in SNAPSHOT)
+
+
+def orders_by_transaction(Order, payments):
+    """
+    {(user_id, transaction_id): order_id} for the orders placed with these
+    payments, read in one query for the whole batch. A transaction ID on
+    several of a user's orders is ambiguous and maps to None, leaving them
+    unlinked.
+    """
+    orders = {}
+    rows = Order.objects.filter(
+        transaction_id__in={p['transaction_id'] for p in payments},
+        user_id__in={p['user_id'] for p in payments},
+    ).values_list('user_id', 'transaction_id', 'id')
+    for user_id, transaction_id, order_id in rows:
+        key = (user_id, transaction_id)
+        orders[key] = None if key in orders else order_id
+    return orders
+
+
+def link_payment_items(apps, schema_editor):
+    """
+    submit_payment wrote every line twice, as an OrderItem and a PaymentItem.
+    Where a payment's items match the lines of the order placed with it
+    (same user and transaction ID), the lines get the payment too and the
+    copies are dropped. Anything that doesn't match becomes payment-only lines.
+    """
+    Order = apps.get_model('orders', 'Order')
+    LineItem = apps.get_model('orders', 'LineItem')
+    Payment = apps.get_model('payments', 'Payment')
+    PaymentItem = apps.get_model('payments', 'PaymentItem')
+
+    last_id = 0
+    while True:
+        payments = list(
+            Payment.objects.filter(id__gt=last_id).order_by('id').values('id', 'user_id', 'transaction_id')[:BATCH]
+        )
+        if not payments:
+            break
+        last_id = payments[-1]['id']
+
+        orders = orders_by_transaction(Order, payments)
+
+        order_lines = {}
+        for line in LineItem.objects.filter(order_id__in=[o for o in orders.values() if o], payment_id=None).values(
+            'id', 'order_id', *SNAPSHOT
+        ):
+            order_lines.setdefault(line['order_id'], []).append(line)
+        payment_items = {}
+        for item in PaymentItem.objects.filter(payment_id__in=[p['id'] for p in payments]).values('payment_id', *SNAPSHOT):
+            payment_items.setdefault(item['payment_id'], []).append(item)
+
+        linked, unmatched = [], []
+        for p in payments:
+            items = payment_items.get(p['id'], [])
+            lines = order_lines.get(orders.get((p['user_id'], p['transaction_id'])), [])
+            if lines and sorted(map(snapshot, lines)) == sorted(map(snapshot, items)):
+                linked.extend(LineItem(id=line['id'], payment_id=p['id']) for line in lines)
+            else:
+                unmatched.extend(LineItem(payment_id=p['id'], **{f: item[f] for f in SNAPSHOT}) for item in items)
+
+        LineItem.objects.bulk_update(linked, ['payment_id'], batch_size=BATCH)
+        LineItem.objects.bulk_create(unmatched, batch_size=BATCH)
+
+
+def unlink_payment_items(apps, schema_editor):
+    LineItem = apps.get_model('orders', 'LineItem')
+    PaymentItem = apps.get_model('payments', 'PaymentItem')
+
+    lines = LineItem.objects.exclude(payment_id=None).order_by('id').values('payment_id', *SNAPSHOT)
+    batch = []
+    for line in lines.iterator(chunk_size=BATCH):
+        batch.append(PaymentItem(**line))
+        if len(batch) >= BATCH:
+            PaymentItem.objects.bulk_create(batch)
+            batch = []
+    PaymentItem.objects.bulk_create(batch)
+    LineItem.objects.filter(order_id=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_lineitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_payment_items, unlink_payment_items),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:00
+
+import orders.models
+from django.db import migrations, models
+
+
+def delete_orphaned_lines(apps, schema_editor):
+    """Lines left with neither order nor payment by payments deleted so far."""
+    LineItem = apps.get_model('orders', 'LineItem')
+    LineItem.objects.filter(order=None, payment=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_timestamp_indexes'),
+        ('payments', '0002_delete_paymentitem'),
+        ('products', '0007_recentlyviewed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lineitem',
+            name='payment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=orders.models.detach_from_payment, related_name='items', to='payments.payment'),
+        ),
+        migrations.RunPython(delete_orphaned_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lineitem',
+            constraint=models.CheckConstraint(condition=models.Q(('order__isnull', False), ('payment__isnull', False), _connector='OR'), name='lineitem_order_or_payment'),
+        ),
+    ]
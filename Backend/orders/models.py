@@ -20,19 +20,58 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     transaction_id = models.CharField(max_length=255, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Indexed for the sales rollups (analytics/rollups.py), which find
+    # changed orders by updated_at and recompute buckets by created_at
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.username} — {self.status}"
 
 
-class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+def detach_from_payment(collector, field, sub_objs, using):
+    """
+    on_delete for LineItem.payment: an order's lines stay with the order and
+    just lose the payment; payment-only lines would belong to nothing, so
+    they are deleted with it.
+    """
+    orphans = [line for line in sub_objs if line.order_id is None]
+    kept = [line for line in sub_objs if line.order_id is not None]
+    if orphans:
+        models.CASCADE(collector, field, orphans, using)
+    if kept:
+        collector.add_field_update(field, None, kept)
+
+
+class LineItem(models.Model):
+    """
+    One purchased line. submit_payment places an Order and a Payment for the
+    same basket, so each line is stored once and both point at it:
+    order.items and payment.items read the same rows.
+
+    Orders placed on their own (create_order) have lines with no payment,
+    and payments whose items never matched an order have lines with no order.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True, related_name='items')
+    payment = models.ForeignKey(
+        'payments.Payment', on_delete=detach_from_payment, null=True, blank=True, related_name='items'
+    )
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
-    product_name = models.CharField(max_length=255)
+    product_name = models.CharField(max_length=255)   # snapshot of name at time of purchase
     product_price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(order__isnull=False) | models.Q(payment__isnull=False),
+                name='lineitem_order_or_payment',
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.quantity} x {self.product_name}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product_name}"
+
+    @property
+    def item_total(self):
+        return self.product_price * self.quantity
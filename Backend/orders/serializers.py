@@ -0,0 +1,15 @@
+def serialize_line_items(items):
+    """
+    Line items in the shape the order and payment histories have always
+    returned (as OrderItem and PaymentItem did), so clients see no change now
+    that both read the shared LineItem rows.
+    """
+    return [
+        {
+            'product_name': item.product_name,
+            'product_price': float(item.product_price),
+            'quantity': item.quantity,
+            'item_total': float(item.item_total)
+        }
+        for item in items
+    ]
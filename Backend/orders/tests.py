@@ -1,3 +1,31 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.test import TestCase
+from payments.models import Payment
+from .models import LineItem, Order
 
-# Create your tests here.
+
+class LineItemTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create(username='buyer')
+
+    def line(self, **kwargs):
+        return LineItem.objects.create(product_name='Lamp', product_price=Decimal('10.00'), **kwargs)
+
+    def test_deleting_a_payment_keeps_order_lines_and_drops_payment_only_lines(self):
+        order = Order.objects.create(user=self.buyer, total_amount=Decimal('10.00'), transaction_id='TX-1')
+        payment = Payment.objects.create(user=self.buyer, total_amount=Decimal('20.00'), transaction_id='TX-1')
+        shared = self.line(order=order, payment=payment)
+        payment_only = self.line(payment=payment)
+
+        payment.delete()
+
+        shared.refresh_from_db()
+        self.assertEqual((shared.order_id, shared.payment_id), (order.id, None))
+        self.assertFalse(LineItem.objects.filter(id=payment_only.id).exists())
+
+    def test_a_line_needs_an_order_or_a_payment(self):
+        with self.assertRaises(IntegrityError):
+            self.line()
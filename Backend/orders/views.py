@@ -1,36 +1,47 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Order, OrderItem
+from django.db.models import Count
+from .models import Order, LineItem
+from .serializers import serialize_line_items
 from products.models import Product
+from accounts.authentication import StatelessJWTAuthentication
+from config.db_router import replica_reads
+from notifications.pubsub import publish_status_change
+from archive.history import include_archived
+from archive.models import ArchivedOrder
+
+
+def serialize_order(order):
+    """History entry for an Order or ArchivedOrder."""
+    return {
+        'id': order.id,
+        'status': order.status,
+        'total_amount': float(order.total_amount),
+        'transaction_id': order.transaction_id,
+        'created_at': order.created_at.strftime('%b %d, %Y at %I:%M %p'),
+        'updated_at': order.updated_at.strftime('%b %d, %Y at %I:%M %p'),
+        'items': serialize_line_items(order.items.all())
+    }
 
 
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_order_history(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    data = []
-    for order in orders:
-        items_data = [
-            {
-                'product_name': item.product_name,
-                'product_price': float(item.product_price),
-                'quantity': item.quantity,
-                'item_total': float(item.product_price * item.quantity)
-            }
-            for item in order.items.all()
-        ]
-        data.append({
-            'id': order.id,
-            'status': order.status,
-            'total_amount': float(order.total_amount),
-            'transaction_id': order.transaction_id,
-            'created_at': order.created_at.strftime('%b %d, %Y at %I:%M %p'),
-            'updated_at': order.updated_at.strftime('%b %d, %Y at %I:%M %p'),
-            'items': items_data
-        })
-    return Response(data)
+    """The user's orders, newest first; ?include_archived=1 adds archived ones."""
+    orders = list(
+        Order.objects.filter(user_id=request.user.id)
+        .prefetch_related('items')
+        .order_by('-created_at')
+    )
+    if include_archived(request):
+        orders += ArchivedOrder.objects.filter(user_id=request.user.id).prefetch_related('items')
+        # Mostly older than the live ones, but not always: ages at archival vary by status
+        orders.sort(key=lambda o: o.created_at, reverse=True)
+    return Response([serialize_order(o) for o in orders])
 
 
 @api_view(['POST'])
@@ -59,7 +70,7 @@ def create_order(request):
             except Product.DoesNotExist:
                 pass
 
-        OrderItem.objects.create(
+        LineItem.objects.create(
             order=order,
             product=product,
             product_name=item.get('product_name', 'Unknown'),
@@ -89,6 +100,7 @@ def update_order_status(request, order_id):
 
     order.status = new_status
     order.save()
+    publish_status_change('order', order)
     return Response({'message': f'Order #{order.id} updated to {new_status}.'})
 
 
@@ -99,7 +111,11 @@ def get_all_orders(request):
     if not request.user.is_staff:
         return Response({'error': 'Forbidden'}, status=403)
 
-    orders = Order.objects.select_related('user').order_by('-created_at')
+    orders = (
+        Order.objects.select_related('user')
+        .annotate(item_count=Count('items'))
+        .order_by('-created_at')
+    )
     data = [
         {
             'id': o.id,
@@ -107,7 +123,7 @@ def get_all_orders(request):
             'total_amount': float(o.total_amount),
             'status': o.status,
             'transaction_id': o.transaction_id,
-            'item_count': o.items.count(),
+            'item_count': o.item_count,
             'created_at': o.created_at.strftime('%b %d, %Y at %I:%M %p'),
         }
         for o in orders
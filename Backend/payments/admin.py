@@ -1,17 +1,36 @@
 from django.contrib import admin
-from .models import Payment, PaymentItem
+from monitoring.admin_performance import LargeTableAdmin, related_count
+from orders.models import LineItem
+from .models import Payment
 
 
 class PaymentItemInline(admin.TabularInline):
-    model = PaymentItem
+    # The same rows as the order's items (see orders.LineItem)
+    model = LineItem
+    fk_name = 'payment'
+    fields = ('product', 'product_name', 'product_price', 'quantity')
     extra = 0
     readonly_fields = ('product', 'product_name', 'product_price', 'quantity')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'transaction_id', 'total_amount', 'status', 'created_at')
+class PaymentAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'transaction_id', 'total_amount', 'status', 'item_count', 'created_at')
     list_filter = ('status',)
+    list_select_related = ('user',)
     search_fields = ('transaction_id', 'user__username')
     list_editable = ('status',)   # lets you verify/reject payments directly from the list view
-    inlines = [PaymentItemInline]
\ No newline at end of file
+    autocomplete_fields = ('user',)
+    inlines = [PaymentItemInline]
+
+    def get_queryset(self, request):
+        # The user is in the change form's title too
+        queryset = super().get_queryset(request).select_related('user')
+        return queryset.annotate(item_count=related_count(LineItem.objects, 'payment'))
+
+    def item_count(self, obj):
+        return obj.item_count
+    item_count.short_description = 'Items'
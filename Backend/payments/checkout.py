@@ -0,0 +1,88 @@
+"""
+Placing orders. A checkout is a Payment and its Order, created together
+with one LineItem per cart line that both share, after the stock is taken.
+
+place_orders() writes any number of checkouts with one INSERT per table, so
+submit_payment and the flash-sale coalescer (flashsale/coalesce.py) share
+the same code whether they place one order or fifty.
+"""
+from dataclasses import dataclass
+from django.db import transaction
+from inventory import stock
+from inventory.models import Reservation
+from orders.models import LineItem, Order
+from products.models import Product
+from .models import Payment
+
+
+@dataclass
+class Checkout:
+    user: object
+    transaction_id: str
+    total_amount: object
+    # (product_id, product_name, product_price, quantity)
+    lines: list
+
+
+def parse_lines(items):
+    """
+    The request's items as Checkout lines. Raises ValueError for an item
+    that isn't an object or whose product ID or quantity isn't a whole number.
+    """
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f'Not an item: {item!r}')
+        product_id = item.get('product_id') or item.get('id')
+        if product_id:
+            product_id = stock.whole_number(product_id)
+        name = item.get('product_name') or item.get('product', {}).get('title', 'Unknown')
+        price = item.get('product_price') or item.get('product', {}).get('price', 0)
+        qty = stock.whole_number(item.get('quantity', 1))
+        lines.append((product_id, name, price, qty))
+    return lines
+
+
+def take_stock(checkout):
+    """
+    Hand back whatever the user's cart had on hold, then take the ordered
+    units in one conditional update. Raises stock.OutOfStock.
+    """
+    with transaction.atomic():
+        stock.release(Reservation.objects.filter(cart__user=checkout.user))
+        stock.take(stock.merge_quantities((product_id, qty) for product_id, _, _, qty in checkout.lines))
+
+
+def place_orders(checkouts):
+    """Create the Payment and Order rows for checkouts whose stock is taken."""
+    payments = Payment.objects.bulk_create([
+        Payment(user=c.user, transaction_id=c.transaction_id, total_amount=c.total_amount, status='pending')
+        for c in checkouts
+    ])
+    orders = Order.objects.bulk_create([
+        Order(user=c.user, total_amount=c.total_amount, transaction_id=c.transaction_id, status='pending')
+        for c in checkouts
+    ])
+
+    # Items whose product no longer exists keep their snapshot with no link
+    products = Product.objects.in_bulk({
+        int(product_id) for c in checkouts for product_id, _, _, _ in c.lines if product_id
+    })
+    # One row per line, shared by the payment and the order
+    LineItem.objects.bulk_create([
+        LineItem(
+            order=order, payment=payment, product=products.get(int(product_id)) if product_id else None,
+            product_name=name, product_price=price, quantity=qty,
+        )
+        for c, payment, order in zip(checkouts, payments, orders)
+        for product_id, name, price, qty in c.lines
+    ])
+
+    return list(zip(payments, orders))
+
+
+def place_order(checkout):
+    """Take the stock and place one checkout. Raises stock.OutOfStock."""
+    with transaction.atomic():
+        take_stock(checkout)
+        return place_orders([checkout])[0]
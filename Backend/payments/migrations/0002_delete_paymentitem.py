@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_link_payment_items'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        # Payment lines now live in orders.LineItem (payment.items)
+        migrations.DeleteModel(
+            name='PaymentItem',
+        ),
+    ]
@@ -1,6 +1,5 @@
 from django.db import models
 from django.conf import settings
-from products.models import Product
 
 
 class Payment(models.Model):
@@ -22,14 +21,3 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment {self.transaction_id} by {self.user.username} — {self.status}"
-
-
-class PaymentItem(models.Model):
-    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
-    product_name = models.CharField(max_length=255)   # snapshot of name at time of purchase
-    product_price = models.DecimalField(max_digits=10, decimal_places=2)
-    quantity = models.PositiveIntegerField(default=1)
-
-    def __str__(self):
-        return f"{self.quantity} x {self.product_name}"
\ No newline at end of file
@@ -1,10 +1,19 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Payment, PaymentItem
-from orders.models import Order, OrderItem
-from products.models import Product
+from django.db import IntegrityError
+from .models import Payment
+from .checkout import Checkout, parse_lines, place_order
+from orders.serializers import serialize_line_items
+from accounts.authentication import StatelessJWTAuthentication
+from config.db_router import replica_reads
+from notifications.pubsub import publish_status_change
+from inventory import stock
+from flashsale import admission
+from flashsale.coalesce import coalescer
+from archive.history import include_archived
+from archive.models import ArchivedPayment
 
 
 @api_view(['POST'])
@@ -23,53 +32,34 @@ def submit_payment(request):
     if not items:
         return Response({'error': 'No items in order.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    if Payment.objects.filter(transaction_id=transaction_id).exists():
-        return Response({'error': 'This Transaction ID has already been submitted.'}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Create Payment record
-    payment = Payment.objects.create(
-        user=request.user,
-        transaction_id=transaction_id,
-        total_amount=total_amount,
-        status='pending'
-    )
-
-    # Create Order record at the same time
-    order = Order.objects.create(
-        user=request.user,
-        total_amount=total_amount,
-        transaction_id=transaction_id,
-        status='pending'
+    # Archived payments count too, or an old transaction ID could be paid with again
+    # (both tables in one query)
+    taken = (
+        Payment.objects.filter(transaction_id=transaction_id).values('transaction_id')
+        .union(ArchivedPayment.objects.filter(transaction_id=transaction_id).values('transaction_id'))
     )
+    if taken.exists():
+        return Response({'error': 'This Transaction ID has already been submitted.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    for item in items:
-        product = None
-        product_id = item.get('product_id') or item.get('id')
-        if product_id:
-            try:
-                product = Product.objects.get(id=product_id)
-            except Product.DoesNotExist:
-                pass
-
-        name = item.get('product_name') or item.get('product', {}).get('title', 'Unknown')
-        price = item.get('product_price') or item.get('product', {}).get('price', 0)
-        qty = item.get('quantity', 1)
-
-        PaymentItem.objects.create(
-            payment=payment,
-            product=product,
-            product_name=name,
-            product_price=price,
-            quantity=qty
-        )
+    try:
+        checkout = Checkout(request.user, transaction_id, total_amount, parse_lines(items))
+    except ValueError:
+        return Response({'error': 'Each item needs a valid product ID and quantity.'}, status=status.HTTP_400_BAD_REQUEST)
+    sale = admission.sale_for(product_id for product_id, _, _, _ in checkout.lines)
+    if sale and not admission.is_admitted(request, sale):
+        return admission.queue_response()
 
-        OrderItem.objects.create(
-            order=order,
-            product=product,
-            product_name=name,
-            product_price=price,
-            quantity=qty
+    try:
+        # Sale checkouts are written in batches with whoever else is checking out
+        payment, order = coalescer.submit(checkout) if sale else place_order(checkout)
+    except stock.OutOfStock as e:
+        return Response(
+            {'error': 'Some items in your order are out of stock.', 'out_of_stock': e.product_ids},
+            status=status.HTTP_409_CONFLICT
         )
+    except IntegrityError:
+        # Lost a race with the same transaction ID
+        return Response({'error': 'This Transaction ID has already been submitted.'}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response({
         'message': 'Order placed! Verification takes 5–10 minutes.',
@@ -79,32 +69,33 @@ def submit_payment(request):
     }, status=status.HTTP_201_CREATED)
 
 
+def serialize_payment(payment):
+    """History entry for a Payment or ArchivedPayment."""
+    return {
+        'id': payment.id,
+        'transaction_id': payment.transaction_id,
+        'total_amount': float(payment.total_amount),
+        'status': payment.status,
+        'created_at': payment.created_at.strftime('%b %d, %Y at %I:%M %p'),
+        'items': serialize_line_items(payment.items.all())
+    }
+
+
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_payment_history(request):
-    payments = Payment.objects.filter(user=request.user).order_by('-created_at')
-
-    data = []
-    for payment in payments:
-        items_data = [
-            {
-                'product_name': item.product_name,
-                'product_price': float(item.product_price),
-                'quantity': item.quantity,
-                'item_total': float(item.product_price * item.quantity)
-            }
-            for item in payment.items.all()
-        ]
-        data.append({
-            'id': payment.id,
-            'transaction_id': payment.transaction_id,
-            'total_amount': float(payment.total_amount),
-            'status': payment.status,
-            'created_at': payment.created_at.strftime('%b %d, %Y at %I:%M %p'),
-            'items': items_data
-        })
-
-    return Response(data)
+    """The user's payments, newest first; ?include_archived=1 adds archived ones."""
+    payments = list(
+        Payment.objects.filter(user_id=request.user.id)
+        .prefetch_related('items')
+        .order_by('-created_at')
+    )
+    if include_archived(request):
+        payments += ArchivedPayment.objects.filter(user_id=request.user.id).prefetch_related('items')
+        payments.sort(key=lambda p: p.created_at, reverse=True)
+    return Response([serialize_payment(p) for p in payments])
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -145,4 +136,5 @@ def update_payment_status(request, payment_id):
 
     payment.status = new_status
     payment.save()
+    publish_status_change('payment', payment)
     return Response({'message': f'Payment updated to {new_status}.'})
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Product, ProductImage
+from monitoring.admin_performance import LargeTableAdmin
+from .models import Product, ProductImage, PriceHistory
 
 
 class ProductImageInline(admin.TabularInline):
@@ -20,8 +21,10 @@ class ProductImageInline(admin.TabularInline):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('title', 'category', 'price', 'rating_rate', 'image_preview')
+class ProductAdmin(LargeTableAdmin):
+    # The image preview is on the change form only: an <img> per row made
+    # the browser fetch every product image to show a page of the list
+    list_display = ('title', 'category', 'price', 'rating_rate', 'view_count')
     list_filter = ('category',)
     search_fields = ('title', 'description')
     inlines = [ProductImageInline]
@@ -48,4 +51,12 @@ class ProductAdmin(admin.ModelAdmin):
                 obj.image
             )
         return 'No image set'
-    image_preview.short_description = 'Preview'
\ No newline at end of file
+    image_preview.short_description = 'Preview'
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(LargeTableAdmin):
+    list_display = ('product', 'old_price', 'new_price', 'changed_at', 'processed')
+    list_filter = ('processed',)
+    list_select_related = ('product',)
+    search_fields = ('product__title',)
+    readonly_fields = ('product', 'old_price', 'new_price', 'changed_at')
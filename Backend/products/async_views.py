@@ -0,0 +1,43 @@
+"""
+Async versions of the hot product read endpoints, served instead of the DRF
+views when SERVE_ASYNC is on (see products/urls.py). They use Django's async
+ORM, so a request waiting on the database doesn't hold a worker.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+from accounts.authentication import token_user_id
+from config.db_router import replica_reads
+from config.renderers import json_response
+from flashsale import admission
+from . import popularity, recent
+from .models import Product
+from .serializers import ProductSerializer
+from .views import filter_products, is_sale_listing
+
+
+@require_GET
+@replica_reads
+async def product_list(request):
+    if is_sale_listing(request.GET):
+        sale = await admission.acurrent_sale()
+        if sale:
+            return json_response(await admission.asale_products(sale))
+
+    products = [p async for p in filter_products(request.GET)]
+    serializer = ProductSerializer(products, many=True)
+    return json_response(serializer.data)
+
+
+@require_GET
+@replica_reads
+async def get_product_detail(request, pk):
+    try:
+        product = await Product.objects.prefetch_related('images').aget(pk=pk)
+    except Product.DoesNotExist:
+        return json_response({"error": "Product not found"}, status=404)
+
+    if popularity.record_view(product.id):
+        await sync_to_async(popularity.flush)()
+    await recent.arecord(recent.owner(request, token_user_id(request)), product.id)
+    serializer = ProductSerializer(product)
+    return json_response(serializer.data)
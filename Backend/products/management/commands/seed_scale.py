@@ -0,0 +1,286 @@
+import itertools
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Avg
+from django.utils import timezone
+from cart.models import Cart, CartItem
+from orders.models import LineItem, Order
+from payments.models import Payment
+from products.models import Product, ProductImage
+from ratings.models import ProductRating
+from wishlist.models import Wishlist
+
+ORDER_STATUSES = ['delivered'] * 6 + ['shipped'] * 2 + ['processing', 'pending', 'cancelled']
+PAYMENT_STATUS_FOR_ORDER = {
+    'delivered': 'verified', 'shipped': 'verified', 'processing': 'verified',
+    'pending': 'pending', 'cancelled': 'rejected',
+}
+
+# Shared with forked order workers so the big lists aren't pickled per task
+_CTX = {}
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative Zipf weights for random.choices: rank k gets weight 1/k^s."""
+    return list(itertools.accumulate(1 / (k ** s) for k in range(1, n + 1)))
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Let bulk_create keep the created_at/updated_at values we generate instead
+    of stamping every row with now() — the data is only useful for analytics
+    if it is spread over time.
+    """
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _seed_order_range(bounds):
+    """Create orders [start, stop) with items, payments and payment items."""
+    start, stop = bounds
+    ctx = _CTX
+    rng = random.Random(ctx['seed'] * 1_000_003 + start)
+    batch_size = ctx['batch_size']
+    product_ids = ctx['product_ids']
+    user_ids = ctx['user_ids']
+    now = timezone.now()
+
+    order_fields = [Order._meta.get_field('created_at'), Order._meta.get_field('updated_at')]
+    payment_fields = [Payment._meta.get_field('created_at')]
+
+    with explicit_timestamps(*order_fields, *payment_fields):
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            n = batch_stop - batch_start
+
+            buyers = rng.choices(user_ids, cum_weights=ctx['user_weights'], k=n)
+            baskets = []
+            for _ in range(n):
+                size = rng.choices((1, 2, 3, 4, 5), weights=(40, 30, 15, 10, 5))[0]
+                lines = {}
+                for pid in rng.choices(product_ids, cum_weights=ctx['product_weights'], k=size):
+                    lines[pid] = lines.get(pid, 0) + rng.randint(1, 3)
+                baskets.append(lines)
+
+            orders, payments = [], []
+            for i, (user_id, lines) in enumerate(zip(buyers, baskets)):
+                total = sum(ctx['prices'][pid] * qty for pid, qty in lines.items())
+                created = now - timedelta(seconds=rng.randint(0, ctx['span_seconds']))
+                status = rng.choice(ORDER_STATUSES)
+                tx = f"{ctx['run']}-{batch_start + i}"
+                orders.append(Order(
+                    user_id=user_id, status=status, total_amount=total,
+                    transaction_id=tx, created_at=created, updated_at=created,
+                ))
+                payments.append(Payment(
+                    user_id=user_id, status=PAYMENT_STATUS_FOR_ORDER[status],
+                    total_amount=total, transaction_id=tx, created_at=created,
+                ))
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders, batch_size=batch_size)
+                Payment.objects.bulk_create(payments, batch_size=batch_size)
+
+                LineItem.objects.bulk_create([
+                    LineItem(
+                        order_id=order.id, payment_id=payment.id, product_id=pid,
+                        product_name=ctx['titles'][pid], product_price=ctx['prices'][pid], quantity=qty,
+                    )
+                    for order, payment, lines in zip(orders, payments, baskets)
+                    for pid, qty in lines.items()
+                ], batch_size=batch_size)
+
+    return stop - start
+
+
+class Command(BaseCommand):
+    help = 'Generates a large synthetic data set (users, products, orders, payments, ratings, wishlists, carts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--products', type=int, default=2_000)
+        parser.add_argument('--orders', type=int, default=100_000)
+        parser.add_argument('--ratings', type=int, default=50_000)
+        parser.add_argument('--wishlist-ratio', type=float, default=0.3, help='Share of users with a wishlist')
+        parser.add_argument('--cart-ratio', type=float, default=0.2, help='Share of users with an open cart')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for product popularity')
+        parser.add_argument('--days', type=int, default=365, help='Spread order dates over this many days')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes for orders (default: CPU count; always 1 on SQLite)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['products'] < 1:
+            raise CommandError('--users and --products must be at least 1.')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.run = uuid.uuid4().hex[:8]
+        started = time.monotonic()
+
+        user_ids = self.timed('users', self.seed_users, options['users'])
+        products = self.timed('products', self.seed_products, options['products'])
+
+        # Popularity rank is random, so the bestsellers aren't just the lowest IDs
+        product_ids = list(products)
+        self.rng.shuffle(product_ids)
+        product_weights = zipf_cum_weights(len(product_ids), options['zipf'])
+        shuffled_users = list(user_ids)
+        self.rng.shuffle(shuffled_users)
+        user_weights = zipf_cum_weights(len(shuffled_users), 0.8)
+
+        _CTX.update(
+            seed=options['seed'], batch_size=self.batch_size, run=self.run,
+            product_ids=product_ids, product_weights=product_weights,
+            user_ids=shuffled_users, user_weights=user_weights,
+            prices={pid: p[0] for pid, p in products.items()},
+            titles={pid: p[1] for pid, p in products.items()},
+            span_seconds=options['days'] * 86_400,
+        )
+
+        self.timed('orders + payments', self.seed_orders, options['orders'], options['workers'])
+        self.timed('ratings', self.seed_ratings, options['ratings'], shuffled_users, product_ids, product_weights)
+        self.timed('wishlists', self.seed_wishlists, shuffled_users, product_ids, product_weights, options['wishlist_ratio'])
+        self.timed('carts', self.seed_carts, shuffled_users, product_ids, product_weights, options['cart_ratio'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded run {self.run} in {time.monotonic() - started:.1f}s.'
+        ))
+
+    def timed(self, label, fn, *args):
+        start = time.monotonic()
+        result = fn(*args)
+        self.stdout.write(f'  {label:<20} {time.monotonic() - start:7.1f}s')
+        return result
+
+    def batches(self, n):
+        for start in range(0, n, self.batch_size):
+            yield range(start, min(start + self.batch_size, n))
+
+    def seed_users(self, n):
+        # Hashing once keeps this fast; every seeded user's password is "password"
+        password = make_password('password')
+        ids = []
+        for chunk in self.batches(n):
+            users = User.objects.bulk_create([
+                User(username=f'seed_{self.run}_{i}', email=f'seed_{self.run}_{i}@example.com', password=password)
+                for i in chunk
+            ])
+            ids.extend(u.id for u in users)
+        return ids
+
+    def seed_products(self, n):
+        categories = [c[0] for c in Product.CATEGORY_CHOICES]
+        products = {}
+        for chunk in self.batches(n):
+            created = Product.objects.bulk_create([
+                Product(
+                    title=f'Seed product {self.run}-{i}',
+                    description='Synthetic product generated by seed_scale.',
+                    price=Decimal(self.rng.randint(199, 99_999)) / 100,
+                    category=self.rng.choice(categories),
+                    image=f'https://picsum.photos/seed/{self.run}{i}/600/600',
+                )
+                for i in chunk
+            ])
+            ProductImage.objects.bulk_create([
+                ProductImage(product_id=p.id, image=f'https://picsum.photos/seed/{self.run}{p.id}g{g}/600/600')
+                for p in created for g in range(self.rng.randint(0, 4))
+            ], batch_size=self.batch_size)
+            products.update((p.id, (p.price, p.title)) for p in created)
+        return products
+
+    def seed_orders(self, n, workers):
+        if n < 1:
+            return
+        if connection.vendor == 'sqlite':
+            # SQLite has a single writer — extra processes would only queue on the lock
+            workers = 1
+        workers = workers or os.cpu_count() or 1
+
+        # Chunks big enough to amortise process overhead, small enough to report progress
+        chunk = max(self.batch_size, min(50_000, n // (workers * 4) or 1))
+        ranges = [(s, min(s + chunk, n)) for s in range(0, n, chunk)]
+
+        done = 0
+        if workers == 1:
+            results = map(_seed_order_range, ranges)
+        else:
+            # Children must open their own DB connections (and pools)
+            connections.close_all()
+            for conn in connections.all():
+                if getattr(conn, 'pool', None):
+                    conn.close_pool()
+            pool = multiprocessing.get_context('fork').Pool(workers)
+            results = pool.imap_unordered(_seed_order_range, ranges)
+
+        for count in results:
+            done += count
+            self.stdout.write(f'    {done:>10,} / {n:,} orders', ending='\r')
+        self.stdout.write('')
+
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+    def seed_ratings(self, n, user_ids, product_ids, product_weights):
+        pairs = set()
+        attempts = 0
+        # Popular products collect most of the reviews; (product, user) must be unique
+        while len(pairs) < n and attempts < n * 3:
+            want = n - len(pairs)
+            for pid in self.rng.choices(product_ids, cum_weights=product_weights, k=want):
+                pairs.add((pid, self.rng.choice(user_ids)))
+            attempts += want
+
+        pairs = list(pairs)
+        for chunk in self.batches(len(pairs)):
+            ProductRating.objects.bulk_create([
+                ProductRating(product_id=pairs[i][0], user_id=pairs[i][1],
+                              score=self.rng.choices((1, 2, 3, 4, 5), weights=(5, 7, 15, 33, 40))[0])
+                for i in chunk
+            ], ignore_conflicts=True)
+
+        # bulk_create skips ProductRating.save(), so refresh the averages in one pass
+        averages = ProductRating.objects.filter(product_id__in=product_ids).values('product_id').annotate(avg=Avg('score'))
+        updates = [Product(id=row['product_id'], rating_rate=round(row['avg'], 1)) for row in averages]
+        Product.objects.bulk_update(updates, ['rating_rate'], batch_size=self.batch_size)
+
+    def seed_wishlists(self, user_ids, product_ids, product_weights, ratio):
+        owners = user_ids[:int(len(user_ids) * ratio)]
+        through = Wishlist.products.through
+        for chunk in self.batches(len(owners)):
+            wishlists = Wishlist.objects.bulk_create([Wishlist(user_id=owners[i]) for i in chunk])
+            rows = []
+            for w in wishlists:
+                picks = set(self.rng.choices(product_ids, cum_weights=product_weights, k=self.rng.randint(1, 15)))
+                rows.extend(through(wishlist_id=w.id, product_id=pid) for pid in picks)
+            through.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def seed_carts(self, user_ids, product_ids, product_weights, ratio):
+        owners = self.rng.sample(user_ids, int(len(user_ids) * ratio))
+        for chunk in self.batches(len(owners)):
+            carts = Cart.objects.bulk_create([Cart(user_id=owners[i]) for i in chunk])
+            items = []
+            for cart in carts:
+                picks = set(self.rng.choices(product_ids, cum_weights=product_weights, k=self.rng.randint(1, 4)))
+                items.extend(CartItem(cart_id=cart.id, product_id=pid, quantity=self.rng.randint(1, 3)) for pid in picks)
+            CartItem.objects.bulk_create(items, batch_size=self.batch_size)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_pricehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='view_count',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+    ]
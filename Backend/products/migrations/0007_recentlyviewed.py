@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('products', '0006_product_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecentlyViewed',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recently_viewed', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('product_ids', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Recently viewed',
+            },
+        ),
+    ]
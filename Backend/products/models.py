@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 
@@ -23,10 +24,28 @@ class Product(models.Model):
     # Now stores a URL string instead of an uploaded file
     image = models.URLField(max_length=2048, blank=True, default='')
     rating_rate = models.DecimalField(max_digits=3, decimal_places=1, default=0.0)
+    # Detail page views, written behind in batches (popularity.py). Indexed
+    # for ?ordering=popular.
+    view_count = models.PositiveBigIntegerField(default=0, db_index=True)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Record price changes so the wishlist price-drop job only has to look
+        # at products that actually changed. Saves that don't touch price
+        # (e.g. rating_rate updates) skip the lookup entirely.
+        update_fields = kwargs.get('update_fields')
+        track_price = self.pk is not None and (update_fields is None or 'price' in update_fields)
+        old_price = None
+        if track_price:
+            old_price = Product.objects.filter(pk=self.pk).values_list('price', flat=True).first()
+
+        super().save(*args, **kwargs)
+
+        if old_price is not None and old_price != self.price:
+            PriceHistory.objects.create(product=self, old_price=old_price, new_price=self.price)
+
 
 class ProductImage(models.Model):
     """Additional gallery images for a product — also stored as URLs."""
@@ -34,4 +53,40 @@ class ProductImage(models.Model):
     image = models.URLField(max_length=2048)
 
     def __str__(self):
-        return f"Image for {self.product.title}"
\ No newline at end of file
+        return f"Image for {self.product.title}"
+
+
+class PriceHistory(models.Model):
+    """One row per price change, written by Product.save()."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    # Set once the price-drop job has queued alerts for this change
+    processed = models.BooleanField(default=False, db_index=True)
+
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name_plural = 'Price history'
+
+    def __str__(self):
+        return f"{self.product.title}: {self.old_price} → {self.new_price}"
+
+
+class RecentlyViewed(models.Model):
+    """
+    A signed-in user's recently viewed product IDs, most recent first. The
+    live copy is in the cache (recent.py); this row is saved from it every
+    few seconds so the list survives a cache flush.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='recently_viewed'
+    )
+    product_ids = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Recently viewed'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.product_ids}"
@@ -0,0 +1,85 @@
+"""
+Write-behind product view counts, for ?ordering=popular.
+
+get_product_detail doesn't write anything per view. Views are counted in
+this worker's memory and flushed as one statement for every product seen
+since the last flush:
+
+    UPDATE products_product
+       SET view_count = view_count + CASE id WHEN 1 THEN 40 WHEN 7 THEN 3 END
+     WHERE id IN (1, 7)
+
+A flush runs every PRODUCT_VIEWS_FLUSH_SECONDS from a timer thread in each
+gunicorn worker, so views don't wait on a quiet worker, and sooner when
+PRODUCT_VIEWS_FLUSH_EVENTS views come in first (the request that makes it
+due runs it). The worker flushes on a clean shutdown too
+(config/shutdown.py), so a crash loses at most one interval's views per
+worker. Counts are for ranking, not billing.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, F, IntegerField, Value, When
+from config import shutdown
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# product_id -> views not yet written
+_pending = {}
+_events = 0
+_last_flush = time.monotonic()
+# The database the pending views were counted against
+_database = None
+_lock = threading.Lock()
+
+
+def record_view(product_id):
+    """Count a view of product_id. Returns True when a flush is due."""
+    global _events, _database
+    with _lock:
+        if not _pending:
+            _database = shutdown.database_id(Product)
+        _pending[product_id] = _pending.get(product_id, 0) + 1
+        _events += 1
+        return (
+            _events >= settings.PRODUCT_VIEWS_FLUSH_EVENTS
+            or time.monotonic() - _last_flush >= settings.PRODUCT_VIEWS_FLUSH_SECONDS
+        )
+
+
+def flush():
+    """Write the buffered views. Returns the number of products updated."""
+    global _events, _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _events = 0
+        _last_flush = time.monotonic()
+        database = _database
+    if not pending:
+        return 0
+    if database != shutdown.database_id(Product):
+        # Counted against another database (a finished test run's): drop them
+        logger.warning('Dropping views of %d product(s) counted against %s', len(pending), database)
+        return 0
+
+    added = Case(
+        *[When(id=pid, then=Value(views)) for pid, views in pending.items()],
+        output_field=IntegerField(),
+    )
+    try:
+        return Product.objects.filter(id__in=pending).update(view_count=F('view_count') + added)
+    except DatabaseError:
+        # Keep the views for the next flush rather than failing the request
+        logger.exception('Flushing views of %d product(s) failed', len(pending))
+        with _lock:
+            for pid, views in pending.items():
+                _pending[pid] = _pending.get(pid, 0) + views
+        return 0
+
+
+shutdown.register(flush)
+shutdown.register_timer(flush, settings.PRODUCT_VIEWS_FLUSH_SECONDS)
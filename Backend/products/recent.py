@@ -0,0 +1,178 @@
+"""
+Recently viewed products, for guests and signed-in shoppers.
+
+Each shopper's list is a cache entry of at most RECENTLY_VIEWED_MAX product
+IDs, most recent first and without repeats; get_product_detail moves the
+product it serves to the front. Guests are told apart by the X-Visitor-Id
+header, a random ID the storefront keeps in localStorage, and their lists
+live only in the cache.
+
+Signed-in users' lists are also saved to RecentlyViewed so they outlive the
+cache. That is written behind like the view counts (popularity.py): each
+worker remembers whose lists changed and saves them all in one upsert every
+RECENTLY_VIEWED_PERSIST_SECONDS, from a timer thread when no view makes it
+due sooner, and on a clean shutdown (config/shutdown.py).
+"""
+import logging
+import re
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.db import DatabaseError, IntegrityError, transaction
+from config import shutdown
+from .models import RecentlyViewed
+
+logger = logging.getLogger(__name__)
+
+VISITOR_HEADER = 'X-Visitor-Id'
+_VISITOR_ID = re.compile(r'[A-Za-z0-9-]{16,64}')
+
+# IDs of users whose cached list hasn't been saved yet
+_dirty = set()
+_last_persist = time.monotonic()
+# The database the changed lists were noted against
+_database = None
+_lock = threading.Lock()
+
+
+def owner(request, user_id):
+    """Whose list this request reads and writes: ('user', id), ('guest', id) or None."""
+    if user_id is not None:
+        return ('user', str(user_id))
+    visitor = request.headers.get(VISITOR_HEADER, '')
+    if _VISITOR_ID.fullmatch(visitor):
+        return ('guest', visitor)
+    return None
+
+
+def _key(who):
+    return f'recent:{who[0]}:{who[1]}'
+
+
+def _load(who):
+    if who[0] != 'user':
+        return []
+    return RecentlyViewed.objects.filter(user_id=who[1]).values_list('product_ids', flat=True).first() or []
+
+
+def _pushed(ids, product_id):
+    return ([product_id] + [i for i in ids if i != product_id])[:settings.RECENTLY_VIEWED_MAX]
+
+
+def product_ids(who):
+    """The shopper's list, most recent first."""
+    if who is None:
+        return []
+    ids = cache.get(_key(who))
+    if ids is None:
+        ids = _load(who)
+        if ids:
+            cache.set(_key(who), ids, settings.RECENTLY_VIEWED_TTL)
+    return ids
+
+
+async def aproduct_ids(who):
+    if who is None:
+        return []
+    ids = await cache.aget(_key(who))
+    if ids is None:
+        ids = await sync_to_async(_load)(who)
+        if ids:
+            await cache.aset(_key(who), ids, settings.RECENTLY_VIEWED_TTL)
+    return ids
+
+
+def _changed(who):
+    """Note a user's list for saving. Returns True when a save is due."""
+    global _database
+    if who[0] != 'user':
+        return False
+    with _lock:
+        if not _dirty:
+            _database = shutdown.database_id(RecentlyViewed)
+        _dirty.add(who[1])
+        return time.monotonic() - _last_persist >= settings.RECENTLY_VIEWED_PERSIST_SECONDS
+
+
+def record(who, product_id):
+    """Move product_id to the front of the shopper's list."""
+    if who is None:
+        return
+    ids = product_ids(who)
+    if ids[:1] == [product_id]:
+        return
+    cache.set(_key(who), _pushed(ids, product_id), settings.RECENTLY_VIEWED_TTL)
+    if _changed(who):
+        persist()
+
+
+async def arecord(who, product_id):
+    if who is None:
+        return
+    ids = await aproduct_ids(who)
+    if ids[:1] == [product_id]:
+        return
+    await cache.aset(_key(who), _pushed(ids, product_id), settings.RECENTLY_VIEWED_TTL)
+    if _changed(who):
+        await sync_to_async(persist)()
+
+
+def persist():
+    """Save the changed users' lists in one upsert. Returns how many were saved."""
+    global _last_persist
+    with _lock:
+        user_ids = list(_dirty)
+        _dirty.clear()
+        _last_persist = time.monotonic()
+        database = _database
+    if not user_ids:
+        return 0
+    if database != shutdown.database_id(RecentlyViewed):
+        # Noted against another database (a finished test run's): drop them
+        logger.warning('Dropping recently viewed lists of %d user(s) noted against %s', len(user_ids), database)
+        return 0
+
+    lists = cache.get_many([_key(('user', uid)) for uid in user_ids])
+    # A user deleted since their last view would fail everyone's upsert
+    existing = {str(uid) for uid in User.objects.filter(id__in=user_ids).values_list('id', flat=True)}
+    rows = [
+        RecentlyViewed(user_id=uid, product_ids=lists[_key(('user', uid))])
+        for uid in user_ids if uid in existing and _key(('user', uid)) in lists
+    ]
+    if not rows:
+        return 0
+    try:
+        with transaction.atomic():
+            _upsert(rows)
+        return len(rows)
+    except IntegrityError:
+        # Someone was deleted between the check and the write: save the rest one by one
+        return sum(_save_one(row) for row in rows)
+    except DatabaseError:
+        # Not retried. The lists are still in the cache, and the users' next
+        # views queue them again.
+        logger.exception('Saving recently viewed products of %d user(s) failed', len(rows))
+        return 0
+
+
+def _upsert(rows):
+    RecentlyViewed.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user'], update_fields=['product_ids', 'updated_at'],
+    )
+
+
+def _save_one(row):
+    try:
+        with transaction.atomic():
+            _upsert([row])
+        return 1
+    except DatabaseError:
+        logger.exception('Saving recently viewed products of user %s failed', row.user_id)
+        return 0
+
+
+shutdown.register(persist)
+shutdown.register_timer(persist, settings.RECENTLY_VIEWED_PERSIST_SECONDS)
@@ -1,3 +1,167 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from config.db_router import is_pinned, pin_to_primary, replica_reads
+from config.middleware import PrimaryStickinessMiddleware
+from . import popularity, recent
+from .models import Product, RecentlyViewed
 
-# Create your tests here.
+
+@replica_reads
+def which_db(request):
+    # QuerySet.db asks the router without running a query
+    return Product.objects.all().db
+
+
+@override_settings(REPLICA_DATABASES=['replica_0'], REPLICA_STICKY_SECONDS=30)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing decisions only. SimpleTestCase, because TestCase wraps each test
+    in a transaction, and inside one the router always answers `default`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method='get', user_id=None):
+        headers = {}
+        if user_id is not None:
+            token = AccessToken()
+            token['user_id'] = user_id
+            headers['Authorization'] = f'Bearer {token}'
+        return getattr(self.factory, method)('/api/products/', headers=headers)
+
+    def test_anonymous_reads_go_to_replica(self):
+        self.assertEqual(which_db(self.request()), 'replica_0')
+
+    def test_reads_outside_marked_views_go_to_primary(self):
+        self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_user_is_pinned_to_primary_after_writing(self):
+        self.assertEqual(which_db(self.request(user_id=7)), 'replica_0')
+        pin_to_primary(7)
+        self.assertEqual(which_db(self.request(user_id=7)), DEFAULT_DB_ALIAS)
+        # Other users are unaffected
+        self.assertEqual(which_db(self.request(user_id=8)), 'replica_0')
+
+    def test_invalid_token_is_treated_as_anonymous(self):
+        request = self.factory.get('/api/products/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(which_db(request), 'replica_0')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas_configured(self):
+        self.assertEqual(which_db(self.request()), DEFAULT_DB_ALIAS)
+
+    def test_successful_write_pins_user(self):
+        middleware = PrimaryStickinessMiddleware(lambda request: HttpResponse(status=201))
+        middleware(self.request('post', user_id=7))
+        self.assertTrue(is_pinned(7))
+
+    def test_reads_and_failed_writes_do_not_pin(self):
+        ok = PrimaryStickinessMiddleware(lambda request: HttpResponse(status=200))
+        failed = PrimaryStickinessMiddleware(lambda request: HttpResponse(status=400))
+        ok(self.request('get', user_id=7))
+        failed(self.request('post', user_id=7))
+        self.assertFalse(is_pinned(7))
+
+
+@override_settings(PRODUCT_VIEWS_FLUSH_SECONDS=3600, PRODUCT_VIEWS_FLUSH_EVENTS=5)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiet, cls.busy = Product.objects.bulk_create([
+            Product(title='Quiet', description='d', price=Decimal('1.00')),
+            Product(title='Busy', description='d', price=Decimal('1.00')),
+        ])
+
+    def setUp(self):
+        # Drop views buffered by earlier tests; their IDs may be reused by our products
+        popularity._pending.clear()
+        popularity.flush()
+        self.client = APIClient()
+
+    def view(self, product):
+        return self.client.get(f'/api/products/{product.id}/')
+
+    def test_views_are_written_behind_in_one_update(self):
+        for product in (self.busy, self.quiet, self.busy, self.busy):
+            self.view(product)
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.view_count, 0)
+
+        # The fifth view makes a flush due: one extra UPDATE for both products
+        with self.assertNumQueries(3):
+            self.view(self.busy)
+        counts = dict(Product.objects.values_list('title', 'view_count'))
+        self.assertEqual(counts, {'Quiet': 1, 'Busy': 4})
+
+    def test_popular_ordering(self):
+        self.view(self.busy)
+        popularity.flush()
+        response = self.client.get('/api/products/', {'ordering': 'popular'})
+        self.assertEqual([p['title'] for p in response.json()], ['Busy', 'Quiet'])
+
+    def test_views_counted_against_another_database_are_dropped(self):
+        self.view(self.busy)
+        # As at the end of a test run, when default points back at the real database
+        popularity._database = ('default', 'some-other.sqlite3')
+
+        with self.assertLogs('products.popularity', 'WARNING'):
+            self.assertEqual(popularity.flush(), 0)
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.view_count, 0)
+        self.assertEqual(popularity._pending, {})
+
+
+@override_settings(RECENTLY_VIEWED_MAX=3, RECENTLY_VIEWED_PERSIST_SECONDS=3600)
+class RecentlyViewedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='browser')
+        cls.products = Product.objects.bulk_create([
+            Product(title=f'P{n}', description='d', price=Decimal('1.00')) for n in range(4)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        recent._dirty.clear()
+        self.client = APIClient()
+
+    def browse(self, *indexes, **headers):
+        for i in indexes:
+            self.client.get(f'/api/products/{self.products[i].id}/', headers=headers)
+
+    def recent_titles(self, **headers):
+        return [p['title'] for p in self.client.get('/api/products/recent/', headers=headers).json()]
+
+    def test_guest_list_is_deduplicated_capped_and_most_recent_first(self):
+        visitor = {recent.VISITOR_HEADER: 'a1b2c3d4e5f6a7b8c9d0'}
+        self.browse(0, 1, 2, 1, 3, **visitor)
+        with self.assertNumQueries(2):   # products by id__in, then their images
+            self.assertEqual(self.recent_titles(**visitor), ['P3', 'P1', 'P2'])
+        # No visitor ID, nothing recorded
+        self.assertEqual(self.recent_titles(), [])
+
+    def test_users_list_is_saved_and_outlives_the_cache(self):
+        token = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.browse(0, 2, **token)
+        self.assertFalse(RecentlyViewed.objects.exists())
+
+        recent.persist()
+        cache.clear()
+        self.assertEqual(self.recent_titles(**token), ['P2', 'P0'])
+
+    def test_a_deleted_user_does_not_stop_the_others_being_saved(self):
+        gone = User.objects.create(username='gone')
+        for user in (self.user, gone):
+            self.browse(1, **{'Authorization': f'Bearer {AccessToken.for_user(user)}'})
+        gone.delete()
+
+        self.assertEqual(recent.persist(), 1)
+        self.assertEqual(RecentlyViewed.objects.get().user_id, self.user.id)
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from .views import product_list
-from . import views
+from . import async_views, views
+
+# Under ASGI (SERVE_ASYNC) the hot reads are served by async views
+read_views = async_views if settings.SERVE_ASYNC else views
 
 urlpatterns = [
-    path('', views.product_list),
-    path('<int:pk>/', views.get_product_detail),
+    path('', read_views.product_list),
+    path('<int:pk>/', read_views.get_product_detail),
+    path('recent/', views.recently_viewed),
     path('create/', views.create_product),
     path('update/<int:pk>/', views.update_product),
     path('delete/<int:pk>/', views.delete_product),
-]
\ No newline at end of file
+]
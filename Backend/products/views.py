@@ -2,59 +2,102 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from accounts.authentication import token_user_id
 from accounts.permissions import IsAdminUserCustom
+from config.db_router import replica_reads
+from flashsale import admission
+from . import popularity, recent
 from .models import Product
 from .serializers import ProductSerializer
 
 
-@api_view(['GET'])
-def product_list(request):
-    products = Product.objects.all()
+def filter_products(params):
+    """
+    Apply the list filters and ordering from the query string.
+    Shared by product_list and its async twin in async_views.py.
+    """
+    products = Product.objects.prefetch_related('images')
 
     # Filter by category
-    category = request.GET.get('category')
+    category = params.get('category')
     if category and category != 'All':
         products = products.filter(category__iexact=category)
 
     # Filter by search query (title or description)
-    search = request.GET.get('search')
+    search = params.get('search')
     if search:
         products = products.filter(title__icontains=search) | products.filter(description__icontains=search)
 
     # Filter by price range
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
     if min_price:
         products = products.filter(price__gte=min_price)
     if max_price:
         products = products.filter(price__lte=max_price)
 
-    # Ordering: price_asc, price_desc, name_asc, rating
-    ordering = request.GET.get('ordering')
+    # Ordering: price_asc, price_desc, name_asc, rating, popular
+    ordering = params.get('ordering')
     ordering_map = {
         'price_asc': 'price',
         'price_desc': '-price',
         'name_asc': 'title',
         'rating': '-rating_rate',
+        'popular': '-view_count',
     }
     if ordering in ordering_map:
         products = products.order_by(ordering_map[ordering])
 
+    return products
+
+
+def is_sale_listing(params):
+    """The unfiltered Sale category, which a running flash sale serves from cache."""
+    return params.get('category', '').lower() == admission.SALE_CATEGORY.lower() and set(params) == {'category'}
+
+
+@api_view(['GET'])
+@replica_reads
+def product_list(request):
+    if is_sale_listing(request.GET):
+        sale = admission.current_sale()
+        if sale:
+            # Pre-warmed for the whole sale (flashsale/admission.py)
+            return Response(admission.sale_products(sale))
+
+    products = filter_products(request.GET)
     serializer = ProductSerializer(products, many=True)
     return Response(serializer.data)
 
 
 @api_view(['GET'])
+@replica_reads
 def get_product_detail(request, pk):
     try:
-        product = Product.objects.get(pk=pk)
+        product = Product.objects.prefetch_related('images').get(pk=pk)
     except Product.DoesNotExist:
         return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    if popularity.record_view(product.id):
+        popularity.flush()
+    # From the token alone: authenticating would cost a user lookup on a public page
+    recent.record(recent.owner(request, token_user_id(request)), product.id)
     serializer = ProductSerializer(product)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@replica_reads
+def recently_viewed(request):
+    """The shopper's recently viewed products, most recent first."""
+    user_id = request.user.id if request.user.is_authenticated else None
+    ids = recent.product_ids(recent.owner(request, user_id))
+    # One id__in query; deleted products drop out
+    products = Product.objects.prefetch_related('images').in_bulk(ids)
+    serializer = ProductSerializer([products[i] for i in ids if i in products], many=True)
+    return Response(serializer.data)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdminUserCustom])
 def create_product(request):
@@ -1,11 +1,14 @@
 from django.contrib import admin
+from monitoring.admin_performance import LargeTableAdmin
 from .models import ProductRating
 
 
 @admin.register(ProductRating)
-class ProductRatingAdmin(admin.ModelAdmin):
+class ProductRatingAdmin(LargeTableAdmin):
     list_display = ('product', 'user', 'score', 'short_review', 'created_at')
     list_filter = ('score',)
+    list_select_related = ('product', 'user')
+    autocomplete_fields = ('product', 'user')
     search_fields = ('product__title', 'user__username', 'review')
     readonly_fields = ('created_at', 'updated_at')
 
@@ -0,0 +1,23 @@
+"""Async version of the public ratings list, used when SERVE_ASYNC is on."""
+from django.views.decorators.http import require_GET
+from config.db_router import replica_reads
+from config.renderers import json_response
+from products.models import Product
+from .models import ProductRating
+from .views import serialize_ratings
+
+
+@require_GET
+@replica_reads
+async def get_product_ratings(request, product_id):
+    """Public — returns all ratings + average for a product."""
+    try:
+        product = await Product.objects.aget(id=product_id)
+    except Product.DoesNotExist:
+        return json_response({'error': 'Product not found'}, status=404)
+
+    ratings = [
+        r async for r in
+        ProductRating.objects.filter(product=product).select_related('user').order_by('-created_at')
+    ]
+    return json_response(serialize_ratings(product, ratings))
@@ -1,25 +1,20 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import ProductRating
 from products.models import Product
-from orders.models import OrderItem
+from orders.models import LineItem
+from archive.models import ArchivedLineItem
+from accounts.authentication import StatelessJWTAuthentication
+from config.db_router import replica_reads
 
 
-@api_view(['GET'])
-def get_product_ratings(request, product_id):
-    """Public — returns all ratings + average for a product."""
-    try:
-        product = Product.objects.get(id=product_id)
-    except Product.DoesNotExist:
-        return Response({'error': 'Product not found'}, status=404)
-
-    ratings = ProductRating.objects.filter(product=product).select_related('user').order_by('-created_at')
-
-    data = {
+def serialize_ratings(product, ratings):
+    """Payload for the public ratings list; shared with async_views.py."""
+    return {
         'average': float(product.rating_rate),
-        'count': ratings.count(),
+        'count': len(ratings),
         'ratings': [
             {
                 'id': r.id,
@@ -31,10 +26,34 @@ def get_product_ratings(request, product_id):
             for r in ratings
         ]
     }
+
+
+@api_view(['GET'])
+@replica_reads
+def get_product_ratings(request, product_id):
+    """Public — returns all ratings + average for a product."""
+    try:
+        product = Product.objects.get(id=product_id)
+    except Product.DoesNotExist:
+        return Response({'error': 'Product not found'}, status=404)
+
+    ratings = list(
+        ProductRating.objects.filter(product=product).select_related('user').order_by('-created_at')
+    )
+    data = serialize_ratings(product, ratings)
     return Response(data)
 
 
+def _has_purchased(user_id, product):
+    """Whether the user ordered the product; archived orders count too."""
+    return (
+        LineItem.objects.filter(order__user_id=user_id, product=product).exists()
+        or ArchivedLineItem.objects.filter(order__user_id=user_id, product=product).exists()
+    )
+
+
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_my_rating(request, product_id):
     """Returns the logged-in user's rating + whether they're eligible to rate."""
@@ -43,13 +62,10 @@ def get_my_rating(request, product_id):
     except Product.DoesNotExist:
         return Response({'error': 'Product not found'}, status=404)
 
-    has_purchased = OrderItem.objects.filter(
-        order__user=request.user,
-        product=product
-    ).exists()
+    has_purchased = _has_purchased(request.user.id, product)
 
     try:
-        rating = ProductRating.objects.get(product=product, user=request.user)
+        rating = ProductRating.objects.get(product=product, user_id=request.user.id)
         return Response({
             'has_purchased': has_purchased,
             'my_rating': {
@@ -73,10 +89,7 @@ def submit_rating(request, product_id):
     except Product.DoesNotExist:
         return Response({'error': 'Product not found'}, status=404)
 
-    has_purchased = OrderItem.objects.filter(
-        order__user=request.user,
-        product=product
-    ).exists()
+    has_purchased = _has_purchased(request.user.id, product)
 
     if not has_purchased:
         return Response(
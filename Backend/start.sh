@@ -0,0 +1,20 @@
+#!/usr/bin/env bash
+# exit on error
+set -o errexit
+
+# SERVE_ASYNC=True runs the ASGI app on uvicorn workers, so requests waiting
+# on the database don't pin a worker; otherwise classic sync workers.
+WORKERS="${WEB_CONCURRENCY:-2}"
+
+if [[ "${SERVE_ASYNC,,}" =~ ^(1|true|yes|on)$ ]]; then
+    exec gunicorn config.asgi:application \
+        --config config/gunicorn.conf.py \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --workers "$WORKERS" \
+        --bind "0.0.0.0:${PORT:-8000}"
+else
+    exec gunicorn config.wsgi:application \
+        --config config/gunicorn.conf.py \
+        --workers "$WORKERS" \
+        --bind "0.0.0.0:${PORT:-8000}"
+fi
@@ -1,13 +1,28 @@
 from django.contrib import admin
-from .models import Wishlist
+from monitoring.admin_performance import LargeTableAdmin, related_count
+from .models import Wishlist, PriceDropAlert
 
 
 @admin.register(Wishlist)
-class WishlistAdmin(admin.ModelAdmin):
+class WishlistAdmin(LargeTableAdmin):
     list_display = ('user', 'product_count', 'created_at', 'updated_at')
+    list_select_related = ('user',)
     search_fields = ('user__username',)
     filter_list = ('created_at',)
-    
+    autocomplete_fields = ('user', 'products')
+
+    def get_queryset(self, request):
+        products = Wishlist.products.through.objects
+        return super().get_queryset(request).annotate(product_count=related_count(products, 'wishlist'))
+
     def product_count(self, obj):
-        return obj.products.count()
+        return obj.product_count
     product_count.short_description = 'Number of Products'
+
+
+@admin.register(PriceDropAlert)
+class PriceDropAlertAdmin(LargeTableAdmin):
+    list_display = ('user', 'product', 'old_price', 'new_price', 'created_at', 'sent_at')
+    list_select_related = ('user', 'product')
+    search_fields = ('user__username', 'product__title')
+    readonly_fields = ('user', 'product', 'price_change', 'old_price', 'new_price', 'created_at', 'sent_at')
@@ -0,0 +1,153 @@
+import json
+import sys
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from products.models import PriceHistory
+from .models import Wishlist, PriceDropAlert
+
+
+# ── Queueing ──────────────────────────────────────────────────────────────────
+
+def queue_price_drop_alerts(change_batch=500, chunk_size=5000):
+    """
+    Turn unprocessed price changes into PriceDropAlert outbox rows.
+
+    Works in batches of price changes; for each batch the products whose
+    price went down are joined against the wishlist through table in
+    keyset-paginated chunks and the alerts are bulk-inserted. Only wishlist
+    rows for products that actually dropped are ever read.
+    Returns the number of alerts queued.
+    """
+    queued = 0
+    pending = PriceHistory.objects.filter(processed=False).order_by('id')
+
+    while True:
+        changes = list(pending.values('id', 'product_id', 'old_price', 'new_price')[:change_batch])
+        if not changes:
+            break
+
+        # Several edits to one product since the last run collapse into a
+        # single comparison: first old price vs. latest new price.
+        drops = {}
+        for change in changes:
+            current = drops.get(change['product_id'])
+            if current is None:
+                drops[change['product_id']] = dict(change)
+            else:
+                current['id'] = change['id']
+                current['new_price'] = change['new_price']
+        drops = {pid: c for pid, c in drops.items() if c['new_price'] < c['old_price']}
+
+        with transaction.atomic():
+            if drops:
+                queued += _queue_for_products(drops, chunk_size)
+            PriceHistory.objects.filter(id__in=[c['id'] for c in changes]).update(processed=True)
+
+    return queued
+
+
+def _queue_for_products(drops, chunk_size):
+    through = Wishlist.products.through
+    rows_qs = (
+        through.objects
+        .filter(product_id__in=list(drops))
+        .order_by('id')
+        .values_list('id', 'wishlist__user_id', 'product_id')
+    )
+
+    queued = 0
+    last_id = 0
+    while True:
+        rows = list(rows_qs.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        # Alerts already queued for these changes (by an overlapping run) are
+        # skipped here, so only new rows are inserted and counted
+        change_ids = {drops[product_id]['id'] for _, _, product_id in rows}
+        existing = set(
+            PriceDropAlert.objects
+            .filter(price_change_id__in=change_ids, user_id__in={user_id for _, user_id, _ in rows})
+            .values_list('user_id', 'price_change_id')
+        )
+        alerts = [
+            PriceDropAlert(
+                user_id=user_id,
+                product_id=product_id,
+                price_change_id=drops[product_id]['id'],
+                old_price=drops[product_id]['old_price'],
+                new_price=drops[product_id]['new_price'],
+            )
+            for _, user_id, product_id in rows
+            if (user_id, drops[product_id]['id']) not in existing
+        ]
+        # ignore_conflicts still covers a run racing this one; its rows are
+        # then counted by both
+        PriceDropAlert.objects.bulk_create(alerts, batch_size=chunk_size, ignore_conflicts=True)
+        queued += len(alerts)
+
+    return queued
+
+
+# ── Sending ───────────────────────────────────────────────────────────────────
+
+class ConsoleSender:
+    """Prints one line per alert — the local stand-in for an email service."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, alerts):
+        for alert in alerts:
+            self.stream.write(
+                f"[price-drop] to {alert['user__email'] or alert['user__username']}: "
+                f"{alert['product__title']} is now {alert['new_price']} (was {alert['old_price']})\n"
+            )
+
+
+class FileSender:
+    """Appends alerts as NDJSON lines to settings.PRICE_ALERT_FILE."""
+
+    def __init__(self, path=None):
+        self.path = path or settings.PRICE_ALERT_FILE
+
+    def send(self, alerts):
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            for alert in alerts:
+                fh.write(json.dumps(alert, default=str) + '\n')
+
+
+SENDERS = {
+    'console': ConsoleSender,
+    'file': FileSender,
+}
+
+
+def get_sender(name=None):
+    name = name or settings.PRICE_ALERT_SENDER
+    try:
+        return SENDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown price alert sender '{name}'. Choose from: {list(SENDERS)}")
+
+
+def drain_outbox(sender, chunk_size=1000):
+    """Send every unsent alert in chunks, marking each chunk sent. Returns the count sent."""
+    sent = 0
+    unsent = PriceDropAlert.objects.filter(sent_at__isnull=True).order_by('id')
+
+    while True:
+        alerts = list(unsent.values(
+            'id', 'user_id', 'user__username', 'user__email',
+            'product_id', 'product__title', 'old_price', 'new_price',
+        )[:chunk_size])
+        if not alerts:
+            break
+
+        sender.send(alerts)
+        PriceDropAlert.objects.filter(id__in=[a['id'] for a in alerts]).update(sent_at=timezone.now())
+        sent += len(alerts)
+
+    return sent
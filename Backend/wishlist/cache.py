@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
+from .models import Wishlist
+
+
+def _ids_key(user_id):
+    return f'wishlist:ids:{user_id}'
+
+
+def get_wishlist_product_ids(user):
+    """
+    Return the set of product IDs in the user's wishlist.
+    Served from cache when possible; on a miss it is one query against the
+    M2M through table (no Wishlist get_or_create needed).
+    """
+    key = _ids_key(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(
+            Wishlist.products.through.objects
+            .filter(wishlist__user_id=user.id)
+            .values_list('product_id', flat=True)
+        )
+        cache.set(key, ids, settings.WISHLIST_IDS_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_wishlist_product_ids(user_id):
+    """Drop the cached ID set — call after any change to the user's wishlist."""
+    cache.delete(_ids_key(user_id))
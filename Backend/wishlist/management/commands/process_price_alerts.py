@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from wishlist.alerts import queue_price_drop_alerts, drain_outbox, get_sender
+
+
+class Command(BaseCommand):
+    help = 'Queues price-drop alerts for wishlisted products and sends the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue-only', action='store_true', help='Only queue alerts, do not send')
+        parser.add_argument('--send-only', action='store_true', help='Only drain the outbox')
+        parser.add_argument('--sender', default=None, help='console or file (defaults to PRICE_ALERT_SENDER)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Wishlist rows per insert batch')
+
+    def handle(self, *args, **options):
+        if options['queue_only'] and options['send_only']:
+            raise CommandError('--queue-only and --send-only cannot be combined.')
+
+        if not options['send_only']:
+            queued = queue_price_drop_alerts(chunk_size=options['chunk_size'])
+            self.stdout.write(f'Queued {queued} price-drop alert(s).')
+
+        if not options['queue_only']:
+            try:
+                sender = get_sender(options['sender'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            sent = drain_outbox(sender)
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} price-drop alert(s).'))
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from products.models import Product
+from products.models import Product, PriceHistory
 
 
 class Wishlist(models.Model):
@@ -14,3 +14,29 @@ class Wishlist(models.Model):
 
     class Meta:
         ordering = ['-updated_at']
+
+
+class PriceDropAlert(models.Model):
+    """
+    Outbox of price-drop notifications. Rows are queued in bulk by the
+    process_price_alerts command and drained by a sender (see alerts.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='price_alerts')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_alerts')
+    price_change = models.ForeignKey(PriceHistory, on_delete=models.CASCADE, related_name='alerts')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.product.title} dropped to {self.new_price} for {self.user.username}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'price_change'], name='unique_alert_per_price_change'),
+        ]
+        indexes = [
+            # Keeps "what is left to send" cheap no matter how big the outbox grows
+            models.Index(fields=['id'], condition=models.Q(sent_at__isnull=True), name='price_alert_unsent_idx'),
+        ]
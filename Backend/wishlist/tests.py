@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from products.models import PriceHistory, Product
+from . import alerts
+from .cache import get_wishlist_product_ids
+from .models import PriceDropAlert, Wishlist
+
+
+class ListSender:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, batch):
+        self.sent.extend(batch)
+
+
+class PriceDropAlertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lamp = Product.objects.create(title='Lamp', description='d', price=Decimal('50.00'))
+        cls.rug = Product.objects.create(title='Rug', description='d', price=Decimal('80.00'))
+        cls.fans = [User.objects.create(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(2)]
+        for user in cls.fans:
+            Wishlist.objects.create(user=user).products.add(cls.lamp, cls.rug)
+
+    def reprice(self, product, price):
+        product.price = Decimal(price)
+        product.save()
+
+    def test_price_drop_is_queued_once_sent_and_marked_processed(self):
+        self.reprice(self.lamp, '40.00')
+        self.reprice(self.rug, '90.00')   # a rise: no alert
+        self.assertEqual(PriceHistory.objects.filter(processed=False).count(), 2)
+
+        self.assertEqual(alerts.queue_price_drop_alerts(chunk_size=1), 2)
+        self.assertFalse(PriceHistory.objects.filter(processed=False).exists())
+        self.assertEqual(
+            sorted(PriceDropAlert.objects.values_list('user__username', 'product__title', 'old_price', 'new_price')),
+            [('fan0', 'Lamp', Decimal('50.00'), Decimal('40.00')), ('fan1', 'Lamp', Decimal('50.00'), Decimal('40.00'))],
+        )
+        # Nothing left to queue
+        self.assertEqual(alerts.queue_price_drop_alerts(), 0)
+
+        sender = ListSender()
+        self.assertEqual(alerts.drain_outbox(sender), 2)
+        self.assertEqual({a['user__email'] for a in sender.sent}, {'fan0@example.com', 'fan1@example.com'})
+        self.assertFalse(PriceDropAlert.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(alerts.drain_outbox(ListSender()), 0)
+
+    def test_alerts_already_queued_are_not_counted_again(self):
+        self.reprice(self.lamp, '40.00')
+        alerts.queue_price_drop_alerts()
+        # As if an overlapping run had not seen the change as processed yet
+        PriceHistory.objects.update(processed=False)
+
+        self.assertEqual(alerts.queue_price_drop_alerts(), 0)
+        self.assertEqual(PriceDropAlert.objects.count(), 2)
+
+    def test_edits_since_the_last_run_collapse_into_one_comparison(self):
+        self.reprice(self.lamp, '30.00')
+        self.reprice(self.lamp, '55.00')   # ends above where it started
+
+        out = StringIO()
+        call_command('process_price_alerts', '--queue-only', stdout=out)
+        self.assertIn('Queued 0 price-drop alert(s).', out.getvalue())
+        self.assertFalse(PriceDropAlert.objects.exists())
+
+
+class CompactWishlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='fan')
+        cls.lamp, cls.rug, cls.vase = [
+            Product.objects.create(title=title, description='d', price=Decimal('10.00')) for title in ('Lamp', 'Rug', 'Vase')
+        ]
+        cls.wishlist = Wishlist.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, product):
+        return self.client.post('/api/wishlist/add_product/?compact=1', {'product_id': product.id}, format='json')
+
+    def test_count_is_the_wishlist_size(self):
+        self.wishlist.products.add(self.lamp)
+        get_wishlist_product_ids(self.user)   # cached as {lamp}
+        # Changed without going through the API, so the cached set is stale
+        self.wishlist.products.add(self.rug)
+
+        response = self.add(self.vase)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], self.wishlist.products.count())
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(self.add(self.vase).data['count'], 3)
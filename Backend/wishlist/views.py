@@ -1,10 +1,34 @@
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Wishlist
 from .serializers import WishlistSerializer
+from .cache import get_wishlist_product_ids, invalidate_wishlist_product_ids
 from products.models import Product
+from products.serializers import ProductSerializer
+
+# Upper bound on IDs accepted by check_products in one request
+MAX_BATCH_CHECK = 200
+
+
+class WishlistProductPagination(PageNumberPagination):
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def wants_compact(request):
+    """True if the client asked for a delta response instead of the full wishlist."""
+    flag = request.query_params.get('compact', request.data.get('compact', ''))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def compact_payload(product_id, in_wishlist, count):
+    return {'product_id': product_id, 'in_wishlist': in_wishlist, 'count': count}
 
 
 class WishlistViewSet(viewsets.ModelViewSet):
@@ -13,18 +37,47 @@ class WishlistViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        return Wishlist.objects.filter(user=self.request.user).prefetch_related('products__images')
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_wishlist_product_ids(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_wishlist_product_ids(self.request.user.id)
 
     @action(detail=False, methods=['get'])
     def my_wishlist(self, request):
-        """Get the current user's wishlist"""
+        """
+        Get the current user's wishlist.
+        Pass ?page=N (and optionally &page_size=M) to get the products as a
+        paginated list instead of the whole wishlist in one response.
+        """
         wishlist, created = Wishlist.objects.get_or_create(user=request.user)
+
+        if 'page' in request.query_params:
+            products = (
+                Product.objects.filter(wishlists=wishlist)
+                .prefetch_related('images')
+                .order_by('id')
+            )
+            paginator = WishlistProductPagination()
+            page = paginator.paginate_queryset(products, request, view=self)
+            serializer = ProductSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        prefetch_related_objects([wishlist], 'products__images')
         serializer = self.get_serializer(wishlist)
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def add_product(self, request):
-        """Add a product to the wishlist"""
+        """
+        Add a product to the wishlist.
+        With ?compact=1 (or "compact": true in the body) only the changed
+        product ID and the new wishlist size are returned.
+        """
         product_id = request.data.get('product_id')
         
         if not product_id:
@@ -32,30 +85,67 @@ class WishlistViewSet(viewsets.ModelViewSet):
                 {'error': 'product_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
             return Response(
-                {'error': 'Product not found'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'product_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-        
-        if wishlist.products.filter(id=product_id).exists():
+
+        compact = wants_compact(request)
+        wishlisted = get_wishlist_product_ids(request.user)
+
+        if product_id in wishlisted:
+            if compact:
+                return Response(
+                    compact_payload(product_id, True, len(wishlisted)),
+                    status=status.HTTP_200_OK
+                )
             return Response(
                 {'message': 'Product already in wishlist'},
                 status=status.HTTP_200_OK
             )
-        
-        wishlist.products.add(product)
+
+        wishlist, created = Wishlist.objects.get_or_create(user=request.user)
+        through = Wishlist.products.through
+
+        # Insert the link row directly; an unknown product fails the FK check
+        # instead of needing a separate Product lookup first.
+        try:
+            with transaction.atomic():
+                through.objects.bulk_create(
+                    [through(wishlist_id=wishlist.id, product_id=product_id)],
+                    ignore_conflicts=True
+                )
+        except IntegrityError:
+            return Response(
+                {'error': 'Product not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        invalidate_wishlist_product_ids(request.user.id)
+
+        if compact:
+            # Counted afresh: the set read above may be stale, and the insert
+            # may have been a no-op. This also refills the cache.
+            count = len(get_wishlist_product_ids(request.user))
+            return Response(
+                compact_payload(product_id, True, count),
+                status=status.HTTP_201_CREATED
+            )
+
+        prefetch_related_objects([wishlist], 'products__images')
         serializer = self.get_serializer(wishlist)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'])
     def remove_product(self, request):
-        """Remove a product from the wishlist"""
+        """
+        Remove a product from the wishlist.
+        Supports the same compact mode as add_product.
+        """
         product_id = request.data.get('product_id')
         
         if not product_id:
@@ -63,22 +153,37 @@ class WishlistViewSet(viewsets.ModelViewSet):
                 {'error': 'product_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'product_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             wishlist = Wishlist.objects.get(user=request.user)
-            product = Product.objects.get(id=product_id)
         except Wishlist.DoesNotExist:
             return Response(
                 {'error': 'Wishlist not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        except Product.DoesNotExist:
+
+        Wishlist.products.through.objects.filter(
+            wishlist_id=wishlist.id,
+            product_id=product_id
+        ).delete()
+        invalidate_wishlist_product_ids(request.user.id)
+
+        if wants_compact(request):
+            count = Wishlist.products.through.objects.filter(wishlist_id=wishlist.id).count()
             return Response(
-                {'error': 'Product not found'},
-                status=status.HTTP_404_NOT_FOUND
+                compact_payload(product_id, False, count),
+                status=status.HTTP_200_OK
             )
-        
-        wishlist.products.remove(product)
+
+        prefetch_related_objects([wishlist], 'products__images')
         serializer = self.get_serializer(wishlist)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -93,7 +198,55 @@ class WishlistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-        is_in_wishlist = wishlist.products.filter(id=product_id).exists()
-        
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'product_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        is_in_wishlist = product_id in get_wishlist_product_ids(request.user)
+
         return Response({'in_wishlist': is_in_wishlist})
+
+    @action(detail=False, methods=['get'])
+    def product_ids(self, request):
+        """All product IDs in the current user's wishlist — one call per page"""
+        ids = sorted(get_wishlist_product_ids(request.user))
+        return Response({'product_ids': ids, 'count': len(ids)})
+
+    @action(detail=False, methods=['post'])
+    def check_products(self, request):
+        """
+        Batch version of check_product for product grids.
+
+        Expected body: { "product_ids": [1, 2, 3] }
+        Returns:       { "in_wishlist": { "1": true, "2": false, "3": true } }
+        """
+        product_ids = request.data.get('product_ids')
+
+        if not isinstance(product_ids, list) or not product_ids:
+            return Response(
+                {'error': 'product_ids must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(product_ids) > MAX_BATCH_CHECK:
+            return Response(
+                {'error': f'At most {MAX_BATCH_CHECK} product_ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            product_ids = [int(pid) for pid in product_ids]
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'product_ids must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        wishlisted = get_wishlist_product_ids(request.user)
+        return Response({
+            'in_wishlist': {pid: pid in wishlisted for pid in product_ids}
+        })
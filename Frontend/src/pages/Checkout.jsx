@@ -27,10 +27,16 @@ export default function Checkout() {
       setLoading(true);
       // Ensure we have the latest items from the server if logged in
       await fetchCartCount();
+      // Hold the items' stock while the shopper pays
+      try {
+        await axios.post(`${backendURL}/api/cart/reserve/`);
+      } catch (err) {
+        if (err.response?.status === 409) triggerToast(err.response.data.error);
+      }
       setLoading(false);
     };
     loadData();
-  }, [fetchCartCount, token]); // Re-run if token changes (login/logout)
+  }, [fetchCartCount, triggerToast, token]); // Re-run if token changes (login/logout)
 
   const handleDone = async () => {
     if (!transactionId.trim()) {
@@ -255,6 +255,7 @@ export default function Home() {
               <option value="price_desc">Price: High → Low</option>
               <option value="name_asc">Name: A → Z</option>
               <option value="rating">Top Rated</option>
+              <option value="popular">Most Popular</option>
             </select>
 
             <button
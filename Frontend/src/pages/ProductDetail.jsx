@@ -276,6 +276,38 @@ function RatingSection({ productId, isLiquorMode }) {
   );
 }
 
+// ── Row of product cards (related, recently viewed) ──────────────────────────
+function ProductStrip({ title, products, isLiquorMode }) {
+  const fullUrl = (path) => path?.startsWith('http') ? path : `${backendURL}${path}`;
+  return (
+    <div className="mt-20">
+      <div className="flex items-center gap-6 mb-10">
+        <h2 className={`text-3xl font-black tracking-tighter uppercase ${isLiquorMode ? 'text-purple-400' : 'text-gray-900'}`}>
+          {title}
+        </h2>
+        <div className={`h-px flex-1 ${isLiquorMode ? 'bg-gray-800' : 'bg-gray-100'}`}></div>
+      </div>
+      <div className="grid grid-cols-2 lg:grid-cols-4 gap-6">
+        {products.map(p => (
+          <Link key={p.id} to={`/product/${p.id}`} className="group">
+            <div className={`h-full rounded-[2rem] p-5 border transition-all duration-300 hover:shadow-xl ${isLiquorMode ? 'bg-gray-900/40 border-purple-900/20 hover:border-purple-500/40' : 'bg-white border-gray-100 hover:border-blue-200'}`}>
+              <div className={`aspect-square rounded-2xl mb-4 flex items-center justify-center p-4 ${isLiquorMode ? 'bg-black' : 'bg-gray-50'}`}>
+                <img src={fullUrl(p.image)} alt={p.title} className="h-full w-full object-contain group-hover:scale-110 transition-transform duration-500" />
+              </div>
+              <h3 className={`font-bold text-sm line-clamp-2 mb-2 transition-colors ${isLiquorMode ? 'text-gray-200 group-hover:text-purple-400' : 'text-gray-800 group-hover:text-blue-600'}`}>
+                {p.title}
+              </h3>
+              <p className={`font-black text-lg ${isLiquorMode ? 'text-purple-400' : 'text-blue-600'}`}>
+                ${parseFloat(p.price).toFixed(2)}
+              </p>
+            </div>
+          </Link>
+        ))}
+      </div>
+    </div>
+  );
+}
+
 // ── Main page ────────────────────────────────────────────────────────────────
 export default function ProductDetail() {
   const { id } = useParams();
@@ -283,6 +315,7 @@ export default function ProductDetail() {
 
   const [product, setProduct] = useState(null);
   const [related, setRelated] = useState([]);
+  const [recentlyViewed, setRecentlyViewed] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeImage, setActiveImage] = useState(null);
   const [quantity, setQuantity] = useState(1);
@@ -317,6 +350,13 @@ export default function ProductDetail() {
         } catch {
           setRelated([]);
         }
+        try {
+          // Asked after the product itself, which has just been recorded as viewed
+          const recentRes = await axios.get(`${backendURL}/api/products/recent/`);
+          setRecentlyViewed(recentRes.data.filter(p => p.id !== res.data.id).slice(0, 4));
+        } catch {
+          setRecentlyViewed([]);
+        }
       } catch (err) {
         console.error(err);
         setProduct(null);
@@ -565,31 +605,12 @@ export default function ProductDetail() {
 
         {/* RELATED PRODUCTS */}
         {related.length > 0 && (
-          <div className="mt-20">
-            <div className="flex items-center gap-6 mb-10">
-              <h2 className={`text-3xl font-black tracking-tighter uppercase ${isLiquorMode ? 'text-purple-400' : 'text-gray-900'}`}>
-                More in {product.category}
-              </h2>
-              <div className={`h-px flex-1 ${isLiquorMode ? 'bg-gray-800' : 'bg-gray-100'}`}></div>
-            </div>
-            <div className="grid grid-cols-2 lg:grid-cols-4 gap-6">
-              {related.map(p => (
-                <Link key={p.id} to={`/product/${p.id}`} className="group">
-                  <div className={`h-full rounded-[2rem] p-5 border transition-all duration-300 hover:shadow-xl ${isLiquorMode ? 'bg-gray-900/40 border-purple-900/20 hover:border-purple-500/40' : 'bg-white border-gray-100 hover:border-blue-200'}`}>
-                    <div className={`aspect-square rounded-2xl mb-4 flex items-center justify-center p-4 ${isLiquorMode ? 'bg-black' : 'bg-gray-50'}`}>
-                      <img src={getFullUrl(p.image)} alt={p.title} className="h-full w-full object-contain group-hover:scale-110 transition-transform duration-500" />
-                    </div>
-                    <h3 className={`font-bold text-sm line-clamp-2 mb-2 transition-colors ${isLiquorMode ? 'text-gray-200 group-hover:text-purple-400' : 'text-gray-800 group-hover:text-blue-600'}`}>
-                      {p.title}
-                    </h3>
-                    <p className={`font-black text-lg ${isLiquorMode ? 'text-purple-400' : 'text-blue-600'}`}>
-                      ${parseFloat(p.price).toFixed(2)}
-                    </p>
-                  </div>
-                </Link>
-              ))}
-            </div>
-          </div>
+          <ProductStrip title={`More in ${product.category}`} products={related} isLiquorMode={isLiquorMode} />
+        )}
+
+        {/* RECENTLY VIEWED */}
+        {recentlyViewed.length > 0 && (
+          <ProductStrip title="Recently Viewed" products={recentlyViewed} isLiquorMode={isLiquorMode} />
         )}
 
       </div>
@@ -8,6 +8,8 @@ import { User, Mail, Calendar, Package, CheckCircle, Clock, XCircle, Edit3, Save
 import backendURL from '../config';
 
 const ORDER_STEPS = ['pending', 'processing', 'shipped', 'delivered'];
+// How often payment statuses are refetched when the server has no event stream
+const STATUS_POLL_MS = 30000;
 
 function OrderTimeline({ status, isLiquorMode }) {
   if (status === 'cancelled' || status === 'rejected') return (
@@ -105,6 +107,66 @@ export default function Profile() {
     fetchAll();
   }, [triggerToast]);
 
+  // Payment status changes are pushed by the server (SSE) where it runs
+  // under ASGI. The stream is opened with a short-lived ticket rather than
+  // the access token; when it drops for good (expired ticket), reopen with a
+  // new one. A server without streams answers the ticket request with 204,
+  // and the history is polled instead.
+  useEffect(() => {
+    if (!localStorage.getItem('token')) return;
+    let source = null;
+    let retryTimer = null;
+    let pollTimer = null;
+    let lastEventId = null;
+    let closed = false;
+
+    const poll = async () => {
+      try {
+        const res = await axios.get(`${backendURL}/api/payments/history/`);
+        if (!closed) setPayments(res.data);
+      } catch (err) {
+        // Try again on the next tick
+      }
+    };
+
+    const open = async () => {
+      try {
+        const res = await axios.post(`${backendURL}/api/events/ticket/`);
+        if (closed) return;
+        if (res.status === 204) {
+          pollTimer = setInterval(poll, STATUS_POLL_MS);
+          return;
+        }
+        const params = new URLSearchParams({ ticket: res.data.ticket });
+        if (lastEventId) params.set('last_event_id', lastEventId);
+        source = new EventSource(`${backendURL}/api/events/?${params}`);
+        source.addEventListener('payment', (e) => {
+          lastEventId = e.lastEventId || lastEventId;
+          const { object_id, status } = JSON.parse(e.data);
+          setPayments(prev => prev.map(p => (p.id === object_id ? { ...p, status } : p)));
+        });
+        source.onerror = () => {
+          // CONNECTING means the browser is already retrying by itself
+          if (source.readyState === EventSource.CLOSED) reopen();
+        };
+      } catch (err) {
+        reopen();
+      }
+    };
+    const reopen = () => {
+      if (source) source.close();
+      if (!closed) retryTimer = setTimeout(open, 5000);
+    };
+
+    open();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      clearInterval(pollTimer);
+      if (source) source.close();
+    };
+  }, []);
+
   const handleSave = async () => {
     try {
       const res = await axios.patch(`${backendURL}/api/profile/update/`, formData);
@@ -101,6 +101,19 @@ axios.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Recently viewed products: guests are told apart by a random ID kept in
+// localStorage (signed-in shoppers by their token)
+let visitorId = localStorage.getItem('visitor_id');
+if (!visitorId) {
+  visitorId = crypto.randomUUID();
+  localStorage.setItem('visitor_id', visitorId);
+}
+
+axios.interceptors.request.use((config) => {
+  config.headers['X-Visitor-Id'] = visitorId;
+  return config;
+});
+
 // Auto-logout on 401
 axios.interceptors.response.use(
   (response) => response,
@@ -112,4 +125,38 @@ axios.interceptors.response.use(
     }
     return Promise.reject(error);
   }
-);
\ No newline at end of file
+);
+
+// Flash sales: sale items answer 429 until we've been through the waiting
+// room. Wait our turn, keep the admission token and retry the request.
+let saleAdmission = sessionStorage.getItem('sale_admission');
+
+axios.interceptors.request.use((config) => {
+  if (saleAdmission) config.headers['X-Sale-Admission'] = saleAdmission;
+  return config;
+});
+
+axios.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const { response, config } = error;
+    if (response?.status !== 429 || !response.data?.queue || config._saleRetried) {
+      return Promise.reject(error);
+    }
+    const { data: joined } = await axios.post(`${backendURL}/api/sale/queue/`);
+    for (;;) {
+      const { data: place } = await axios.get(`${backendURL}/api/sale/queue/status/`, {
+        params: { ticket: joined.ticket },
+      });
+      if (place.admission) {
+        saleAdmission = place.admission;
+        sessionStorage.setItem('sale_admission', saleAdmission);
+        break;
+      }
+      await new Promise((resolve) => setTimeout(resolve, Math.min(place.wait_seconds, 5) * 1000));
+    }
+    config._saleRetried = true;
+    config.headers['X-Sale-Admission'] = saleAdmission;
+    return axios(config);
+  }
+);